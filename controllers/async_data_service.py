@@ -0,0 +1,102 @@
+from typing import Any, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from controllers.contract_controller import ContractController
+from controllers.event_controller import EventController
+from models.filters import CONTRACT_FILTERS, EVENT_FILTERS, apply_filter
+from models.load_plans import load_plan
+from models.models import Contract, Customer, Event, User
+
+
+class AsyncDataService:
+    """
+    Asyncio data access mirroring the read methods of the controllers.
+
+    The lookups and the filtered listings have the same semantics as their
+    synchronous counterparts (same filters, orderings and load plans), so a
+    front end can serve many users per process while awaiting the database.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """
+        Initializes the service.
+
+        :param session: SQLAlchemy AsyncSession
+        """
+        self.session = session
+
+    async def get(self, model: Any, value: Any, plan: str) -> Optional[Any]:
+        """
+        Retrieves a row by its ID, None if the value is not an ID or no row matches.
+
+        The relationships the views read are loaded with the row by a load plan: an
+        AsyncSession cannot load them lazily when they are accessed.
+
+        :param plan: The name of the load plan
+        """
+        try:
+            return await self.session.get(model, int(value), options=load_plan(plan))
+        except (TypeError, ValueError):
+            return None
+
+    async def get_event(self, event_id: int) -> Optional[Event]:
+        """
+        Retrieves an event by its ID, with its contract, customer and support contact.
+        """
+        return await self.get(Event, event_id, "event_listing")
+
+    async def get_contract(self, contract_id: int) -> Optional[Contract]:
+        """
+        Gets a contract by ID, with its customer.
+        """
+        return await self.get(Contract, contract_id, "contract_listing")
+
+    async def get_customer(self, customer_id: int) -> Optional[Customer]:
+        """
+        Retrieves a customer by their ID, with their sales contact.
+        """
+        return await self.get(Customer, customer_id, "customer_listing")
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        """
+        Retrieves a user by their email, with their role loaded.
+        """
+        statement = select(User).options(joinedload(User.role)).where(User.email == email)
+        return (await self.session.scalars(statement)).first()
+
+    async def get_filtered_contracts(self, filter_option: int) -> List[Contract]:
+        """
+        Get filtered contracts based on the filter option, as ContractController.get_filtered_contracts.
+        """
+        statement = select(Contract).options(*load_plan("contract_listing")).order_by(Contract.id)
+        if filter_option in ContractController.filter_options:
+            statement = apply_filter(statement, CONTRACT_FILTERS, ContractController.filter_options[filter_option])
+        return list(await self.session.scalars(statement))
+
+    async def get_admin_filtered_events(self, filter_option: int) -> List[Event]:
+        """
+        Get filtered events based on the selected option, as EventController.get_admin_filtered_events.
+        """
+        statement = self.list_events()
+        if filter_option in EventController.admin_filter_options:
+            statement = apply_filter(statement, EVENT_FILTERS, EventController.admin_filter_options[filter_option])
+        return list(await self.session.scalars(statement))
+
+    async def get_support_filtered_events(self, filter_option: int, user_id: int) -> List[Event]:
+        """
+        Get filtered events for the support role, as EventController.get_support_filtered_events.
+        """
+        statement = self.list_events()
+        if filter_option == 1:
+            statement = apply_filter(statement, EVENT_FILTERS, "assigned_to", user_id)
+        return list(await self.session.scalars(statement))
+
+    @staticmethod
+    def list_events():
+        """
+        Builds the base statement of the event listings, with the event listing load plan.
+        """
+        return select(Event).options(*load_plan("event_listing")).order_by(Event.id)
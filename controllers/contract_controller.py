@@ -1,17 +1,23 @@
 from datetime import date
 from typing import List, Optional
 
+from config import read_only
 from sentry_config import sentry_exception_handler
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session
 
+from models.filters import CONTRACT_FILTERS, apply_filter
+from models.load_plans import load_plan
 from models.models import Contract
 from utils.jwtoken import TokenManager
+from utils.pagination import KeysetPaginator
 from utils.validators import DataValidator
 from views.contract_view import ContractView
 from views.menu_view import MenuView
 
 
 class ContractController:
+    filter_options = {1: "unsigned", 2: "unpaid", 3: "signed"}
+
     def __init__(self, session: Session):
         """
         Initializes the contract controller.
@@ -22,6 +28,7 @@ class ContractController:
         self.contract_view = ContractView()
         self.menu_view = MenuView()
         self.validators = DataValidator(session)
+        self.lookups = self.validators.lookups
         self.token_manager = TokenManager()
 
     @sentry_exception_handler
@@ -54,7 +61,6 @@ class ContractController:
 
         self.session.add(contract)
         self.session.commit()
-        self.session.refresh(contract)
         self.contract_view.contract_created()
         return contract
 
@@ -70,7 +76,7 @@ class ContractController:
         prompts = self.contract_view.contract_view_prompts()
         contract_id = self.validators.validate_input(prompts["contract_id"], lambda value:
                                                      self.validators.validate_existing_my_contract_id
-                                                     (value, user))
+                                                     (value, user.id))
         contract = self.get_contract(contract_id)
 
         if contract:
@@ -99,7 +105,6 @@ class ContractController:
                 contract.is_signed = is_signed_bool
 
             self.session.commit()
-            self.session.refresh(contract)
             self.contract_view.contract_updated()
         else:
             self.contract_view.contract_not_found()
@@ -107,6 +112,7 @@ class ContractController:
 
     @sentry_exception_handler
     @TokenManager.token_required
+    @read_only
     def display_contracts(self, user) -> None:
         """
         Display filtered contracts.
@@ -118,7 +124,16 @@ class ContractController:
         contracts = self.get_filtered_contracts(filter_option)
         self.contract_view.display_contracts_view(contracts)
 
+    def list_contracts(self) -> Query:
+        """
+        Builds the base query of the contract listings, with the contract listing load plan.
+
+        :return: A query of Contract objects loading their customer
+        """
+        return self.session.query(Contract).options(*load_plan("contract_listing")).order_by(Contract.id)
+
     @sentry_exception_handler
+    @read_only
     def get_filtered_contracts(self, filter_option: int) -> List[Contract]:
         """
         Get filtered contracts based on the filter option.
@@ -126,14 +141,11 @@ class ContractController:
         :param filter_option: The option to filter contracts
         :return: A list of Contract objects that match the filter criteria
         """
-        if filter_option == 1:
-            return self.session.query(Contract).filter(Contract.is_signed.is_(False)).all()
-        elif filter_option == 2:
-            return self.session.query(Contract).filter(Contract.amount_due > 0).all()
-        elif filter_option == 3:
-            return self.session.query(Contract).filter(Contract.is_signed.is_(True)).all()
+        contracts = self.list_contracts()
+        if filter_option in self.filter_options:
+            return apply_filter(contracts, CONTRACT_FILTERS, self.filter_options[filter_option]).all()
         else:
-            return self.session.query(Contract).all()
+            return contracts.all()
 
     @sentry_exception_handler
     def get_contract(self, contract_id: int) -> Optional[Contract]:
@@ -143,12 +155,13 @@ class ContractController:
         :param contract_id: The ID of the contract to retrieve
         :return: The Contract object with the specified ID or None if not found
         """
-        return self.session.query(Contract).filter(Contract.id == contract_id).first()
+        return self.lookups.get(Contract, contract_id)
 
     @sentry_exception_handler
+    @read_only
     def display_all_contracts(self) -> None:
         """
         Display all contracts.
         """
-        contracts = self.session.query(Contract).all()
-        self.contract_view.display_contracts_view(contracts)
+        paginator = KeysetPaginator(self.list_contracts(), Contract.id)
+        self.menu_view.browse_pages(paginator, self.contract_view.display_contracts_view)
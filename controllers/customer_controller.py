@@ -1,11 +1,17 @@
 from datetime import date
 from typing import Optional
 
+from config import read_only
 from sentry_config import sentry_exception_handler
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session
 
+from models.load_plans import load_plan
 from models.models import Customer
+from utils.bulk_import import CustomerImporter, ImportReport
+from utils.dedup import likely_duplicates
 from utils.jwtoken import TokenManager
+from utils.pagination import KeysetPaginator
+from utils.search import SearchPaginator, search_statement
 from utils.validators import DataValidator
 from views.customer_view import CustomerView
 from views.menu_view import MenuView
@@ -22,6 +28,7 @@ class CustomerController:
         self.customer_view = CustomerView()
         self.menu_view = MenuView()
         self.validators = DataValidator(session)
+        self.lookups = self.validators.lookups
         self.token_manager = TokenManager()
 
     @sentry_exception_handler
@@ -41,6 +48,10 @@ class CustomerController:
         company_name = self.validators.validate_input(prompts["company_name"], self.validators.validate_str)
         creation_date = date.today()
 
+        duplicates = likely_duplicates(self.session, full_name, company_name)
+        if duplicates:
+            self.customer_view.duplicate_customer_warning(duplicates)
+
         customer = Customer(
             full_name=full_name,
             email=email,
@@ -52,7 +63,6 @@ class CustomerController:
 
         self.session.add(customer)
         self.session.commit()
-        self.session.refresh(customer)
         self.customer_view.customer_created()
         return customer
 
@@ -69,7 +79,7 @@ class CustomerController:
         prompts = self.customer_view.customer_view_prompts()
         customer_id = self.validators.validate_input(prompts["customer_id"], lambda value:
                                                      self.validators.validate_existing_my_customer_id
-                                                     (value, user))
+                                                     (value, user.id))
         customer = self.get_customer(customer_id)
 
         if customer:
@@ -92,7 +102,6 @@ class CustomerController:
                 customer.company_name = company_name
             customer.last_update = date.today()
             self.session.commit()
-            self.session.refresh(customer)
             self.customer_view.customer_updated()
 
         else:
@@ -100,6 +109,21 @@ class CustomerController:
 
         return customer
 
+    @sentry_exception_handler
+    @TokenManager.token_required
+    def import_customers(self, user) -> ImportReport:
+        """
+        Imports customers in bulk from a CSV or JSONL file, assigned to the user.
+
+        :param user: The user importing the customers
+        :return: The report of the import, with the rejected rows and their errors
+        """
+        prompts = self.customer_view.get_import_customers_prompts()
+        path = self.validators.validate_input(prompts["path"], self.validators.validate_import_file)
+        report = CustomerImporter(self.session, user.id).import_file(path.strip())
+        self.customer_view.display_import_report(report)
+        return report
+
     @sentry_exception_handler
     def get_customer(self, customer_id: int) -> Optional[Customer]:
         """
@@ -108,12 +132,33 @@ class CustomerController:
         :param customer_id: The ID of the customer to retrieve
         :return: The Customer object with the specified ID or None if not found
         """
-        return self.session.query(Customer).filter(Customer.id == customer_id).first()
+        return self.lookups.get(Customer, customer_id)
+
+    def list_customers(self) -> Query:
+        """
+        Builds the base query of the customer listings, with the customer listing load plan.
+
+        :return: A query of Customer objects loading their sales contact
+        """
+        return self.session.query(Customer).options(*load_plan("customer_listing")).order_by(Customer.id)
 
     @sentry_exception_handler
+    @read_only
     def display_all_customers(self) -> None:
         """
         Displays the list of customers.
         """
-        customers = self.session.query(Customer).all()
-        self.customer_view.display_customers_view(customers)
+        paginator = KeysetPaginator(self.list_customers(), Customer.id)
+        self.menu_view.browse_pages(paginator, self.customer_view.display_customers_view)
+
+    @sentry_exception_handler
+    @read_only
+    def search_customers(self) -> None:
+        """
+        Searches the customers by name, company and email, the most relevant first.
+        """
+        prompts = self.customer_view.get_search_prompts()
+        value = self.validators.validate_input(prompts["search"], self.validators.validate_str)
+        statement = search_statement(Customer, value, self.session.get_bind().dialect.name)
+        paginator = SearchPaginator(self.session, statement.options(*load_plan("customer_listing")))
+        self.menu_view.browse_pages(paginator, self.customer_view.display_customers_view)
@@ -1,19 +1,27 @@
-from datetime import date
+from datetime import datetime
 from typing import List, Optional
 
-from sentry_config import sentry_exception_handler
-from rich.console import Console
-from sqlalchemy.orm import Session
+from config import read_only
+from sentry_config import SharedConsole, sentry_exception_handler
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, Session
 
+from models.filters import EVENT_FILTERS, apply_filter
+from models.load_plans import load_plan
 from models.models import Event
+from models.schedule import find_conflict
+from utils.auto_assign import AssignmentPlan, commit_assignments, plan_assignments
 from utils.jwtoken import TokenManager
+from utils.pagination import KeysetPaginator
+from utils.search import SearchPaginator, search_statement
 from utils.validators import DataValidator
 from views.event_view import EventView
 from views.menu_view import MenuView
 
 
 class EventController:
-    console = Console()
+    console = SharedConsole()
+    admin_filter_options = {1: "unassigned", 2: "upcoming", 3: "past"}
 
     def __init__(self, session: Session):
         """
@@ -25,6 +33,7 @@ class EventController:
         self.event_view = EventView()
         self.menu_view = MenuView()
         self.validators = DataValidator(session)
+        self.lookups = self.validators.lookups
         self.token_manager = TokenManager()
 
     @sentry_exception_handler
@@ -41,7 +50,7 @@ class EventController:
         event_name = self.validators.validate_input(prompts["event_name"], self.validators.validate_str)
         contract_id = self.validators.validate_input(prompts["contract_id"], lambda value:
                                                      self.validators.validate_existing_my_contract_id
-                                                     (value, user))
+                                                     (value, user.id))
         event_start_date = self.validators.validate_input(prompts["event_start_date"],
                                                           self.validators.validate_date)
         event_end_date = self.validators.validate_input(prompts["event_end_date"], self.validators.validate_date)
@@ -61,7 +70,6 @@ class EventController:
 
         self.session.add(event)
         self.session.commit()
-        self.session.refresh(event)
         self.event_view.event_created()
         return event
 
@@ -69,7 +77,8 @@ class EventController:
     @TokenManager.token_required
     def update_event(self, user) -> Optional[Event]:
         """
-        Updates an existing event.
+        Updates an existing event. New dates are refused when the support user of the event
+        already covers another event overlapping them.
 
         :param user: The user updating the event
         :return: The updated Event object or None if the event was not found or update fails
@@ -95,22 +104,46 @@ class EventController:
             if event_name:
                 event.event_name = event_name
             if event_start_date:
-                event.event_start_date = event_start_date
+                event.event_start_date = datetime.strptime(event_start_date, "%d/%m/%Y")
             if event_end_date:
-                event.event_end_date = event_end_date
+                event.event_end_date = datetime.strptime(event_end_date, "%d/%m/%Y")
             if location:
                 event.location = location
             if attendees:
                 event.attendees = attendees
             if notes:
                 event.notes = notes
-            self.session.commit()
-            self.session.refresh(event)
+
+            support_id = event.support_contact_id
+            conflict_id = find_conflict(self.session, event, support_id) if support_id and (
+                event_start_date or event_end_date) else None
+            if conflict_id:
+                self.session.rollback()
+                self.event_view.support_already_booked(support_id, conflict_id)
+                return None
+            if not self.commit_schedule(support_id):
+                return None
             self.event_view.event_updated()
         else:
             self.event_view.event_not_found()
         return event
 
+    def commit_schedule(self, support_id: Optional[int]) -> bool:
+        """
+        Commits a change of the dates or of the support user of an event. On PostgreSQL the
+        exclusion constraint rejects an overlap committed meanwhile by another session.
+
+        :param support_id: The ID of the support user of the event
+        :return: True if committed, False if rolled back
+        """
+        try:
+            self.session.commit()
+        except IntegrityError:
+            self.session.rollback()
+            self.event_view.support_booked_meanwhile(support_id)
+            return False
+        return True
+
     @sentry_exception_handler
     def get_event(self, event_id: int) -> Optional[Event]:
         """
@@ -120,18 +153,40 @@ class EventController:
         :return: The Event object with the specified ID or None if not found
         """
 
-        return self.session.query(Event).filter(Event.id == event_id).first()
+        return self.lookups.get(Event, event_id)
+
+    def list_events(self) -> Query:
+        """
+        Builds the base query of the event listings, with the event listing load plan.
+
+        :return: A query of Event objects loading their contract, customer and support contact
+        """
+        return self.session.query(Event).options(*load_plan("event_listing")).order_by(Event.id)
 
     @sentry_exception_handler
+    @read_only
     def display_all_events(self) -> None:
         """
         Displays all events.
         """
-        events = self.session.query(Event).all()
-        self.event_view.display_events_view(events)
+        paginator = KeysetPaginator(self.list_events(), Event.id)
+        self.menu_view.browse_pages(paginator, self.event_view.display_events_view)
+
+    @sentry_exception_handler
+    @read_only
+    def search_events(self) -> None:
+        """
+        Searches the events by name, location and notes, the most relevant first.
+        """
+        prompts = self.event_view.get_search_prompts()
+        value = self.validators.validate_input(prompts["search"], self.validators.validate_str)
+        statement = search_statement(Event, value, self.session.get_bind().dialect.name)
+        paginator = SearchPaginator(self.session, statement.options(*load_plan("event_listing")))
+        self.menu_view.browse_pages(paginator, self.event_view.display_events_view)
 
     @sentry_exception_handler
     @TokenManager.token_required
+    @read_only
     def display_events(self, user) -> None:
         """
         Displays the list of events based on the user's role.
@@ -146,11 +201,12 @@ class EventController:
         elif user.role.name.lower() == 'support':
             title, options = self.menu_view.filtered_event_support_menu_options()
             filter_option = self.menu_view.select_choice(title, options)
-            events = self.get_support_filtered_events(filter_option, user)
+            events = self.get_support_filtered_events(filter_option, user.id)
 
         self.event_view.display_events_view(events)
 
     @sentry_exception_handler
+    @read_only
     def get_admin_filtered_events(self, filter_option: int) -> List[Event]:
         """
         Get filtered events based on the selected option.
@@ -159,35 +215,34 @@ class EventController:
         :return: A list of filtered Event objects
         """
 
-        if filter_option == 1:
-            return self.session.query(Event).filter(Event.support_contact_id.is_(None)).all()
-        elif filter_option == 2:
-            return self.session.query(Event).filter(Event.event_start_date > date.today()).all()
-        elif filter_option == 3:
-            return self.session.query(Event).filter(Event.event_end_date < date.today()).all()
+        events = self.list_events()
+        if filter_option in self.admin_filter_options:
+            return apply_filter(events, EVENT_FILTERS, self.admin_filter_options[filter_option]).all()
         else:
-            return self.session.query(Event).all()
+            return events.all()
 
     @sentry_exception_handler
-    def get_support_filtered_events(self, filter_option: int, user) -> List[Event]:
+    @read_only
+    def get_support_filtered_events(self, filter_option: int, user_id: int) -> List[Event]:
         """
         Get filtered events based on the selected option for support role.
 
         :param filter_option: The option to filter events
-        :param user: The support user requesting the events
+        :param user_id: The ID of the support user requesting the events
         :return: A list of filtered Event objects
         """
 
+        events = self.list_events()
         if filter_option == 1:
-            return self.session.query(Event).filter(Event.support_contact_id == user).all()
+            return apply_filter(events, EVENT_FILTERS, "assigned_to", user_id).all()
         else:
-            return self.session.query(Event).all()
+            return events.all()
 
     @sentry_exception_handler
     @TokenManager.token_required
     def add_support_to_event(self, user) -> Optional[Event]:
         """
-        Adds support to an event.
+        Adds support to an event, unless the support user already covers an overlapping event.
 
         :param user: The user adding support to the event
         :return: The updated Event object or None if the event was not found or update fails
@@ -199,13 +254,46 @@ class EventController:
         if event:
             support_id = self.validators.validate_input(prompts["support_contact_id"],
                                                         self.validators.validate_add_support_to_event)
-            if support_id:
+            conflict_id = find_conflict(self.session, event, int(support_id)) if support_id else None
+            if conflict_id:
+                self.event_view.support_already_booked(support_id, conflict_id)
+            elif support_id:
                 event.support_contact_id = support_id
-                self.session.commit()
-                self.session.refresh(event)
+                if not self.commit_schedule(support_id):
+                    return None
                 self.event_view.event_updated()
             else:
                 self.event_view.event_not_created
         else:
             self.event_view.event_not_found()
         return event
+
+    @sentry_exception_handler
+    @TokenManager.token_required
+    def auto_assign_events(self, user) -> AssignmentPlan:
+        """
+        Assigns the unassigned events of a period to the support users, balancing their workload.
+        The planned assignments are previewed, and saved in one transaction once confirmed.
+
+        :param user: The user assigning the events
+        :return: The plan of the assignments
+        """
+        prompts = self.event_view.get_auto_assign_prompts()
+        start = self.validators.validate_input(prompts["start"], self.validators.validate_date)
+        end = self.validators.validate_input(prompts["end"], self.validators.validate_date)
+
+        plan = plan_assignments(self.session, datetime.strptime(start, "%d/%m/%Y"), datetime.strptime(end, "%d/%m/%Y"))
+        self.event_view.display_assignment_plan(plan)
+        if not plan.assignments:
+            return plan
+
+        confirm = self.validators.validate_input(prompts["confirm"], self.validators.validate_boolean)
+        if not self.validators.transform_boolean(confirm):
+            self.event_view.assignments_cancelled()
+            return plan
+        assigned = commit_assignments(self.session, plan)
+        if assigned is None:
+            self.event_view.assignments_booked_meanwhile()
+        else:
+            self.event_view.assignments_saved(assigned)
+        return plan
@@ -1,79 +1,103 @@
-from sentry_config import sentry_exception_handler
-from rich.console import Console
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from config import DASHBOARD, QUERY_STATS, SessionLocal, unit_of_work
+from sentry_config import SharedConsole, sentry_exception_handler, trace
 
 from controllers.contract_controller import ContractController
 from controllers.customer_controller import CustomerController
 from controllers.event_controller import EventController
+from controllers.report_controller import ReportController
 from controllers.user_controller import UserController
-from utils.config import DATABASE_URL
+from models.dashboard import reconcile_periodically
 from utils.jwtoken import TokenManager, InvalidTokenException
+from utils.query_stats import QUERIES
 from views.menu_view import MenuView
 from views.user_view import UserView
 
 
 class MainController:
-    console = Console()
+    console = SharedConsole()
 
     def __init__(self):
         """
-        Initializes the MainController with database, views, controllers, and token manager.
+        Initializes the MainController with the session factory, views and token manager.
         """
-        # Database initialization
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
-        self.session = self.Session()
+        # Database initialization, on the shared engine of config.
+        # Each menu action runs in its own session, see in_session().
+        self.Session = SessionLocal
+        # Statements timed per action, see in_session()
+        self.queries = QUERIES
 
         # Views initialization
         self.menu_view = MenuView()
         self.user_view = UserView()
 
-        # Controllers initialization
-        self.user_controller = UserController(self.session)
-        self.event_controller = EventController(self.session)
-        self.customer_controller = CustomerController(self.session)
-        self.contract_controller = ContractController(self.session)
-
         # Token manager initialization
         self.token_manager = TokenManager()
 
+    def in_session(self, controller_class, method_name, *args):
+        """
+        Returns a menu action running a controller method in its own unit of work.
+
+        The controller is built on a new session, committed when the method returns,
+        rolled back if it raises, and closed in both cases, so nothing stays in memory
+        from one action to the next. Its statements are recorded as those of the action,
+        and summed up after it with QUERY_STATS enabled. Sampled actions are traced.
+        An action run by another one (a submenu) is traced and counted as part of it.
+        """
+        def action():
+            name = f"{controller_class.__name__}.{method_name}"
+            with trace(name), self.queries.action(name) as stats:
+                with unit_of_work(self.Session) as session:
+                    for bind in (session.bind, getattr(session, "replica", None)):
+                        if bind is not None:
+                            self.queries.attach(bind)
+                    controller = controller_class(session)
+                    result = getattr(controller, method_name)(*args)
+            if QUERY_STATS["SUMMARY"] and stats.parent is None:
+                self.menu_view.display_query_stats(stats)
+            return result
+        return action
+
     def build_action_map(self, role, user):
         """
         Builds the action map based on the user's role.
         """
         database_actions = {
-            1: self.customer_controller.display_all_customers,
-            2: self.contract_controller.display_all_contracts,
-            3: self.event_controller.display_all_events,
-            4: self.main_menu
+            1: self.in_session(CustomerController, "display_all_customers"),
+            2: self.in_session(ContractController, "display_all_contracts"),
+            3: self.in_session(EventController, "display_all_events"),
+            4: self.in_session(CustomerController, "search_customers"),
+            5: self.in_session(EventController, "search_events"),
+            6: lambda: None
         }
 
         action_maps = {
             "admin": {
-                1: lambda: self.user_controller.create_user(user),
-                2: lambda: self.user_controller.update_user(user),
-                3: lambda: self.user_controller.delete_user(user),
-                4: lambda: self.contract_controller.create_contract(user),
-                5: lambda: self.event_controller.display_events(user),
-                6: lambda: self.event_controller.add_support_to_event(user),
-                7: lambda: self.user_controller.database(database_actions),
-                8: self.user_controller.logout
+                1: self.in_session(UserController, "create_user", user),
+                2: self.in_session(UserController, "update_user", user),
+                3: self.in_session(UserController, "delete_user", user),
+                4: self.in_session(ContractController, "create_contract", user),
+                5: self.in_session(EventController, "display_events", user),
+                6: self.in_session(EventController, "add_support_to_event", user),
+                7: self.in_session(EventController, "auto_assign_events", user),
+                8: self.in_session(ReportController, "display_reports"),
+                9: self.in_session(UserController, "database", database_actions),
+                10: self.in_session(UserController, "logout")
             },
             "support": {
-                1: lambda: self.event_controller.display_events(user),
-                2: lambda: self.event_controller.update_event(user),
-                3: lambda: self.user_controller.database(database_actions),
-                4: self.user_controller.logout
+                1: self.in_session(EventController, "display_events", user),
+                2: self.in_session(EventController, "update_event", user),
+                3: self.in_session(UserController, "database", database_actions),
+                4: self.in_session(UserController, "logout")
             },
             "sales": {
-                1: lambda: self.customer_controller.create_customer(user),
-                2: lambda: self.customer_controller.update_customer(user),
-                3: lambda: self.event_controller.create_event(user),
-                4: lambda: self.contract_controller.update_contract(user),
-                5: lambda: self.contract_controller.display_contracts(user),
-                6: lambda: self.user_controller.database(database_actions),
-                7: self.user_controller.logout
+                1: self.in_session(CustomerController, "create_customer", user),
+                2: self.in_session(CustomerController, "update_customer", user),
+                3: self.in_session(CustomerController, "import_customers", user),
+                4: self.in_session(EventController, "create_event", user),
+                5: self.in_session(ContractController, "update_contract", user),
+                6: self.in_session(ContractController, "display_contracts", user),
+                7: self.in_session(UserController, "database", database_actions),
+                8: self.in_session(UserController, "logout")
             }
         }
 
@@ -103,11 +127,12 @@ class MainController:
         Displays the main menu after user authentication.
         """
         username, password = self.user_view.input_login_view()
-        user = self.user_controller.auth_user(username, password)
+        user = self.in_session(UserController, "auth_user", username, password)()
 
         if user:
             access_token = self.token_manager.create_token(user)
-            self.token_manager.store_tokens(access_token)
+            refresh_token = self.in_session(UserController, "start_session", user)()
+            self.token_manager.store_tokens(access_token, refresh_token)
             user_verified = self.token_manager.validate_token(access_token)
 
             if user_verified:
@@ -122,19 +147,23 @@ class MainController:
     @sentry_exception_handler
     def handle_menu_selection(self, user) -> None:
         """
-        Handles the display and selection of menu options based on the user's role.
+        Displays the menu of the user's role and runs the selected actions until the user logs out.
         """
         self.user_view.authenticated_user_view()
+        self.in_session(UserController, "display_dashboard")()
         role = user.role.name.lower()
         menu_method_name = f"{role}_menu_options"
-        menu_option = getattr(self.menu_view, menu_method_name)()
         try:
             action_map = self.build_action_map(role, user)
-            self.menu_view.display_menu(menu_option, action_map)
+            while self.token_manager.cache:
+                menu_option = getattr(self.menu_view, menu_method_name)()
+                self.menu_view.display_menu(menu_option, action_map)
         except InvalidTokenException:
-            self.login_menu()
+            pass
+        self.login_menu()
 
 
 if __name__ == "__main__":
+    reconcile_periodically(DASHBOARD["RECONCILE_MINUTES"])
     main_controller = MainController()
     main_controller.login_menu()
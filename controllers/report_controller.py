@@ -0,0 +1,136 @@
+from typing import Any, List, Optional, Tuple
+
+from config import read_only
+from sentry_config import sentry_exception_handler
+from sqlalchemy import Numeric, cast, func, select
+from sqlalchemy.orm import Session
+
+from models.models import Contract, Customer, User
+from utils.jwtoken import TokenManager
+from views.menu_view import MenuView
+from views.report_view import ReportView
+
+# Money is summed as NUMERIC(12, 2), not as floats, so totals are exact to the cent
+MONEY = Numeric(12, 2)
+# Number of customers listed by the report per customer, the largest balances first
+TOP_CUSTOMERS = 50
+
+
+def money_sum(column: Any, criterion: Optional[Any] = None) -> Any:
+    """
+    Returns the exact sum of a money column, 0 when there is no row, optionally of the rows matching a criterion.
+    """
+    total = func.sum(cast(column, MONEY))
+    if criterion is not None:
+        total = total.filter(criterion)
+    return cast(func.coalesce(total, 0), MONEY)
+
+
+def contract_totals() -> Tuple[Any, ...]:
+    """
+    Returns the aggregates of every report: contract counts, amounts and outstanding balance.
+    """
+    return (
+        func.count(Contract.id).label("contracts"),
+        func.count(Contract.id).filter(Contract.is_signed.is_(True)).label("signed"),
+        func.count(Contract.id).filter(Contract.is_signed.is_(False)).label("unsigned"),
+        money_sum(Contract.amount_total).label("amount_total"),
+        money_sum(Contract.amount_total, Contract.is_signed.is_(True)).label("revenue"),
+        money_sum(Contract.amount_due).label("amount_due"),
+    )
+
+
+class ReportController:
+    def __init__(self, session: Session):
+        """
+        Initializes the report controller.
+
+        :param session: SQLAlchemy Session
+        """
+        self.session = session
+        self.report_view = ReportView()
+        self.menu_view = MenuView()
+        self.token_manager = TokenManager()
+
+    def month(self, column: Any) -> Any:
+        """
+        Returns the YYYY-MM month of a date column, in the SQL dialect of the database.
+        """
+        if self.session.get_bind().dialect.name == "postgresql":
+            return func.to_char(column, "YYYY-MM")
+        return func.strftime("%Y-%m", column)
+
+    @read_only
+    def revenue_by_sales_contact(self) -> List[Any]:
+        """
+        Aggregates the contracts by sales contact of their customer.
+
+        :return: Rows of sales contact name and totals, by sales contact name
+        """
+        statement = (select(User.full_name.label("name"), *contract_totals())
+                     .select_from(Contract)
+                     .join(Customer, Contract.customer_id == Customer.id)
+                     .outerjoin(User, Customer.sales_contact_id == User.id)
+                     .group_by(User.id, User.full_name)
+                     .order_by(User.full_name))
+        return self.session.execute(statement).all()
+
+    @read_only
+    def revenue_by_customer(self, limit: int = TOP_CUSTOMERS) -> List[Any]:
+        """
+        Aggregates the contracts by customer. Each row also carries the number of customers
+        with contracts (total_rows), for the report to show how many were left out.
+
+        :param limit: The number of customers returned
+        :return: Rows of customer name and totals, the largest outstanding balances first
+        """
+        statement = (select(Customer.full_name.label("name"), *contract_totals(),
+                            func.count().over().label("total_rows"))
+                     .select_from(Contract)
+                     .join(Customer, Contract.customer_id == Customer.id)
+                     .group_by(Customer.id, Customer.full_name)
+                     .order_by(money_sum(Contract.amount_due).desc(), Customer.id)
+                     .limit(limit))
+        return self.session.execute(statement).all()
+
+    @read_only
+    def revenue_by_month(self) -> List[Any]:
+        """
+        Aggregates the contracts by month of creation.
+
+        :return: Rows of month (YYYY-MM) and totals, by month
+        """
+        month = self.month(Contract.creation_date)
+        statement = (select(month.label("name"), *contract_totals())
+                     .group_by(month)
+                     .order_by(month))
+        return self.session.execute(statement).all()
+
+    @read_only
+    def contracts_by_status(self) -> List[Any]:
+        """
+        Aggregates the contracts by signature status, unsigned first.
+
+        :return: Rows of signature status and totals
+        """
+        statement = (select(Contract.is_signed.label("name"), *contract_totals())
+                     .group_by(Contract.is_signed)
+                     .order_by(Contract.is_signed))
+        return self.session.execute(statement).all()
+
+    @sentry_exception_handler
+    @TokenManager.token_required
+    def display_reports(self) -> None:
+        """
+        Displays the report selected in the report menu.
+        """
+        reports = {
+            1: self.revenue_by_sales_contact,
+            2: self.revenue_by_customer,
+            3: self.revenue_by_month,
+            4: self.contracts_by_status,
+        }
+        title, options = self.menu_view.reports_menu_options()
+        choice = self.menu_view.select_choice(title, options)
+        if choice in reports:
+            self.report_view.display_report_view(options[choice - 1], reports[choice]())
@@ -1,11 +1,14 @@
 from typing import Callable, Dict, Optional
 
-from argon2 import PasswordHasher
-from sqlalchemy.orm import Session
+from argon2.exceptions import InvalidHashError, VerifyMismatchError
+from config import read_only
+from sqlalchemy.orm import Session, joinedload
 
+from models.dashboard import read_dashboard
 from models.models import User
 from sentry_config import sentry_exception_handler
 from utils.jwtoken import TokenManager
+from utils.passwords import PASSWORDS, PasswordPoolFull, password_hasher
 from utils.validators import DataValidator
 from views.menu_view import MenuView
 from views.user_view import UserView
@@ -24,29 +27,32 @@ class UserController:
         self.user_view = UserView()
         self.token_manager = TokenManager()
         self.validators = DataValidator(session)
-        self.password_hasher = PasswordHasher()
+        self.lookups = self.validators.lookups
+        self.password_hasher = password_hasher()
 
     def hash_password(self, password: str) -> str:
         """
-        Hashes the user's password.
+        Hashes the user's password, on the password pool.
         """
-        return self.password_hasher.hash(password)
+        return PASSWORDS.hash(self.password_hasher, password)
 
     def get_user_by_email(self, email: str) -> Optional[User]:
         """
-        Retrieves a user by their email.
+        Retrieves a user by their email, with their role loaded.
         """
-        return self.session.query(User).filter(User.email == email).first()
+        return self.session.query(User).options(joinedload(User.role)).filter(User.email == email).first()
 
     def get_user(self, user_id: int) -> Optional[User]:
         """
         Retrieves a user by their ID.
         """
-        return self.session.query(User).filter(User.id == user_id).first()
+        return self.lookups.get(User, user_id)
 
     def auth_user(self, email: str, password: str) -> Optional[Dict[str, str]]:
         """
-        Authenticates a user with email and password.
+        Authenticates a user with email and password. A password hashed with other Argon2
+        parameters than the configured ones is rehashed, saved with the session.
+        The password is verified on the password pool, so concurrent logins run in parallel.
 
         :param email: The email of the user
         :param password: The password of the user
@@ -58,12 +64,29 @@ class UserController:
             self.user_view.user_not_found()
             return None
 
-        if not self.password_hasher.verify(user.password, password):
+        try:
+            PASSWORDS.verify(self.password_hasher, user.password, password)
+        except PasswordPoolFull:
+            self.user_view.login_busy()
+            return None
+        except (VerifyMismatchError, InvalidHashError):
             self.user_view.incorrect_password()
             return None
 
+        if self.password_hasher.check_needs_rehash(user.password):
+            user.password = self.hash_password(password)
+
         return user
 
+    def start_session(self, user: User) -> str:
+        """
+        Starts the session of an authenticated user.
+
+        :param user: The authenticated user
+        :return: The refresh token of the session
+        """
+        return self.token_manager.create_refresh_token(self.session, user.id)
+
     @sentry_exception_handler
     @TokenManager.token_required
     def create_user(self, user) -> Optional[User]:
@@ -92,7 +115,6 @@ class UserController:
 
         self.session.add(user)
         self.session.commit()
-        self.session.refresh(user)
         self.user_view.user_created()
         return user
 
@@ -107,7 +129,7 @@ class UserController:
         """
         prompts = self.user_view.user_view_prompts()
         user_id = self.validators.validate_input(prompts["user_id"], lambda value:
-                                                 self.validators.validate_existing_user_id(value, user))
+                                                 self.validators.validate_existing_user_id(value, user.id))
         user = self.get_user(user_id)
 
         if user:
@@ -131,7 +153,6 @@ class UserController:
                 user.role_id = role_id
 
             self.session.commit()
-            self.session.refresh(user)
             self.user_view.user_updated()
         else:
             self.user_view.user_not_found()
@@ -148,7 +169,7 @@ class UserController:
         """
         prompts = self.user_view.user_view_prompts()
         user_id = self.validators.validate_input(prompts["user_id"], lambda value:
-                                                 self.validators.validate_existing_user_id(value, user))
+                                                 self.validators.validate_existing_user_id(value, user.id))
         user = self.get_user(user_id)
 
         if user:
@@ -169,12 +190,22 @@ class UserController:
         menu_option = self.menu_view.database_menu_options()
         self.menu_view.display_menu(menu_option, database_actions)
 
+    @sentry_exception_handler
+    @read_only
+    def display_dashboard(self) -> None:
+        """
+        Displays the dashboard counters: unsigned and unpaid contracts, events without support
+        and the events of the week.
+        """
+        self.user_view.display_dashboard(read_dashboard(self.session))
+
     @sentry_exception_handler
     @TokenManager.token_required
     def logout(self) -> None:
         """
-        Logs out the user.
+        Logs out the user, revoking their refresh token.
 
         :param user: The user to log out
         """
+        self.token_manager.revoke_refresh_token(self.session, self.token_manager.refresh_cache)
         self.token_manager.clear_cache()
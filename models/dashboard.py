@@ -0,0 +1,211 @@
+"""
+Counters of the dashboard shown after login.
+
+The counters live in the dashboard_counters table. An after_flush hook registered on
+config.SessionLocal applies the changes of each flush of the application's sessions to
+the counters, so showing the dashboard reads a few rows by primary key whatever the size
+of the tables. reconcile() recomputes every counter from the tables, for the rows written
+by SQL outside the application, and drops the counters of the past days: the application
+runs it every DASHBOARD["RECONCILE_MINUTES"] minutes (see reconcile_periodically), and
+``python3 -m models.dashboard`` runs it once.
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from importlib import import_module
+from typing import Any, Dict, Optional, Union
+
+from config import SessionLocal, get_engine
+from sqlalchemy import delete, event, func, inspect, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.models import Contract, DashboardCounter, Event
+
+UNSIGNED_CONTRACTS = "unsigned_contracts"
+UNPAID_CONTRACTS = "unpaid_contracts"
+UNASSIGNED_EVENTS = "unassigned_events"
+# Days counted by the "upcoming events" counter, today included
+UPCOMING_DAYS = 7
+
+
+logger = logging.getLogger(__name__)
+
+
+def events_on(day: Any) -> str:
+    """
+    Returns the name of the counter of the events starting on a day.
+    """
+    if isinstance(day, datetime):
+        day = day.date()
+    return f"events_on:{day}"
+
+
+def previous(obj: Any, *attributes: str) -> Any:
+    """
+    Returns the value an object had before the flush, from the first of the attributes
+    which changed (a foreign key, then its relationship), or its current value.
+    """
+    state = inspect(obj)
+    for attribute in attributes:
+        history = state.attrs[attribute].history
+        if history.has_changes():
+            return history.deleted[0] if history.deleted else None
+    return getattr(obj, attributes[0])
+
+
+def contract_counts(is_signed: Optional[bool], amount_due: Optional[float]) -> Dict[str, int]:
+    """Returns the counters a contract adds to."""
+    return {UNSIGNED_CONTRACTS: int(not is_signed), UNPAID_CONTRACTS: int((amount_due or 0) > 0)}
+
+
+def event_counts(support_contact: Any, start_date: Optional[datetime]) -> Dict[str, int]:
+    """Returns the counters an event adds to."""
+    result = {UNASSIGNED_EVENTS: int(support_contact is None)}
+    if start_date is not None:
+        result[events_on(start_date)] = 1
+    return result
+
+
+def counts(obj: Any, before: bool = False) -> Dict[str, int]:
+    """
+    Returns the counters an object adds to, with its values before the flush or its current ones.
+    """
+    if isinstance(obj, Contract):
+        if before:
+            return contract_counts(previous(obj, "is_signed"), previous(obj, "amount_due"))
+        return contract_counts(obj.is_signed, obj.amount_due)
+    if isinstance(obj, Event):
+        if before:
+            return event_counts(previous(obj, "support_contact_id", "support_contact"),
+                                previous(obj, "event_start_date"))
+        return event_counts(obj.support_contact_id, obj.event_start_date)
+    return {}
+
+
+def update_counters(session: Session, flush_context: Any) -> None:
+    """
+    after_flush hook applying the contracts and events inserted, updated and deleted by the flush
+    to the counters, in the transaction of the flush.
+    """
+    deltas = defaultdict(int)
+    for obj in session.new:
+        for name, value in counts(obj).items():
+            deltas[name] += value
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            for name, value in counts(obj, before=True).items():
+                deltas[name] -= value
+            for name, value in counts(obj).items():
+                deltas[name] += value
+    for obj in session.deleted:
+        for name, value in counts(obj, before=True).items():
+            deltas[name] -= value
+
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if deltas:
+        add_to_counters(session.connection(), deltas)
+
+
+def add_to_counters(connection: Connection, deltas: Dict[str, int]) -> None:
+    """
+    Adds the deltas to the counters, creating the missing ones (upsert).
+    """
+    # The dialect module, already loaded by the engine of the connection
+    dialect = import_module("sqlalchemy.dialects.postgresql" if connection.dialect.name == "postgresql"
+                            else "sqlalchemy.dialects.sqlite")
+    statement = dialect.insert(DashboardCounter)
+    statement = statement.on_conflict_do_update(
+        index_elements=[DashboardCounter.name],
+        set_={"value": DashboardCounter.value + statement.excluded.value},
+    )
+    connection.execute(statement, [{"name": name, "value": delta} for name, delta in deltas.items()])
+
+
+def track_counters(target: Union[Session, sessionmaker]) -> None:
+    """
+    Keeps the dashboard counters current with the flushes of a session, or of every
+    session of a sessionmaker. Registering the hook again on the same target has no effect.
+    """
+    event.listen(target, "after_flush", update_counters)
+
+
+track_counters(SessionLocal)
+
+
+def reconcile(connection: Connection, today: Optional[date] = None) -> None:
+    """
+    Recomputes every counter from the contracts and events tables, in one transaction, and
+    drops the counters of the days before today.
+
+    The counters are locked first, so the flushes committing meanwhile wait for the reconcile
+    rather than adding their changes to counters it then replaces: the table lock on PostgreSQL,
+    and the write lock of the database, taken by the deletion of the counters, on SQLite.
+    """
+    today = today or date.today()
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("LOCK TABLE dashboard_counters IN SHARE ROW EXCLUSIVE MODE")
+    connection.execute(delete(DashboardCounter))
+
+    day = func.date(Event.event_start_date)
+    values = {
+        UNSIGNED_CONTRACTS: connection.scalar(select(func.count()).where(Contract.is_signed.is_(False))),
+        UNPAID_CONTRACTS: connection.scalar(select(func.count()).where(Contract.amount_due > 0)),
+        UNASSIGNED_EVENTS: connection.scalar(select(func.count()).where(Event.support_contact_id.is_(None))),
+    }
+    for start_day, count in connection.execute(select(day, func.count())
+                                               .where(Event.event_start_date >= datetime.combine(today, time.min))
+                                               .group_by(day)):
+        values[events_on(start_day)] = count
+
+    connection.execute(insert(DashboardCounter), [{"name": name, "value": value} for name, value in values.items()])
+
+
+def reconcile_periodically(minutes: float, stopped: Optional[threading.Event] = None) -> Optional[threading.Thread]:
+    """
+    Starts a daemon thread running reconcile() every given number of minutes, until stopped is set.
+    A failed reconcile is logged and retried at the next interval.
+
+    :param minutes: The interval, 0 not to start the thread
+    :return: The thread, None when the interval is 0
+    """
+    if minutes <= 0:
+        return None
+    stopped = stopped or threading.Event()
+
+    def run() -> None:
+        while not stopped.wait(minutes * 60):
+            try:
+                with get_engine().begin() as connection:
+                    reconcile(connection)
+            except SQLAlchemyError:
+                logger.exception("Reconciling the dashboard counters failed")
+
+    thread = threading.Thread(target=run, name="dashboard-reconcile", daemon=True)
+    thread.start()
+    return thread
+
+
+def read_dashboard(session: Session, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Reads the dashboard: unsigned and unpaid contracts, events without support and
+    events starting in the next UPCOMING_DAYS days, in a single primary key lookup.
+    """
+    today = today or date.today()
+    upcoming = [events_on(today + timedelta(days=offset)) for offset in range(UPCOMING_DAYS)]
+    names = [UNSIGNED_CONTRACTS, UNPAID_CONTRACTS, UNASSIGNED_EVENTS, *upcoming]
+    values = dict(session.execute(select(DashboardCounter.name, DashboardCounter.value)
+                                  .where(DashboardCounter.name.in_(names))).all())
+    return {
+        UNSIGNED_CONTRACTS: values.get(UNSIGNED_CONTRACTS, 0),
+        UNPAID_CONTRACTS: values.get(UNPAID_CONTRACTS, 0),
+        UNASSIGNED_EVENTS: values.get(UNASSIGNED_EVENTS, 0),
+        "upcoming_events": sum(values.get(name, 0) for name in upcoming),
+    }
+
+
+if __name__ == "__main__":
+    with get_engine().begin() as connection:
+        reconcile(connection)
@@ -0,0 +1,40 @@
+"""
+Named filters of the contract and event listings.
+
+Each filter gives the criterion of a listing, its rows keep the order of the listing
+(by ID). The menus, the exports and any other listing apply them by name so they
+always select the same rows.
+"""
+from datetime import date
+
+from models.models import Contract, Event
+
+CONTRACT_FILTERS = {
+    "unsigned": lambda: Contract.is_signed.is_(False),
+    "unpaid": lambda: Contract.amount_due > 0,
+    "signed": lambda: Contract.is_signed.is_(True),
+}
+
+EVENT_FILTERS = {
+    "unassigned": lambda: Event.support_contact_id.is_(None),
+    "upcoming": lambda: Event.event_start_date > date.today(),
+    "past": lambda: Event.event_end_date < date.today(),
+    "assigned_to": lambda user_id: Event.support_contact_id == user_id,
+}
+
+
+def apply_filter(statement, filters, name, *args):
+    """
+    Applies a named filter to a Query or a select().
+
+    :param statement: The Query or Select to filter
+    :param filters: The filters of the model, CONTRACT_FILTERS or EVENT_FILTERS
+    :param name: The name of the filter
+    :param args: The arguments of the filter, such as the user ID of 'assigned_to'
+    :return: The filtered statement
+    """
+    try:
+        criterion = filters[name](*args)
+    except KeyError:
+        raise ValueError(f"Unknown filter: '{name}'")
+    return statement.where(criterion)
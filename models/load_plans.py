@@ -0,0 +1,41 @@
+"""
+Named eager-loading plans for the listings.
+
+Every listing view walks relationships for each row (``event.contract.customer``,
+``customer.sales_contact``...). Without a plan each of those attribute accesses
+is a lazy SELECT. The plans below load every relationship a view reads in the
+listing query itself, so one listing costs a single round trip whatever the
+number of rows.
+"""
+from typing import Tuple
+
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from models.models import Contract, Customer, Event
+
+LOAD_PLANS = {
+    "customer_listing": (
+        joinedload(Customer.sales_contact),
+    ),
+    "contract_listing": (
+        joinedload(Contract.customer),
+    ),
+    "event_listing": (
+        joinedload(Event.contract).joinedload(Contract.customer),
+        joinedload(Event.support_contact),
+    ),
+}
+
+
+def load_plan(name: str) -> Tuple[LoaderOption, ...]:
+    """
+    Returns the loader options of a named load plan.
+
+    :param name: The name of the plan, one of LOAD_PLANS keys
+    :return: The loader options to pass to Query.options()
+    """
+    try:
+        return LOAD_PLANS[name]
+    except KeyError:
+        raise ValueError(f"Unknown load plan: '{name}'")
@@ -1,8 +1,10 @@
 from datetime import date, datetime
 from config import Base
-from sqlalchemy import (Boolean, Column, Date, DateTime, Float, ForeignKey,
-                        Integer, String)
-from sqlalchemy.orm import relationship
+from sqlalchemy import (DDL, Boolean, Column, Date, DateTime, Float, ForeignKey,
+                        Index, Integer, String, event, text)
+from sqlalchemy.orm import column_property, relationship, validates
+
+from models.names import COMPANY_KEY_LENGTH, NAME_KEY_LENGTH, company_key, name_key
 
 
 class Role(Base):
@@ -32,6 +34,12 @@ class User(Base):
 
 class Customer(Base):
     __tablename__ = "customers"
+    __table_args__ = (
+        Index("ix_customers_sales_contact_id", "sales_contact_id"),
+        # Blocking keys of the duplicate detection, see utils.dedup.likely_duplicates
+        Index("ix_customers_company_key", "company_key"),
+        Index("ix_customers_name_key", "name_key"),
+    )
     id: int = Column(Integer, primary_key=True, index=True)
     full_name: str = Column(String(50), index=True, nullable=False)
     email: str = Column(String(100), nullable=False, unique=True)
@@ -40,21 +48,45 @@ class Customer(Base):
     creation_date: date = Column(Date, default=date.today(), nullable=False)
     last_update: datetime = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     sales_contact_id: int = Column(Integer, ForeignKey("users.id"))
+    # The normalized names, set with the names (see models.names). In byte order on
+    # PostgreSQL too, so the prefix ranges of utils.dedup are exact and index-backed.
+    name_key: str = Column(String(NAME_KEY_LENGTH).with_variant(String(NAME_KEY_LENGTH, collation="C"),
+                                                                "postgresql"))
+    company_key: str = Column(String(COMPANY_KEY_LENGTH).with_variant(String(COMPANY_KEY_LENGTH, collation="C"),
+                                                                      "postgresql"))
 
     sales_contact = relationship("User", back_populates="customers")
     contracts = relationship("Contract", back_populates="customer")
 
+    @validates("full_name", "company_name")
+    def set_name_keys(self, attribute: str, value: str) -> str:
+        """Updates the normalized key of a name when the name is set."""
+        if attribute == "full_name":
+            self.name_key = name_key(value)
+        else:
+            self.company_key = company_key(value)
+        return value
+
     """Represents a customer with contact details and associated contracts."""
 
 
 class Contract(Base):
     __tablename__ = "contracts"
+    # Plain annotations on the column_property attributes below
+    __allow_unmapped__ = True
+    __table_args__ = (
+        Index("ix_contracts_customer_id_is_signed", "customer_id", "is_signed"),
+        Index("ix_contracts_is_signed", "is_signed"),
+        Index("ix_contracts_amount_due", "amount_due", postgresql_where=text("amount_due > 0")),
+    )
     id: int = Column(Integer, primary_key=True, index=True)
     customer_id: int = Column(Integer, ForeignKey("customers.id"))
     amount_total: float = Column(Float)
-    amount_due: float = Column(Float)
+    # The dashboard counters depend on these: active_history loads their previous value when
+    # they are set on an expired object, so models.dashboard knows what the row counted for.
+    amount_due: float = column_property(Column(Float), active_history=True)
     creation_date: date = Column(Date, default=date.today())
-    is_signed: bool = Column(Boolean, nullable=False, default=False)
+    is_signed: bool = column_property(Column(Boolean, nullable=False, default=False), active_history=True)
 
     customer = relationship("Customer", back_populates="contracts")
     event = relationship("Event", back_populates="contract")
@@ -64,17 +96,62 @@ class Contract(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    # Plain annotations on the column_property attributes below
+    __allow_unmapped__ = True
+    __table_args__ = (
+        Index("ix_events_contract_id", "contract_id"),
+        Index("ix_events_support_contact_id_start_date", "support_contact_id", "event_start_date"),
+        Index("ix_events_unassigned", "event_start_date",
+              postgresql_where=text("support_contact_id IS NULL"),
+              sqlite_where=text("support_contact_id IS NULL")),
+        Index("ix_events_event_start_date", "event_start_date"),
+        Index("ix_events_event_end_date", "event_end_date"),
+    )
     id: int = Column(Integer, primary_key=True, index=True)
     event_name: str = Column(String(100), index=True, nullable=False)
     contract_id: int = Column(Integer, ForeignKey("contracts.id"))
-    event_start_date: datetime = Column(DateTime)
+    # Dashboard counters, see Contract
+    event_start_date: datetime = column_property(Column(DateTime), active_history=True)
     event_end_date: datetime = Column(DateTime)
-    support_contact_id: int = Column(Integer, ForeignKey("users.id"))
+    support_contact_id: int = column_property(Column(Integer, ForeignKey("users.id")), active_history=True)
     location: str = Column(String(200))
     attendees: int = Column(Integer)
     notes: str = Column(String(255))
 
     contract = relationship("Contract", back_populates="event")
-    support_contact = relationship("User", back_populates="events")
+    support_contact = relationship("User", back_populates="events", active_history=True)
 
     """Represents an event with details, including dates, location, and associated contract."""
+
+
+# Longest event of a support user, bounding the overlap lookups of models.schedule on SQLite
+# (PostgreSQL looks them up through the exclusion constraint's GiST index)
+event.listen(Event.__table__, "after_create", DDL(
+    "CREATE INDEX IF NOT EXISTS ix_events_support_contact_id_duration ON events "
+    "(support_contact_id, (julianday(event_end_date) - julianday(event_start_date)))"
+).execute_if(dialect="sqlite"))
+
+
+class DashboardCounter(Base):
+    __tablename__ = "dashboard_counters"
+    name: str = Column(String(50), primary_key=True)
+    value: int = Column(Integer, nullable=False, default=0)
+
+    """Represents a counter of the dashboard, kept current by the hooks of models.dashboard."""
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    id: int = Column(Integer, primary_key=True)
+    token_hash: str = Column(String(64), unique=True, nullable=False)
+    family: str = Column(String(32), nullable=False, index=True)
+    user_id: int = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at: datetime = Column(DateTime, nullable=False)
+    session_expires_at: datetime = Column(DateTime, nullable=False, index=True)
+    rotated: bool = Column(Boolean, nullable=False, default=False)
+    revoked: bool = Column(Boolean, nullable=False, default=False)
+
+    """
+    Represents a refresh token, stored by its SHA-256 hash. The tokens rotated from
+    the same login share a family, revoked as a whole when a rotated token is reused.
+    """
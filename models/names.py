@@ -0,0 +1,35 @@
+"""
+Normalized names of the customers, the keys the duplicate detection blocks them by (see utils.dedup).
+"""
+import re
+import unicodedata
+from typing import Optional
+
+# Legal forms and filler words, ignored when comparing names
+STOP_WORDS = {
+    "sa", "sas", "sasu", "sarl", "eurl", "sci", "inc", "ltd", "llc", "gmbh", "corp", "co", "cie",
+    "company", "compagnie", "group", "groupe", "et", "and", "the", "le", "la", "les",
+}
+# Sizes of the name_key and company_key columns, those of the names
+NAME_KEY_LENGTH = 50
+COMPANY_KEY_LENGTH = 70
+
+
+def normalize(value: Optional[str]) -> str:
+    """
+    Lowercases a name and removes its accents, punctuation, legal form and filler words.
+    """
+    value = unicodedata.normalize("NFKD", value or "")
+    # Dots are dropped rather than split on, so the S.A. legal form reads as SA
+    value = "".join(char for char in value if not unicodedata.combining(char)).lower().replace(".", "")
+    return " ".join(word for word in re.findall(r"[a-z0-9]+", value) if word not in STOP_WORDS)
+
+
+def name_key(full_name: Optional[str]) -> str:
+    """Returns the name_key column of a customer: its normalized full name."""
+    return normalize(full_name)[:NAME_KEY_LENGTH]
+
+
+def company_key(company_name: Optional[str]) -> str:
+    """Returns the company_key column of a customer: its normalized company name."""
+    return normalize(company_name)[:COMPANY_KEY_LENGTH]
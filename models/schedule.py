@@ -0,0 +1,67 @@
+"""
+Double-booking detection of the support users.
+
+The database is the source of truth: the events of a support user can be changed by
+another process, by bulk SQL or by the deletion of a user, so conflicts are always looked
+up there. On PostgreSQL an exclusion constraint (see migration 5) also forbids two events
+of a support user with overlapping [start, end) ranges, and conflicts are looked up
+through its GiST index. Elsewhere the longest event of the support user is read from the
+(support_contact_id, duration) index, which bounds the range scan of the
+(support_contact_id, event_start_date) index to the events starting at most that long
+before the new one: O(log n) lookups rather than a scan of the user's whole history.
+
+As with the PostgreSQL ranges, an event ending when it starts is empty and overlaps nothing.
+"""
+from datetime import timedelta
+from typing import Any, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models.models import Event
+
+
+def scheduled(statement: Any) -> Any:
+    """
+    Restricts a statement to the events with a valid date range, the ones the constraint covers.
+    """
+    return statement.where(Event.event_start_date.is_not(None), Event.event_end_date.is_not(None),
+                           Event.event_start_date <= Event.event_end_date)
+
+
+def duration(start: Any, end: Any) -> Any:
+    """Returns the SQLite expression of the duration in days of a date range, indexed with the support user."""
+    return func.julianday(end) - func.julianday(start)
+
+
+def find_conflict(session: Session, event_obj: Event, support_id: int) -> Optional[int]:
+    """
+    Finds another event of a support user overlapping the dates of an event.
+
+    :param session: SQLAlchemy Session
+    :param event_obj: The event the support user is or would be assigned to, with its new dates
+    :param support_id: The ID of the support user
+    :return: The ID of an overlapping event, None if the support user is free
+    """
+    start, end = event_obj.event_start_date, event_obj.event_end_date
+    if start is None or end is None or start >= end:
+        return None
+
+    with session.no_autoflush:
+        if session.get_bind().dialect.name == "postgresql":
+            overlaps = func.tsrange(Event.event_start_date, Event.event_end_date).op("&&")(func.tsrange(start, end))
+        else:
+            event_duration = duration(Event.event_start_date, Event.event_end_date)
+            longest = session.scalar(scheduled(select(event_duration)
+                                               .where(Event.support_contact_id == support_id))
+                                     .order_by(event_duration.desc()).limit(1))
+            if longest is None:
+                return None
+            # A second of margin for the rounding of the julianday() floats
+            overlaps = ((Event.event_start_date >= start - timedelta(days=longest, seconds=1))
+                        & (Event.event_start_date < end) & (Event.event_end_date > start)
+                        & (Event.event_start_date < Event.event_end_date))
+        statement = scheduled(select(Event.id)
+                              .where(Event.support_contact_id == support_id, Event.id != event_obj.id, overlaps)
+                              .limit(1))
+        return session.scalar(statement)
@@ -6,14 +6,20 @@ from controllers.user_controller import UserController
 from controllers.event_controller import EventController
 from controllers.customer_controller import CustomerController
 from controllers.contract_controller import ContractController
+from controllers.report_controller import ReportController
 from utils.validators import DataValidator
+from models.dashboard import track_counters
 from models.models import Base, Role, User, Event, Customer, Contract
 from utils.jwtoken import TokenManager
+from utils.migrations import metadata as migrations_metadata
+from utils.search import SEARCH_COLUMNS, search_table
 from typing import Generator, Callable
 
 DATABASE_TEST_URL = "sqlite:///:memory:"
 test_engine = create_engine(DATABASE_TEST_URL)
 TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+# The dashboard counters follow the flushes of the test sessions, as of config.SessionLocal's
+track_counters(TestSessionLocal)
 
 
 @pytest.fixture(scope='function', autouse=True)
@@ -25,6 +31,16 @@ def setup_and_teardown() -> Generator[None, None, None]:
     Base.metadata.drop_all(bind=test_engine)
 
 
+@pytest.fixture
+def migrations_cleanup() -> Generator[None, None, None]:
+    """Drop what the migrations create outside the models metadata: bookkeeping and search tables."""
+    yield
+    migrations_metadata.drop_all(bind=test_engine)
+    with test_engine.begin() as connection:
+        for model in SEARCH_COLUMNS:
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {search_table(model)}")
+
+
 @pytest.fixture
 def session() -> Generator:
     """Provide a session for database transactions."""
@@ -75,6 +91,15 @@ def contract_controller(session, mocker) -> ContractController:
     return controller
 
 
+@pytest.fixture
+def report_controller(session, mocker) -> ReportController:
+    """Fixture for initializing the ReportController with mocked dependencies."""
+    controller = ReportController(session=session)
+    controller.token_manager = TokenManager()
+    controller.report_view = mocker.MagicMock()
+    return controller
+
+
 @pytest.fixture
 def validator(session) -> DataValidator:
     """Provide an instance of DataValidator with a mocked session."""
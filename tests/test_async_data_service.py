@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from config import create_async_configured_engine
+from controllers.async_data_service import AsyncDataService
+from controllers.contract_controller import ContractController
+from controllers.event_controller import EventController
+from models.models import Base, Contract, Customer, Event, Role, User
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    """A SQLite file shared by a synchronous and an asyncio engine, seeded with a few rows."""
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now()
+    with sessionmaker(bind=engine)() as session:
+        role = Role(id=2, name="support")
+        support = User(id=1, full_name="Support", email="support@ex.com", password="hashed", role=role)
+        session.add(support)
+        for i in range(1, 7):
+            customer = Customer(id=i, full_name=f"Customer {i}", email=f"customer{i}@ex.com",
+                                phone=f"061111111{i}", company_name="Company", sales_contact=support)
+            contract = Contract(id=i, customer=customer, amount_total=1000.0,
+                                amount_due=0.0 if i % 2 else 100.0 * i, is_signed=i % 3 == 0)
+            session.add(Event(id=i, event_name=f"Event {i}", contract=contract,
+                              support_contact=support if i % 2 else None,
+                              event_start_date=now + timedelta(days=i - 3),
+                              event_end_date=now + timedelta(days=i - 3, hours=2)))
+        session.commit()
+    yield url
+    engine.dispose()
+
+
+def run(database_url, method, *args):
+    """Runs a method of AsyncDataService on a new AsyncSession."""
+    async def main():
+        engine = create_async_configured_engine(database_url)
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+                return await getattr(AsyncDataService(session), method)(*args)
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+
+def ids(rows):
+    return [row.id for row in rows]
+
+
+def test_lookups(database_url):
+    assert run(database_url, "get_event", 2).event_name == "Event 2"
+    assert run(database_url, "get_contract", "3").id == 3
+    assert run(database_url, "get_customer", 99) is None
+    assert run(database_url, "get_customer", "not an id") is None
+    user = run(database_url, "get_user_by_email", "support@ex.com")
+    assert user.role.name == "support"
+
+
+def test_lookups_load_relationships(database_url):
+    event = run(database_url, "get_event", 1)
+    assert event.contract.customer.full_name == "Customer 1"
+    assert event.support_contact.full_name == "Support"
+    assert run(database_url, "get_contract", 2).customer.full_name == "Customer 2"
+    assert run(database_url, "get_customer", 3).sales_contact.full_name == "Support"
+
+
+def test_listings_match_sync_controllers(database_url):
+    with sessionmaker(bind=create_engine(database_url))() as session:
+        contract_controller = ContractController(session)
+        event_controller = EventController(session)
+        for filter_option in (1, 2, 3, 4):
+            assert ids(run(database_url, "get_filtered_contracts", filter_option)) == \
+                ids(contract_controller.get_filtered_contracts(filter_option))
+            assert ids(run(database_url, "get_admin_filtered_events", filter_option)) == \
+                ids(event_controller.get_admin_filtered_events(filter_option))
+        for filter_option in (1, 2):
+            assert ids(run(database_url, "get_support_filtered_events", filter_option, 1)) == \
+                ids(event_controller.get_support_filtered_events(filter_option, 1))
+
+
+def test_listings_load_relationships(database_url):
+    events = run(database_url, "get_admin_filtered_events", 4)
+
+    assert events[0].contract.customer.full_name == "Customer 1"
+    assert events[0].support_contact.full_name == "Support"
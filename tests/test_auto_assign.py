@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from models.dashboard import UNASSIGNED_EVENTS, read_dashboard, reconcile
+from models.models import Event, Role, User
+from utils.auto_assign import benchmark, commit_assignments, plan_assignments
+
+START = datetime(2024, 6, 1, 8)
+END = START + timedelta(days=7)
+
+
+def hours(start, end):
+    return START + timedelta(hours=start), START + timedelta(hours=end)
+
+
+@pytest.fixture
+def supports(session):
+    role = Role(id=2, name="support")
+    users = [User(id=user_id, full_name=f"Support {user_id}", email=f"support{user_id}@ex.com", password="hashed",
+                  role=role) for user_id in (2, 3, 4)]
+    session.add_all(users)
+    session.commit()
+    return users
+
+
+def add_event(session, event_id, start, end, support_id=None):
+    event_start_date, event_end_date = hours(start, end)
+    session.add(Event(id=event_id, event_name=f"Event {event_id}", event_start_date=event_start_date,
+                      event_end_date=event_end_date, support_contact_id=support_id))
+    session.commit()
+
+
+def test_plan_balances_workloads(session, supports):
+    add_event(session, 1, 100, 102, support_id=2)
+    add_event(session, 2, 110, 112, support_id=2)
+    for event_id in range(3, 9):
+        add_event(session, event_id, event_id * 3, event_id * 3 + 2)
+
+    plan = plan_assignments(session, START, END)
+
+    assert len(plan.assignments) == 6
+    assert plan.unassigned == []
+    assert plan.workloads == {"Support 2": 3, "Support 3": 3, "Support 4": 2}
+
+
+def test_plan_has_no_overlaps(session, supports):
+    add_event(session, 1, 0, 10, support_id=2)
+    for event_id in range(2, 6):
+        add_event(session, event_id, 1, 5)
+
+    plan = plan_assignments(session, START, END)
+
+    assert plan.unassigned == [4, 5]
+    assert {assignment.support_id for assignment in plan.assignments} == {3, 4}
+    assert all(assignment.support_id != 2 for assignment in plan.assignments)
+
+
+def test_plan_writes_nothing(session, supports):
+    add_event(session, 1, 0, 2)
+
+    plan = plan_assignments(session, START, END)
+
+    assert len(plan.assignments) == 1
+    assert session.scalar(select(Event.support_contact_id).where(Event.id == 1)) is None
+
+
+def test_commit_skips_events_assigned_meanwhile(session, supports):
+    add_event(session, 1, 0, 2)
+    add_event(session, 2, 3, 5)
+    reconcile(session.connection())
+    plan = plan_assignments(session, START, END)
+    session.execute(Event.__table__.update().where(Event.__table__.c.id == 2).values(support_contact_id=4))
+    reconcile(session.connection())
+
+    assert commit_assignments(session, plan) == 1
+    assert read_dashboard(session)[UNASSIGNED_EVENTS] == 0
+    assert session.scalar(select(Event.support_contact_id).where(Event.id == 2)) == 4
+
+
+def test_commit_rolls_back_an_overlap_committed_meanwhile(session, supports, mocker):
+    add_event(session, 1, 0, 2)
+    plan = plan_assignments(session, START, END)
+    mocker.patch.object(session, "commit", side_effect=IntegrityError("UPDATE events", {}, Exception()))
+
+    assert commit_assignments(session, plan) is None
+    assert session.scalar(select(Event.support_contact_id).where(Event.id == 1)) is None
+    assert read_dashboard(session)[UNASSIGNED_EVENTS] == 1
+
+
+def test_auto_assign_events_reports_an_overlap(event_controller, session, supports, login_required_mock, mocker):
+    add_event(session, 1, 0, 2)
+    mocker.patch.object(event_controller.validators, "validate_input",
+                        side_effect=["01/06/2024", "08/06/2024", "oui"])
+    event_controller.validators.transform_boolean.return_value = True
+    mocker.patch("controllers.event_controller.commit_assignments", return_value=None)
+
+    event_controller.auto_assign_events(mocker.MagicMock())
+
+    event_controller.event_view.assignments_booked_meanwhile.assert_called_once()
+    event_controller.event_view.assignments_saved.assert_not_called()
+
+
+def test_benchmark_assigns_every_event():
+    result = benchmark(events=2000, supports=50)
+
+    assert result["assigned"] == 2000
+    assert result["plan_seconds"] < 5
+
+
+def test_auto_assign_events_asks_confirmation(event_controller, session, supports, login_required_mock, mocker):
+    add_event(session, 1, 0, 2)
+    mocker.patch.object(event_controller.validators, "validate_input",
+                        side_effect=["01/06/2024", "08/06/2024", "non"])
+    event_controller.validators.transform_boolean.return_value = False
+
+    plan = event_controller.auto_assign_events(mocker.MagicMock())
+
+    assert len(plan.assignments) == 1
+    assert session.scalar(select(Event.support_contact_id).where(Event.id == 1)) is None
+    event_controller.event_view.assignments_cancelled.assert_called_once()
@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from utils import bulk_export
+from utils.bulk_export import export
+
+
+def test_export_contracts_csv(session, create_contract):
+    create_contract(customer_id=1, amount_total=1000.0, amount_due=500.0, is_signed=False)
+    create_contract(customer_id=2, amount_total=2000.0, amount_due=0.0, is_signed=True)
+    output = io.StringIO()
+
+    count = export(session, "contracts", "csv", output)
+
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert count == 2
+    assert [row["customer_id"] for row in rows] == ["1", "2"]
+    assert set(rows[0]) == {"id", "customer_id", "amount_total", "amount_due", "creation_date", "is_signed"}
+
+
+def test_export_filtered_contracts(session, create_contract):
+    create_contract(customer_id=1, amount_due=500.0, is_signed=False)
+    create_contract(customer_id=2, amount_due=0.0, is_signed=True)
+    output = io.StringIO()
+
+    count = export(session, "contracts", "jsonl", output, filter_name="unpaid")
+
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert count == 1
+    assert rows[0]["customer_id"] == 1
+
+
+def test_export_upcoming_events_jsonl(session, create_mock_event):
+    tomorrow = datetime.now() + timedelta(days=1)
+    create_mock_event(event_name="Past", event_start_date=datetime(2020, 1, 1), event_end_date=datetime(2020, 1, 2))
+    create_mock_event(event_name="Upcoming", event_start_date=tomorrow, event_end_date=tomorrow)
+    output = io.StringIO()
+
+    export(session, "events", "jsonl", output, filter_name="upcoming")
+
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [row["event_name"] for row in rows] == ["Upcoming"]
+    assert rows[0]["event_start_date"] == tomorrow.isoformat()
+
+
+def test_export_streams_in_batches(session, create_mock_customer, mocker):
+    mocker.patch.object(bulk_export, "YIELD_PER", 1)
+    execute = mocker.spy(session, "execute")
+    create_mock_customer(email="a@example.com", phone="0611111111")
+    create_mock_customer(email="b@example.com", phone="0622222222")
+
+    assert export(session, "customers", "csv", io.StringIO()) == 2
+    assert execute.call_args.kwargs["execution_options"] == {"yield_per": 1}
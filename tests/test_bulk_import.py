@@ -0,0 +1,83 @@
+import json
+
+from models.models import Customer
+from utils.bulk_import import CustomerImporter
+from utils.validators import DataValidator
+
+CSV_HEADER = "full_name,email,phone,company_name\n"
+
+
+def test_validate_row_collects_all_errors():
+    errors = DataValidator.validate_row(
+        {"full_name": " ", "email": "invalid-email", "phone": "12", "company_name": "Doe Inc."},
+        CustomerImporter.rules
+    )
+    assert [error.split(":")[0] for error in errors] == ["full_name", "email", "phone"]
+    assert "Email non valide" in errors[1]
+
+
+def test_import_csv(session, create_mock_user, create_mock_customer, tmp_path):
+    user = create_mock_user()
+    create_mock_customer(email="taken@example.com", phone="0600000000")
+    path = tmp_path / "customers.csv"
+    path.write_text(CSV_HEADER
+                    + "Jane Doe,jane@example.com,0611111111,Doe Corp\n"
+                    + "John Smith,john@example.com,0622222222,Smith Ltd\n"
+                    + "Bad Row,not-an-email,12,\n"
+                    + "Taken,taken@example.com,0633333333,Taken Inc.\n"
+                    + "Jane Again,jane@example.com,0644444444,Doe Corp\n", encoding="utf-8")
+
+    report = CustomerImporter(session, user.id, chunk_size=2).import_file(str(path))
+
+    assert report.inserted == 2
+    assert [line for line, _ in report.rejected] == [4, 5, 6]
+    assert len(report.rejected[0][1]) == 3
+    imported = session.query(Customer).filter(Customer.sales_contact_id == user.id).all()
+    assert sorted(customer.email for customer in imported) == ["jane@example.com", "john@example.com"]
+    assert sorted(customer.company_key for customer in imported) == ["doe", "smith"]
+
+
+def test_import_jsonl(session, create_mock_user, tmp_path):
+    user = create_mock_user()
+    path = tmp_path / "customers.jsonl"
+    rows = [{"full_name": f"Customer {i}", "email": f"customer{i}@example.com",
+             "phone": f"+33{i:09d}", "company_name": "Company"} for i in range(250)]
+    path.write_text("\n".join(json.dumps(row) for row in rows), encoding="utf-8")
+
+    report = CustomerImporter(session, user.id, chunk_size=100).import_file(str(path))
+
+    assert report.inserted == 250
+    assert report.rejected == []
+    assert session.query(Customer).count() == 250
+
+
+def test_import_rejects_unreadable_and_oversized_rows(session, create_mock_user, tmp_path):
+    user = create_mock_user()
+    path = tmp_path / "customers.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"full_name": "Jane Doe", "email": "jane@example.com", "phone": "0611111111",
+                    "company_name": "Doe Corp"}),
+        '{"full_name": "Broken",',
+        "[1, 2]",
+        json.dumps({"full_name": "J" * 80, "email": "long@example.com", "phone": "0622222222",
+                    "company_name": "Long Corp"}),
+    ]), encoding="utf-8")
+
+    report = CustomerImporter(session, user.id).import_file(str(path))
+
+    assert report.inserted == 1
+    assert [line for line, _ in report.rejected] == [2, 3, 4]
+    assert report.rejected[0][1][0].startswith("JSON non valide")
+    assert report.rejected[2][1] == ["full_name: 50 caractères au plus."]
+
+
+def test_import_customers(customer_controller, create_mock_user, login_required_mock, tmp_path, mocker):
+    user = create_mock_user()
+    path = tmp_path / "customers.csv"
+    path.write_text(CSV_HEADER + "Jane Doe,jane@example.com,0611111111,Doe Corp\n", encoding="utf-8")
+    mocker.patch.object(customer_controller.validators, 'validate_input', return_value=str(path))
+
+    report = customer_controller.import_customers(user)
+
+    assert report.inserted == 1
+    customer_controller.customer_view.display_import_report.assert_called_once_with(report)
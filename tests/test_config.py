@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from config import (RoutingSession, TimedQueuePool, create_configured_engine,
+                    get_pool_stats)
+from controllers.customer_controller import CustomerController
+from models.models import Base, Customer
+
+
+def test_configured_engine_pool(tmp_path):
+    engine = create_configured_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=2, max_overflow=0)
+
+    assert isinstance(engine.pool, TimedQueuePool)
+    assert engine.pool.size() == 2
+    engine.dispose()
+
+
+def test_memory_database_keeps_default_pool():
+    engine = create_configured_engine("sqlite:///:memory:")
+
+    assert not isinstance(engine.pool, TimedQueuePool)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert get_pool_stats(engine)["checkouts"] == 1
+
+
+def test_pool_stats(tmp_path):
+    engine = create_configured_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=2, max_overflow=0)
+
+    def query(_):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(query, range(20)))
+
+    stats = get_pool_stats(engine)
+    assert stats["checkouts"] == 20
+    assert stats["checked_out"] == 0
+    assert 1 <= stats["peak_checked_out"] <= 2
+    assert stats["connects"] <= 2
+    assert stats["max_wait_ms"] >= stats["avg_wait_ms"] >= 0
+    engine.dispose()
+
+
+@pytest.fixture
+def routing_session(tmp_path):
+    """A RoutingSession on two SQLite files standing for the primary and the replica."""
+    engines = {}
+    for name in ("primary", "replica"):
+        engines[name] = create_engine(f"sqlite:///{tmp_path / name}.db")
+        Base.metadata.create_all(bind=engines[name])
+        with engines[name].begin() as connection:
+            connection.execute(insert(Customer).values(id=1, full_name=f"{name} customer", email="a@ex.com",
+                                                       phone="0611111111", company_name="Company"))
+    session = sessionmaker(class_=RoutingSession, bind=engines["primary"], replica=engines["replica"])()
+    yield session
+    session.close()
+    for engine in engines.values():
+        engine.dispose()
+
+
+def listed_names(controller, mocker):
+    render = mocker.patch.object(controller.customer_view, "display_customers_view")
+    controller.display_all_customers()
+    return [customer.full_name for customer in render.call_args.args[0]]
+
+
+def test_read_only_methods_use_replica(routing_session, mocker):
+    controller = CustomerController(routing_session)
+
+    assert listed_names(controller, mocker) == ["replica customer"]
+    routing_session.expunge_all()
+    assert controller.get_customer(1).full_name == "primary customer"
+
+
+def test_read_your_writes(routing_session, mocker):
+    controller = CustomerController(routing_session)
+    routing_session.add(Customer(id=2, full_name="new customer", email="b@ex.com",
+                                 phone="0622222222", company_name="Company"))
+    routing_session.flush()
+
+    assert listed_names(controller, mocker) == ["primary customer", "new customer"]
+
+
+def test_without_replica_reads_primary(tmp_path, mocker):
+    engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(class_=RoutingSession, bind=engine)()
+
+    assert listed_names(CustomerController(session), mocker) == []
+    session.close()
+    engine.dispose()
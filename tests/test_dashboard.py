@@ -0,0 +1,148 @@
+from datetime import date, datetime, timedelta
+
+import threading
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from conftest import test_engine
+from models.dashboard import read_dashboard, reconcile, reconcile_periodically
+from models.models import Contract, DashboardCounter, Event, User
+
+TODAY = date(2024, 6, 3)
+
+
+def dashboard(session):
+    return read_dashboard(session, today=TODAY)
+
+
+def test_counters_follow_inserts(session):
+    session.add_all([
+        Contract(id=1, amount_total=100.0, amount_due=100.0),
+        Contract(id=2, amount_total=100.0, amount_due=0.0, is_signed=True),
+        Event(id=1, event_name="A", contract_id=2, event_start_date=datetime(2024, 6, 4, 10)),
+        Event(id=2, event_name="B", contract_id=2, event_start_date=datetime(2024, 6, 20, 10)),
+    ])
+    session.commit()
+
+    assert dashboard(session) == {"unsigned_contracts": 1, "unpaid_contracts": 1,
+                                  "unassigned_events": 2, "upcoming_events": 1}
+
+
+def test_counters_follow_updates_and_deletes(session):
+    contract = Contract(id=1, amount_total=100.0, amount_due=100.0)
+    event = Event(id=1, event_name="A", contract_id=1, event_start_date=datetime(2024, 6, 20, 10))
+    support = User(id=1, full_name="Support", email="support@ex.com", password="hashed")
+    session.add_all([contract, event, support])
+    session.commit()
+
+    contract.is_signed, contract.amount_due = True, 0.0
+    event.event_start_date = datetime(2024, 6, 5, 9)
+    session.commit()
+    assert dashboard(session) == {"unsigned_contracts": 0, "unpaid_contracts": 0,
+                                  "unassigned_events": 1, "upcoming_events": 1}
+
+    event.support_contact = support
+    session.commit()
+    assert dashboard(session)["unassigned_events"] == 0
+
+    event.support_contact_id = None
+    session.commit()
+    assert dashboard(session)["unassigned_events"] == 1
+
+    session.delete(event)
+    session.commit()
+    assert dashboard(session) == {"unsigned_contracts": 0, "unpaid_contracts": 0,
+                                  "unassigned_events": 0, "upcoming_events": 0}
+
+
+def test_rollback_discards_counter_changes(session):
+    session.add(Contract(id=1, amount_total=100.0, amount_due=100.0))
+    session.flush()
+    session.rollback()
+
+    assert dashboard(session)["unsigned_contracts"] == 0
+
+
+def test_reconcile_counts_rows_written_outside_the_controllers(session):
+    session.execute(insert(Contract), [
+        {"id": i, "amount_total": 100.0, "amount_due": 50.0 * (i % 2), "is_signed": i % 3 == 0} for i in range(1, 10)
+    ])
+    session.execute(insert(Event), [
+        {"id": i, "event_name": f"Event {i}", "contract_id": i, "support_contact_id": None if i % 2 else 1,
+         "event_start_date": datetime(2024, 6, 1, 10) + timedelta(days=i)} for i in range(1, 10)
+    ])
+    session.add(DashboardCounter(name="unsigned_contracts", value=42))
+    session.commit()
+
+    with test_engine.begin() as connection:
+        reconcile(connection, today=TODAY)
+
+    assert dashboard(session) == {"unsigned_contracts": 6, "unpaid_contracts": 5,
+                                  "unassigned_events": 5, "upcoming_events": 7}
+
+
+def test_reconcile_drops_the_past_days(session):
+    session.add_all([Event(id=i, event_name=f"Event {i}", event_start_date=datetime(2024, 6, i, 10))
+                     for i in range(1, 6)])
+    session.commit()
+
+    with test_engine.begin() as connection:
+        reconcile(connection, today=TODAY)
+
+    assert sorted(session.scalars(select(DashboardCounter.name)
+                                  .where(DashboardCounter.name.like("events_on:%")))) == [
+        "events_on:2024-06-03", "events_on:2024-06-04", "events_on:2024-06-05"]
+
+
+def test_dashboard_reads_once(session, mocker):
+    execute = mocker.spy(session, "execute")
+
+    assert dashboard(session) == {"unsigned_contracts": 0, "unpaid_contracts": 0,
+                                  "unassigned_events": 0, "upcoming_events": 0}
+    assert execute.call_count == 1
+
+
+def test_contract_controller_tracks_counters(contract_controller, login_required_mock, mocker, create_mock_customer):
+    create_mock_customer()
+    contract_controller.validators.validate_input.side_effect = [1, 1000.0, 500.0, "non"]
+    contract_controller.validators.transform_boolean.return_value = False
+
+    contract_controller.create_contract(mocker.MagicMock())
+
+    assert dashboard(contract_controller.session)["unpaid_contracts"] == 1
+
+
+def test_deleting_a_support_counts_its_events_as_unassigned(user_controller, session, create_mock_user,
+                                                            login_required_mock):
+    support = create_mock_user()
+    session.add(Event(id=1, event_name="A", support_contact=support))
+    session.commit()
+    user_controller.validators.validate_input.return_value = support.id
+
+    user_controller.delete_user(create_mock_user(user_id=2, email="admin@example.com", full_name="Admin User"))
+
+    assert session.get(Event, 1).support_contact_id is None
+    assert dashboard(session)["unassigned_events"] == 1
+
+
+def test_reconcile_runs_periodically(mocker):
+    engine = mocker.patch("models.dashboard.get_engine").return_value
+    reconciled = threading.Event()
+
+    def fail_once(connection):
+        if reconcile_mock.call_count == 1:
+            raise SQLAlchemyError("down")
+        reconciled.set()
+    reconcile_mock = mocker.patch("models.dashboard.reconcile", side_effect=fail_once)
+    stopped = threading.Event()
+
+    thread = reconcile_periodically(0.001, stopped)
+    assert reconciled.wait(5)
+    stopped.set()
+    thread.join(5)
+
+    # Retried after the failure, in a transaction of the configured engine
+    assert reconcile_mock.call_args_list[1] == mocker.call(engine.begin.return_value.__enter__.return_value)
+    assert not thread.is_alive()
+    assert reconcile_periodically(0) is None
@@ -0,0 +1,136 @@
+from sqlalchemy import event, insert
+from sqlalchemy.orm import sessionmaker
+
+from conftest import test_engine
+from controllers.customer_controller import CustomerController
+from controllers.main_controller import MainController
+from models.models import Customer, User
+from utils.dedup import CustomerRecord, clusters, find_duplicates, likely_duplicates, normalize
+
+
+def record(customer_id, full_name, company_name, sales_contact_id=1):
+    return CustomerRecord(customer_id, full_name, company_name, f"c{customer_id}@ex.com", sales_contact_id)
+
+
+def test_normalize_ignores_case_accents_and_legal_forms():
+    assert normalize("Société Générale S.A.") == "societe generale"
+    assert normalize("ACME, Inc.") == normalize("Acme")
+
+
+def test_clusters_group_variations():
+    records = [
+        record(1, "Jean Dupont", "Dupont Traiteur SARL"),
+        record(2, "Jean Dupond", "Dupont-Traiteur"),
+        record(3, "Jean  Dupont", "DUPONT TRAITEUR"),
+        record(4, "Marie Curie", "Radium Labs"),
+        record(5, "Marie Curie", "Radium Laboratories"),
+        record(6, "Paul Martin", "Globex"),
+    ]
+
+    assert [[item.id for item in cluster] for cluster in clusters(records)] == [[1, 2, 3], [4, 5]]
+
+
+def test_find_duplicates_across_sales_contacts(session):
+    session.execute(insert(User), [
+        {"id": i, "full_name": f"Sales {i}", "email": f"sales{i}@ex.com", "password": "hashed"} for i in (1, 2)
+    ])
+    session.execute(insert(Customer), [
+        {"id": 1, "full_name": "Jean Dupont", "email": "a@ex.com", "phone": "1", "company_name": "Acme",
+         "sales_contact_id": 1},
+        {"id": 2, "full_name": "Jean Dupont", "email": "b@ex.com", "phone": "2", "company_name": "ACME Inc.",
+         "sales_contact_id": 1},
+        {"id": 3, "full_name": "Jean Dupont", "email": "c@ex.com", "phone": "3", "company_name": "Acme",
+         "sales_contact_id": 2},
+        {"id": 4, "full_name": "Lea Garnier", "email": "d@ex.com", "phone": "4", "company_name": "Globex",
+         "sales_contact_id": 2},
+        {"id": 5, "full_name": "Paul Martin", "email": "e@ex.com", "phone": "5", "company_name": "Initech",
+         "sales_contact_id": 1},
+        {"id": 6, "full_name": "P. Martin", "email": "f@ex.com", "phone": "6", "company_name": "S.A. Initech",
+         "sales_contact_id": 2},
+    ])
+    session.commit()
+
+    duplicates = find_duplicates(session)
+
+    assert {contact: [[item.id for item in cluster] for cluster in found] for contact, found in duplicates.items()} == {
+        1: [[1, 2, 3], [5, 6]], 2: [[1, 2, 3], [5, 6]]}
+
+
+def test_likely_duplicates_use_the_blocking_indexes(session, create_mock_customer):
+    create_mock_customer(full_name="Jean Dupont", email="a@ex.com", phone="1", company_name="Dupont Traiteur")
+    create_mock_customer(full_name="Paul Martin", email="b@ex.com", phone="2", company_name="S.A. Globex")
+    plans = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT"):
+            plans.extend(row[-1] for row in cursor.connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters))
+
+    event.listen(test_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        duplicates = likely_duplicates(session, "Jean Dupond", "Dupont-Traiteur SARL")
+    finally:
+        event.remove(test_engine, "before_cursor_execute", before_cursor_execute)
+
+    assert [customer.full_name for _, customer in duplicates] == ["Jean Dupont"]
+    assert [customer.id for _, customer in likely_duplicates(session, "Paul Martin", "Globex")] == [2]
+    assert likely_duplicates(session, "Jeanne Dupuis", "Dupuis Fleurs") == []
+    assert any("ix_customers_company_key" in plan for plan in plans)
+    assert not any(plan.startswith("SCAN customers") for plan in plans)
+
+
+def test_create_customer_warns_about_duplicates(customer_controller, login_required_mock, mocker,
+                                                create_mock_user, create_mock_customer):
+    user = create_mock_user()
+    create_mock_customer(full_name="Jean Dupont", email="a@ex.com", phone="1", company_name="Dupont Traiteur")
+    mocker.patch.object(customer_controller.validators, 'validate_input', side_effect=[
+        'Jean Dupont', 'b@ex.com', '2', 'Dupont Traiteur SARL'
+    ])
+
+    customer = customer_controller.create_customer(user)
+
+    assert customer.id == 2
+    (duplicates,), _ = customer_controller.customer_view.duplicate_customer_warning.call_args
+    assert [match.id for _, match in duplicates] == [1]
+
+
+def test_likely_duplicates_rank_large_blocks_by_key(session, mocker):
+    mocker.patch("utils.dedup.BLOCK_SIZE", 5)
+    session.execute(insert(Customer), [
+        {"id": i, "full_name": f"Jean {name}", "email": f"c{i}@ex.com", "phone": str(i), "company_name": f"Soci {name}",
+         "name_key": f"jean {name.lower()}", "company_key": f"soci {name.lower()}"}
+        for i, name in enumerate(["Aubert", "Bernard", "Durand", "Dupont", "Dupuis", "Petit", "Robert",
+                                  "Simon", "Thomas", "Zola"], start=1)
+    ])
+    session.commit()
+
+    # The last of the block in key order, beyond the first BLOCK_SIZE of it
+    duplicates = likely_duplicates(session, "Jean Zola", "Soci Zola")
+
+    assert duplicates[0][1].id == 10
+    assert duplicates[0][0] == 1.0
+
+
+def test_create_customer_checks_duplicates_then_inserts(create_mock_user, login_required_mock, mocker):
+    main_controller = MainController()
+    main_controller.Session = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False,
+                                           bind=test_engine)
+    user = create_mock_user()
+    assert user.id == 1
+    mocker.patch("utils.validators.DataValidator.validate_input", side_effect=[
+        "Jane Doe", "jane@example.com", "0611111111", "Doe Corp"
+    ])
+    mocker.patch("views.customer_view.CustomerView.customer_created")
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0].upper())
+
+    event.listen(test_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        customer = main_controller.in_session(CustomerController, "create_customer", user)()
+    finally:
+        event.remove(test_engine, "before_cursor_execute", before_cursor_execute)
+
+    # The duplicate check (two range scans per key), then the insert of the customer with its name keys
+    assert statements == ["SELECT"] * 4 + ["INSERT"]
+    assert (customer.name_key, customer.company_key) == ("jane doe", "doe")
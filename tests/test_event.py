@@ -17,7 +17,8 @@ def test_update_event(event_controller, create_mock_event, login_required_mock,
     event = create_mock_event(event_name='Old Event', location='Old Location', attendees=10, notes='Old Notes')
 
     mocker.patch.object(event_controller.validators, 'validate_input', side_effect=[
-        event.id, 'Updated Event', date.today(), date.today(), 'New Location', 20, 'Updated Notes', 1
+        event.id, 'Updated Event', date.today().strftime('%d/%m/%Y'), date.today().strftime('%d/%m/%Y'),
+        'New Location', 20, 'Updated Notes', 1
     ])
 
     updated_event = event_controller.update_event(user)
@@ -42,6 +43,23 @@ def test_display_all_events(event_controller, create_mock_event, mocker):
     mock_display.assert_called_once_with([event1, event2])
 
 
+def test_display_events_of_the_support_user(event_controller, create_mock_event, login_required_mock, mocker):
+    support = mocker.MagicMock(id=2)
+    support.role.name = "support"
+    create_mock_event(event_name='Event A')
+    event = create_mock_event(event_name='Event B')
+    event.support_contact_id = 2
+    event_controller.session.commit()
+    event_controller.menu_view = mocker.MagicMock()
+    event_controller.menu_view.filtered_event_support_menu_options.return_value = ("Filtrer", ["Mes événements"])
+    event_controller.menu_view.select_choice.return_value = 1
+    mock_display = mocker.patch.object(event_controller.event_view, 'display_events_view')
+
+    event_controller.display_events(support)
+
+    mock_display.assert_called_once_with([event])
+
+
 def test_add_support_to_event(event_controller, create_mock_event, login_required_mock, mocker):
     user = mocker.MagicMock(id=1)
     event = create_mock_event(event_name='Event A', location='Location A', attendees=10, notes='Notes A')
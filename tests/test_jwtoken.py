@@ -1,6 +1,14 @@
-import jwt
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 
+import jwt
+
+from conftest import TestSessionLocal
+from models.models import RefreshToken, Role, User
+from utils.jwtoken import TokenManager, benchmark_checks
+from views.menu_view import MenuView
+
 
 def test_store_tokens(token_manager):
     """Test pour vérifier que les tokens sont correctement stockés."""
@@ -64,3 +72,163 @@ def test_check_token_invalid(token_manager, mock_user):
     invalid_token = 'this.is.an.invalid.token'
     user_id = token_manager.check_token(invalid_token)
     assert user_id is None
+
+
+def test_validate_token_uses_verified_claims(token_manager, mock_user, mocker):
+    """Test pour vérifier qu'un token vérifié n'est plus décodé jusqu'à son expiration."""
+    token = token_manager.create_token(mock_user)
+    assert token_manager.validate_token(token) == mock_user.id
+
+    decode = mocker.spy(jwt, 'decode')
+    assert token_manager.check_token(token) == mock_user.id
+    assert decode.call_count == 0
+
+    token_manager.verified_claims[token]['exp'] = 0
+    assert token_manager.check_token(token) == mock_user.id
+    assert decode.call_count == 1
+
+
+def test_clear_cache_revokes_verified_claims(token_manager, mock_user, mocker):
+    """Test pour vérifier que la déconnexion révoque les tokens vérifiés."""
+    token = token_manager.create_token(mock_user)
+    token_manager.validate_token(token)
+
+    token_manager.clear_cache()
+    assert token_manager.verified_claims == {}
+
+    decode = mocker.spy(jwt, 'decode')
+    token_manager.check_token(token)
+    assert decode.call_count == 1
+
+
+def test_verified_claims_are_bounded(token_manager, mocker):
+    """Test pour vérifier que les tokens expirés puis les moins récemment utilisés sont retirés du cache."""
+    mocker.patch.object(TokenManager, 'verified_claims', OrderedDict(expired={'user_id': 1, 'exp': 0}))
+    mocker.patch.object(TokenManager, 'VERIFIED_CLAIMS_MAX', 2)
+    exp = (datetime.now(timezone.utc) + timedelta(minutes=1)).timestamp()
+
+    assert token_manager.cached_user_id('expired') is None
+    assert list(token_manager.verified_claims) == []
+
+    token_manager.remember_claims('first', {'user_id': 1, 'exp': exp})
+    token_manager.remember_claims('second', {'user_id': 2, 'exp': exp})
+    assert token_manager.cached_user_id('first') == 1
+    token_manager.remember_claims('third', {'user_id': 3, 'exp': exp})
+    assert list(token_manager.verified_claims) == ['first', 'third']
+
+
+def test_verified_claims_are_shared_by_threads(token_manager, mocker):
+    """Test pour vérifier que des threads peuvent vérifier des tokens en même temps que le cache est vidé."""
+    mocker.patch.object(TokenManager, 'verified_claims', OrderedDict())
+    mocker.patch.object(TokenManager, 'VERIFIED_CLAIMS_MAX', 8)
+    exp = (datetime.now(timezone.utc) + timedelta(minutes=1)).timestamp()
+    errors = []
+
+    def check(worker):
+        try:
+            for i in range(500):
+                token = f'{worker}-{i % 16}'
+                if token_manager.cached_user_id(token) is None:
+                    token_manager.remember_claims(token, {'user_id': worker, 'exp': exp})
+                if i % 100 == 0:
+                    token_manager.clear_cache()
+        except Exception as error:
+            errors.append(error)
+
+    mocker.patch.object(MenuView, 'clear_cache_view')
+    threads = [threading.Thread(target=check, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(token_manager.verified_claims) <= 8
+
+
+def test_benchmark_checks():
+    """Test pour vérifier que le cache rend la vérification moins coûteuse."""
+    result = benchmark_checks(200)
+    assert result['cached_us'] < result['uncached_us']
+
+
+def add_user(session):
+    user = User(id=1, email='test@example.com', full_name='Test User', password='hashed_password',
+                role=Role(id=1, name='admin'))
+    session.add(user)
+    session.commit()
+    return user
+
+
+def test_rotate_refresh_token(token_manager, session):
+    """Test pour vérifier qu'un refresh token donne de nouveaux tokens une seule fois."""
+    add_user(session)
+    refresh_token = token_manager.create_refresh_token(session, 1)
+
+    access_token, new_refresh_token = token_manager.rotate_refresh_token(session, refresh_token)
+    assert token_manager.decode_token(access_token) == 1
+    assert new_refresh_token != refresh_token
+    assert token_manager.rotate_refresh_token(session, new_refresh_token) is not None
+
+
+def test_reused_refresh_token_revokes_the_session(token_manager, session):
+    """Test pour vérifier que la réutilisation d'un refresh token révoque toute la session."""
+    add_user(session)
+    refresh_token = token_manager.create_refresh_token(session, 1)
+    _, new_refresh_token = token_manager.rotate_refresh_token(session, refresh_token)
+
+    assert token_manager.rotate_refresh_token(session, refresh_token) is None
+    assert token_manager.rotate_refresh_token(session, new_refresh_token) is None
+    assert session.query(RefreshToken).filter(RefreshToken.revoked.is_(False)).count() == 0
+
+
+def test_refresh_token_expiry_slides_until_the_end_of_the_session(token_manager, session, mocker):
+    """Test pour vérifier que l'expiration glisse sans dépasser la fin de la session."""
+    add_user(session)
+    mocker.patch.object(TokenManager, 'SESSION_MAX_HOURS', 1)
+    mocker.patch.object(TokenManager, 'REFRESH_TOKEN_IDLE_MINUTES', 45)
+    refresh_token = token_manager.create_refresh_token(session, 1)
+    first = session.query(RefreshToken).one()
+    assert first.expires_at < first.session_expires_at
+
+    first.session_expires_at -= timedelta(minutes=30)
+    _, new_refresh_token = token_manager.rotate_refresh_token(session, refresh_token)
+    second = session.query(RefreshToken).filter(RefreshToken.rotated.is_(False)).one()
+    assert second.expires_at == second.session_expires_at == first.session_expires_at
+
+    second.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    assert token_manager.rotate_refresh_token(session, new_refresh_token) is None
+
+
+def test_refresh_access_token(token_manager, session, mocker):
+    """Test pour vérifier qu'un access token expiré est remplacé grâce au refresh token."""
+    add_user(session)
+    refresh_token = token_manager.create_refresh_token(session, 1)
+    session.commit()
+    mocker.patch.object(TokenManager, 'cache', 'expired_token')
+    mocker.patch.object(TokenManager, 'refresh_cache', refresh_token)
+
+    assert token_manager.refresh_access_token(TestSessionLocal) == 1
+    assert TokenManager.cache != 'expired_token'
+    assert TokenManager.refresh_cache != refresh_token
+
+
+def test_token_required_refreshes_expired_tokens(mocker):
+    """Test pour vérifier que token_required tente un refresh avant de refuser l'accès."""
+    mocker.patch.object(TokenManager, 'cache', 'expired_token')
+    mocker.patch.object(TokenManager, 'check_token', return_value=None)
+    refresh = mocker.patch.object(TokenManager, 'refresh_access_token', return_value=1)
+
+    assert TokenManager.token_required(lambda: "done")() == "done"
+    refresh.assert_called_once()
+
+
+def test_logout_revokes_the_refresh_token(user_controller, login_required_mock, session, mocker):
+    """Test pour vérifier que la déconnexion révoque la session."""
+    add_user(session)
+    refresh_token = user_controller.start_session(session.get(User, 1))
+    mocker.patch.object(TokenManager, 'refresh_cache', refresh_token)
+
+    user_controller.logout()
+    assert session.query(RefreshToken).one().revoked
+    assert TokenManager.refresh_cache is None
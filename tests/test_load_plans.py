@@ -0,0 +1,98 @@
+from datetime import datetime
+from io import StringIO
+
+import pytest
+from rich.console import Console
+from sqlalchemy import event
+
+from conftest import test_engine
+from models.load_plans import load_plan
+from models.models import Contract, Customer, Event, Role, User
+from views.contract_view import ContractView
+from views.customer_view import CustomerView
+from views.event_view import EventView
+
+ROWS = 20
+
+
+@pytest.fixture
+def listing_data(session):
+    """Seed users, customers, contracts and events, then empty the identity map."""
+    role = Role(id=2, name="support")
+    session.add(role)
+    for i in range(1, ROWS + 1):
+        user = User(id=i, full_name=f"User {i}", email=f"user{i}@ex.com", password="hashed", role=role)
+        customer = Customer(id=i, full_name=f"Customer {i}", email=f"customer{i}@ex.com",
+                            phone=f"01234567{i:02d}", company_name=f"Company {i}", sales_contact=user)
+        contract = Contract(id=i, customer=customer, amount_total=1000.0, amount_due=500.0, is_signed=False)
+        session.add(Event(id=i, event_name=f"Event {i}", contract=contract, support_contact=user,
+                          event_start_date=datetime(2030, 1, 1), event_end_date=datetime(2030, 1, 2),
+                          location="Paris", attendees=10, notes="Notes"))
+    session.commit()
+    session.expunge_all()
+
+
+@pytest.fixture
+def count_queries():
+    """Count the SELECT statements sent to the test engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(test_engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(test_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def quiet_console(mocker):
+    """Render the views into a buffer instead of the terminal."""
+    console = Console(file=StringIO())
+    for view in (CustomerView, ContractView, EventView):
+        mocker.patch.object(view, "console", console)
+
+
+def test_unknown_load_plan():
+    with pytest.raises(ValueError):
+        load_plan("unknown")
+
+
+def test_display_all_events_query_count(event_controller, listing_data, count_queries, quiet_console):
+    event_controller.event_view = EventView()
+    event_controller.display_all_events()
+    assert len(count_queries) == 1
+
+
+def test_filtered_events_query_count(event_controller, listing_data, count_queries, quiet_console):
+    event_controller.event_view = EventView()
+    for filter_option in (1, 2, 3, 4):
+        count_queries.clear()
+        events = event_controller.get_admin_filtered_events(filter_option)
+        event_controller.event_view.display_events_view(events)
+        assert len(count_queries) == 1
+
+    count_queries.clear()
+    events = event_controller.get_support_filtered_events(1, 1)
+    event_controller.event_view.display_events_view(events)
+    assert len(events) == 1
+    assert len(count_queries) == 1
+
+
+def test_display_all_customers_query_count(customer_controller, listing_data, count_queries, quiet_console):
+    customer_controller.customer_view = CustomerView()
+    customer_controller.display_all_customers()
+    assert len(count_queries) == 1
+
+
+def test_contract_listings_query_count(contract_controller, listing_data, count_queries, quiet_console):
+    contract_controller.contract_view = ContractView()
+    contract_controller.display_all_contracts()
+    assert len(count_queries) == 1
+
+    for filter_option in (1, 2, 3, 4):
+        count_queries.clear()
+        contracts = contract_controller.get_filtered_contracts(filter_option)
+        contract_controller.contract_view.display_contracts_view(contracts)
+        assert len(count_queries) == 1
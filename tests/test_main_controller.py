@@ -0,0 +1,136 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from conftest import test_engine
+from controllers.customer_controller import CustomerController
+from controllers.main_controller import MainController
+from controllers.user_controller import UserController
+from models.models import Customer
+from utils.query_stats import QueryInstrumentation
+
+
+@pytest.fixture
+def main_controller() -> MainController:
+    """MainController running its actions on the test database, with the application session settings."""
+    controller = MainController()
+    controller.Session = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=test_engine)
+    return controller
+
+
+def test_in_session_runs_each_action_in_its_own_session(main_controller, create_mock_customer, mocker):
+    create_mock_customer()
+    sessions = []
+
+    def get_customer(self, customer_id):
+        sessions.append(self.session)
+        return self.session.get(Customer, customer_id)
+
+    mocker.patch.object(CustomerController, "get_customer", get_customer)
+    action = main_controller.in_session(CustomerController, "get_customer", 1)
+
+    customer = action()
+    action()
+
+    assert customer.full_name == "John Doe"
+    assert sessions[0] is not sessions[1]
+    assert all(len(session.identity_map) == 0 for session in sessions)
+
+
+def test_in_session_rolls_back_on_error(main_controller, session, mocker):
+    def create_and_fail(self):
+        self.session.add(Customer(full_name="Jane Doe", email="jane@example.com",
+                                  phone="0611111111", company_name="Doe Corp"))
+        self.session.flush()
+        raise RuntimeError("action failed")
+
+    mocker.patch.object(CustomerController, "display_all_customers", create_and_fail)
+
+    with pytest.raises(RuntimeError):
+        main_controller.in_session(CustomerController, "display_all_customers")()
+
+    assert session.query(Customer).count() == 0
+
+
+def test_create_customer_without_reload(main_controller, create_mock_user, login_required_mock, mocker):
+    user = create_mock_user()
+    assert user.id == 1
+    mocker.patch("utils.validators.DataValidator.validate_input", side_effect=[
+        "Jane Doe", "jane@example.com", "0611111111", "Doe Corp"
+    ])
+    mocker.patch("views.customer_view.CustomerView.customer_created")
+    # The duplicate check is tested in test_dedup
+    mocker.patch("controllers.customer_controller.likely_duplicates", return_value=[])
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0].upper())
+
+    event.listen(test_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        customer = main_controller.in_session(CustomerController, "create_customer", user)()
+    finally:
+        event.remove(test_engine, "before_cursor_execute", before_cursor_execute)
+
+    assert statements == ["INSERT"]
+    assert customer.id is not None
+    assert customer.full_name == "Jane Doe"
+
+
+def test_handle_menu_selection_loops_until_logout(main_controller, mock_user, mocker):
+    mocker.patch.object(main_controller.user_view, "authenticated_user_view")
+    mocker.patch.object(main_controller, "login_menu")
+    mocker.patch.object(main_controller.token_manager, "cache", "token")
+    actions = []
+
+    def display_menu(menu_option, action_map):
+        actions.append(menu_option[0])
+        if len(actions) == 3:
+            main_controller.token_manager.cache = None
+
+    mocker.patch.object(main_controller.menu_view, "display_menu", side_effect=display_menu)
+
+    main_controller.handle_menu_selection(mock_user)
+
+    assert actions == ["Menu Administrateur"] * 3
+    main_controller.login_menu.assert_called_once()
+
+
+def test_in_session_records_the_queries_of_the_action(main_controller, create_mock_customer, mocker):
+    create_mock_customer()
+    main_controller.queries = QueryInstrumentation()
+    main_controller.queries.attach(test_engine)
+    display_query_stats = mocker.patch.object(main_controller.menu_view, "display_query_stats")
+    mocker.patch.dict("controllers.main_controller.QUERY_STATS", {"SUMMARY": True})
+    try:
+        main_controller.in_session(CustomerController, "get_customer", 1)()
+    finally:
+        main_controller.queries.detach(test_engine)
+
+    stats = display_query_stats.call_args.args[0]
+    assert stats.name == "CustomerController.get_customer"
+    assert stats.queries == 1
+    assert main_controller.queries.summary()[0]["calls"] == 1
+
+
+def test_nested_actions_are_summed_up_in_the_outer_action(main_controller, create_mock_customer, mocker):
+    create_mock_customer()
+    main_controller.queries = QueryInstrumentation()
+    main_controller.queries.attach(test_engine)
+    display_query_stats = mocker.patch.object(main_controller.menu_view, "display_query_stats")
+    mocker.patch.dict("controllers.main_controller.QUERY_STATS", {"SUMMARY": True})
+    inner_action = main_controller.in_session(CustomerController, "get_customer", 1)
+
+    def database(self, database_actions):
+        self.session.get(Customer, 1)
+        database_actions[1]()
+
+    mocker.patch.object(UserController, "database", database)
+    try:
+        main_controller.in_session(UserController, "database", {1: inner_action})()
+    finally:
+        main_controller.queries.detach(test_engine)
+
+    [[stats], _] = display_query_stats.call_args_list[0]
+    assert display_query_stats.call_count == 1
+    assert (stats.name, stats.queries) == ("UserController.database", 2)
@@ -0,0 +1,82 @@
+import pytest
+
+from models.models import Customer
+from utils.pagination import KeysetPaginator
+from views.menu_view import MenuView
+
+
+@pytest.fixture
+def customers(session):
+    """Create seven customers with ids 1 to 7."""
+    for i in range(1, 8):
+        session.add(Customer(id=i, full_name=f"Customer {i}", email=f"customer{i}@ex.com",
+                             phone=f"012345678{i}", company_name="Company"))
+    session.commit()
+
+
+@pytest.fixture
+def paginator(session, customers):
+    return KeysetPaginator(session.query(Customer), Customer.id, page_size=3)
+
+
+def ids(page):
+    return [customer.id for customer in page.items]
+
+
+def test_first_and_next_pages(paginator):
+    page = paginator.first()
+    assert ids(page) == [1, 2, 3]
+    assert not page.has_previous and page.has_next
+
+    page = paginator.next(page)
+    assert ids(page) == [4, 5, 6]
+    assert page.has_previous and page.has_next
+
+    page = paginator.next(page)
+    assert ids(page) == [7]
+    assert page.has_previous and not page.has_next
+
+
+def test_previous_page(paginator):
+    page = paginator.jump(5)
+    assert ids(page) == [5, 6, 7]
+    assert page.has_previous and not page.has_next
+
+    page = paginator.previous(page)
+    assert ids(page) == [2, 3, 4]
+    assert page.has_previous and page.has_next
+
+    page = paginator.previous(page)
+    assert ids(page) == [1]
+    assert not page.has_previous
+
+
+def test_jump_past_the_end(paginator):
+    page = paginator.jump(100)
+    assert ids(page) == []
+    assert page.has_previous and not page.has_next
+
+    page = paginator.previous(page)
+    assert ids(page) == [5, 6, 7]
+    assert not page.has_next
+
+
+def test_browse_pages(paginator, mocker):
+    mocker.patch.object(MenuView, "select_choice", side_effect=[1, 1, 2, 3, 4])
+    mocker.patch("builtins.input", return_value="2")
+    render = mocker.MagicMock()
+
+    MenuView().browse_pages(paginator, render)
+
+    rendered = [[customer.id for customer in call.args[0]] for call in render.call_args_list]
+    assert rendered == [[1, 2, 3], [4, 5, 6], [7], [4, 5, 6], [2, 3, 4]]
+
+
+def test_browse_single_page_does_not_prompt(session, customers, mocker):
+    select_choice = mocker.patch.object(MenuView, "select_choice")
+    render = mocker.MagicMock()
+
+    MenuView().browse_pages(KeysetPaginator(session.query(Customer), Customer.id), render)
+
+    render.assert_called_once()
+    select_choice.assert_not_called()
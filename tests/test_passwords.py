@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+from argon2 import extract_parameters
+from argon2.exceptions import VerifyMismatchError
+
+from utils.passwords import (MIN_MEMORY_COST, PasswordPool, PasswordPoolFull, benchmark_logins, calibrate,
+                             password_hasher, percentile, write_settings)
+
+LOW_COST = {"TIME_COST": 1, "MEMORY_COST": 8, "PARALLELISM": 1}
+
+
+def test_percentile():
+    values = list(range(1, 101))
+
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([7.0], 0.99) == 7.0
+
+
+def test_calibrate_fits_the_budget(mocker):
+    def fake_timings(parameters, samples):
+        return {"p50_ms": parameters["TIME_COST"] * parameters["MEMORY_COST"] / 1000, "p99_ms": 0}
+    mocker.patch("utils.passwords.time_logins", side_effect=fake_timings)
+
+    assert calibrate(100, max_memory_cost=262144, parallelism=2) == {
+        "TIME_COST": 1, "MEMORY_COST": 65536, "PARALLELISM": 2
+    }
+    assert calibrate(100, max_memory_cost=32768, parallelism=2) == {
+        "TIME_COST": 3, "MEMORY_COST": 32768, "PARALLELISM": 2
+    }
+
+
+def test_calibrate_keeps_the_minimum_memory(mocker):
+    mocker.patch("utils.passwords.time_logins", return_value={"p50_ms": 1000, "p99_ms": 1000})
+
+    parameters = calibrate(100, max_memory_cost=65536)
+
+    assert parameters["TIME_COST"] == 1
+    assert parameters["MEMORY_COST"] == 32768
+    assert parameters["MEMORY_COST"] // 2 < MIN_MEMORY_COST
+
+
+def test_write_settings_keeps_other_keys(tmp_path):
+    path = tmp_path / ".env"
+    path.write_text("DB_NAME=epic_events\nARGON2_TIME_COST=3\n")
+
+    write_settings({"TIME_COST": 4, "MEMORY_COST": 32768, "PARALLELISM": 2}, str(path))
+
+    assert path.read_text().splitlines() == [
+        "DB_NAME=epic_events", "ARGON2_TIME_COST=4", "ARGON2_MEMORY_COST=32768", "ARGON2_PARALLELISM=2"
+    ]
+
+
+def test_auth_user_rehashes_outdated_hashes(user_controller, create_mock_user):
+    user_controller.password_hasher = password_hasher(LOW_COST)
+    old_hash = password_hasher({**LOW_COST, "TIME_COST": 2}).hash("secure_password")
+    create_mock_user(email="test@example.com", password=old_hash)
+
+    user = user_controller.auth_user("test@example.com", "secure_password")
+
+    assert user.password != old_hash
+    assert extract_parameters(user.password).time_cost == 1
+    assert user_controller.auth_user("test@example.com", "secure_password").password == user.password
+
+
+def test_password_pool_runs_on_workers():
+    pool = PasswordPool(workers=2, queue_limit=2)
+    hasher = password_hasher(LOW_COST)
+    hashed = pool.hash(hasher, "secure_password")
+
+    assert pool.verify(hasher, hashed, "secure_password")
+    with pytest.raises(VerifyMismatchError):
+        pool.verify(hasher, hashed, "wrong_password")
+
+
+def test_password_pool_rejects_past_the_queue_limit():
+    pool = PasswordPool(workers=1, queue_limit=0)
+    started, release = threading.Event(), threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait()
+
+    thread = threading.Thread(target=pool.run, args=(blocked,))
+    thread.start()
+    started.wait()
+
+    with pytest.raises(PasswordPoolFull):
+        pool.run(len, "")
+    release.set()
+    thread.join()
+    assert pool.run(len, "ab") == 2
+
+
+def test_auth_user_when_the_pool_is_full(user_controller, create_mock_user, mocker):
+    create_mock_user(email="test@example.com", password=password_hasher(LOW_COST).hash("secure_password"))
+    mocker.patch("controllers.user_controller.PASSWORDS.verify", side_effect=PasswordPoolFull)
+
+    assert user_controller.auth_user("test@example.com", "secure_password") is None
+    user_controller.user_view.login_busy.assert_called_once()
+
+
+def test_benchmark_logins():
+    result = benchmark_logins(8, LOW_COST, PasswordPool(workers=2, queue_limit=8))
+
+    assert result["logins"] == 8
+    assert result["workers"] == 2
+    assert result["p50_ms"] <= result["p99_ms"]
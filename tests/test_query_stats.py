@@ -0,0 +1,107 @@
+import logging
+
+import pytest
+from sqlalchemy import select
+
+from conftest import test_engine
+from models.models import Customer, User
+from utils.pagination import KeysetPaginator
+from utils.query_stats import NPlusOneDetected, QueryInstrumentation, statement_shape
+
+
+@pytest.fixture
+def instrumentation():
+    queries = QueryInstrumentation(slow_ms=10000, n_plus_one=3)
+    queries.attach(test_engine)
+    yield queries
+    queries.detach(test_engine)
+
+
+@pytest.fixture
+def customers(session):
+    session.add_all([User(id=i, full_name=f"User {i}", email=f"user{i}@ex.com", password="hashed")
+                     for i in range(1, 5)])
+    session.add_all([Customer(id=i, full_name=f"Customer {i}", email=f"customer{i}@ex.com", phone=f"+3360000000{i}",
+                              company_name=f"Company {i}", sales_contact_id=i)
+                     for i in range(1, 5)])
+    session.commit()
+    session.expunge_all()
+
+
+def test_statement_shape():
+    assert statement_shape("SELECT * FROM users WHERE id IN (?, ?, ?) AND name = 'Bob'") == \
+        statement_shape("SELECT *\n FROM users WHERE id IN (?) AND name = 'Alice'") == \
+        "SELECT * FROM users WHERE id IN (?) AND name = ?"
+    assert statement_shape("SELECT * FROM users LIMIT 10 OFFSET 20") == "SELECT * FROM users LIMIT ? OFFSET ?"
+
+
+def test_action_records_queries(instrumentation, session, customers):
+    session.execute(select(User)).all()
+
+    with instrumentation.action("CustomerController.display_all_customers") as stats:
+        session.execute(select(Customer)).all()
+        session.execute(select(User)).all()
+
+    assert stats.queries == 2
+    assert stats.seconds > 0
+    assert len(stats.slowest_statements()) == 2
+    assert stats.n_plus_one() == {}
+    assert instrumentation.summary() == [{"action": "CustomerController.display_all_customers", "calls": 1,
+                                          "queries": 2, "seconds": stats.seconds, "max_queries": 2}]
+
+
+def test_nested_actions_count_in_the_outer_action(instrumentation, session, customers):
+    with instrumentation.action("UserController.database") as outer:
+        with instrumentation.action("CustomerController.display_all_customers") as inner:
+            session.execute(select(Customer)).all()
+        session.execute(select(User)).all()
+
+    assert (outer.queries, inner.queries) == (2, 1)
+    assert inner.parent is outer
+    assert {row["action"]: row["queries"] for row in instrumentation.summary()} == {
+        "UserController.database": 2, "CustomerController.display_all_customers": 1}
+
+
+def test_lazy_loads_are_flagged_as_n_plus_one(instrumentation, session, customers, caplog):
+    with caplog.at_level(logging.WARNING, logger="utils.query_stats"):
+        with instrumentation.action("CustomerController.display_all_customers") as stats:
+            for customer in session.execute(select(Customer)).scalars():
+                customer.sales_contact.full_name
+
+    assert list(stats.n_plus_one().values()) == [4]
+    assert "N+1 in CustomerController.display_all_customers: 4 x SELECT users." in caplog.text
+
+
+def test_n_plus_one_raises_in_test_mode(instrumentation, session, customers):
+    instrumentation.raise_n_plus_one = True
+
+    with pytest.raises(NPlusOneDetected):
+        with instrumentation.action("CustomerController.display_all_customers"):
+            for customer in session.execute(select(Customer)).scalars():
+                customer.sales_contact.full_name
+
+
+def test_paging_is_not_flagged_as_n_plus_one(instrumentation, session, customers):
+    instrumentation.raise_n_plus_one = True
+    paginator = KeysetPaginator(session.query(Customer), Customer.id, page_size=1)
+
+    with instrumentation.action("CustomerController.display_all_customers") as stats:
+        page = paginator.first()
+        while page.has_next:
+            page = paginator.next(page)
+            page.items[0].sales_contact.full_name
+
+    assert page.first_key == 4
+    assert stats.queries == 7
+    assert stats.n_plus_one() == {}
+
+
+def test_slow_queries_are_logged(instrumentation, session, caplog):
+    instrumentation.slow_ms = 0
+
+    with caplog.at_level(logging.WARNING, logger="utils.query_stats"):
+        with instrumentation.action("UserController.get_user"):
+            session.execute(select(User)).all()
+
+    assert "Slow query" in caplog.text
+    assert "UserController.get_user" in caplog.text
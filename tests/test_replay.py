@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from conftest import test_engine
+from input_provider import InputProvider, RecordingInput, ScriptEnded, ScriptedInput, current_input, load_script
+from models.models import Role, User
+from utils.passwords import password_hasher
+from utils.replay import ReplayController, load_test, replay, run_worker
+from views.menu_view import MenuView
+
+LOW_COST = {"TIME_COST": 1, "MEMORY_COST": 8, "PARALLELISM": 1}
+
+
+@pytest.fixture
+def scripted():
+    def set_answers(*answers):
+        tokens.append(current_input.set(ScriptedInput(answers)))
+    tokens = []
+    yield set_answers
+    for token in reversed(tokens):
+        current_input.reset(token)
+
+
+def test_validate_input_reads_the_script(validator, scripted):
+    scripted("invalid", "valid")
+
+    assert validator.validate_input("Nom: ", lambda value: value == "valid") == "valid"
+    with pytest.raises(ScriptEnded):
+        validator.validate_input("Nom: ", lambda value: True)
+
+
+def test_recording_leaves_passwords_out(tmp_path):
+    recorder = RecordingInput(ScriptedInput(["admin@ex.com", "adminpassword"]))
+    path = str(tmp_path / "session.json")
+
+    assert recorder.read("Email de connexion: ") == "admin@ex.com"
+    assert recorder.read("Mot de passe: ", secret=True) == "adminpassword"
+    recorder.save(path)
+
+    assert "adminpassword" not in open(path, encoding="utf-8").read()
+    with pytest.raises(ValueError):
+        load_script(path)
+    assert load_script(path, password="replayed") == ["admin@ex.com", "replayed"]
+
+
+def test_replay_times_each_menu_action(session):
+    role = Role(id=1, name="admin")
+    session.add(User(id=1, full_name="Admin User", email="admin@ex.com", role=role,
+                     password=password_hasher(LOW_COST).hash("adminpassword")))
+    session.commit()
+    controller = ReplayController()
+    controller.Session = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=test_engine)
+
+    # Login, display the customers from the database menu, log out and quit
+    timings = replay(["1", "admin@ex.com", "adminpassword", "9", "1", "10", "2"], controller)
+
+    assert set(timings) == {"UserController.auth_user", "UserController.start_session",
+                            "UserController.display_dashboard", "UserController.database",
+                            "CustomerController.display_all_customers", "UserController.logout"}
+    assert all(len(durations) == 1 for durations in timings.values())
+    assert timings["UserController.database"][0] >= timings["CustomerController.display_all_customers"][0]
+
+
+def test_input_providers_must_read():
+    with pytest.raises(TypeError):
+        InputProvider()
+
+
+def test_scripts_ending_before_quitting_are_failed_runs(mocker):
+    controller = mocker.MagicMock(timings={})
+    controller.login_menu.side_effect = lambda: MenuView.get_user_choice()
+    mocker.patch("utils.replay.ReplayController", return_value=controller)
+    mocker.patch("utils.replay.SharedConsole")
+
+    with pytest.raises(ScriptEnded):
+        replay([], controller)
+    assert run_worker([[]], runs=2) == ({}, 2)
+
+    controller.login_menu.side_effect = SystemExit
+    assert run_worker([[]], runs=2) == ({}, 0)
+
+
+def test_load_test_merges_the_workers(mocker):
+    mocker.patch("utils.replay.ProcessPoolExecutor", ThreadPoolExecutor)
+    mocker.patch("utils.replay.run_worker", return_value=({"UserController.auth_user": [0.01, 0.03]}, 1))
+
+    result = load_test([["1"]], workers=3, runs=2)
+
+    assert result["runs"] == 6
+    assert result["errors"] == 3
+    [action] = result["actions"]
+    assert action["calls"] == 6
+    assert action["p50_ms"] == pytest.approx(10)
+    assert action["p99_ms"] == pytest.approx(30)
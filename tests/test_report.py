@@ -0,0 +1,105 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, insert
+
+from conftest import test_engine
+from models.models import Contract, Customer, User
+from views.report_view import ReportView
+
+
+@pytest.fixture
+def contracts(session):
+    session.execute(insert(User), [
+        {"id": 1, "full_name": "Alice", "email": "alice@ex.com", "password": "hashed"},
+        {"id": 2, "full_name": "Bob", "email": "bob@ex.com", "password": "hashed"},
+    ])
+    session.execute(insert(Customer), [
+        {"id": 1, "full_name": "Acme", "email": "acme@ex.com", "phone": "1", "company_name": "Acme",
+         "sales_contact_id": 1},
+        {"id": 2, "full_name": "Globex", "email": "globex@ex.com", "phone": "2", "company_name": "Globex",
+         "sales_contact_id": 2},
+        {"id": 3, "full_name": "Initech", "email": "initech@ex.com", "phone": "3", "company_name": "Initech",
+         "sales_contact_id": 1},
+    ])
+    session.execute(insert(Contract), [
+        {"id": 1, "customer_id": 1, "amount_total": 0.1, "amount_due": 0.1, "is_signed": True,
+         "creation_date": date(2024, 1, 5)},
+        {"id": 2, "customer_id": 1, "amount_total": 0.2, "amount_due": 0.0, "is_signed": True,
+         "creation_date": date(2024, 1, 20)},
+        {"id": 3, "customer_id": 2, "amount_total": 1000.0, "amount_due": 400.0, "is_signed": False,
+         "creation_date": date(2024, 2, 1)},
+        {"id": 4, "customer_id": 3, "amount_total": 250.5, "amount_due": 250.5, "is_signed": True,
+         "creation_date": date(2024, 2, 14)},
+    ])
+    session.commit()
+
+
+def totals(rows):
+    return [(row.name, row.contracts, row.signed, row.unsigned, row.amount_total, row.revenue, row.amount_due)
+            for row in rows]
+
+
+def test_revenue_by_sales_contact(report_controller, contracts):
+    assert totals(report_controller.revenue_by_sales_contact()) == [
+        ("Alice", 3, 3, 0, Decimal("250.80"), Decimal("250.80"), Decimal("250.60")),
+        ("Bob", 1, 0, 1, Decimal("1000.00"), Decimal("0.00"), Decimal("400.00")),
+    ]
+
+
+def test_revenue_by_customer_largest_balance_first(report_controller, contracts):
+    rows = report_controller.revenue_by_customer()
+
+    assert [row.name for row in rows] == ["Globex", "Initech", "Acme"]
+    assert totals(rows)[2] == ("Acme", 2, 2, 0, Decimal("0.30"), Decimal("0.30"), Decimal("0.10"))
+    [row] = report_controller.revenue_by_customer(limit=1)
+    assert (row.name, row.total_rows) == ("Globex", 3)
+
+
+def test_report_view_shows_the_customers_left_out(report_controller, contracts, mocker):
+    print_table = mocker.patch.object(ReportView.console, "print")
+
+    ReportView().display_report_view("Chiffre d'affaires par client", report_controller.revenue_by_customer(limit=2))
+    ReportView().display_report_view("Chiffre d'affaires par client", report_controller.revenue_by_customer())
+
+    assert [call.args[0].caption for call in print_table.call_args_list] == ["Les 2 premiers sur 3", None]
+
+
+def test_revenue_by_month(report_controller, contracts):
+    assert [(row.name, row.contracts, row.amount_total) for row in report_controller.revenue_by_month()] == [
+        ("2024-01", 2, Decimal("0.30")), ("2024-02", 2, Decimal("1250.50")),
+    ]
+
+
+def test_contracts_by_status(report_controller, contracts):
+    assert [(row.name, row.contracts, row.amount_due) for row in report_controller.contracts_by_status()] == [
+        (False, 1, Decimal("400.00")), (True, 3, Decimal("250.60")),
+    ]
+
+
+def test_reports_aggregate_in_one_query(report_controller, contracts):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        report_controller.revenue_by_sales_contact()
+        report_controller.revenue_by_month()
+    finally:
+        event.remove(test_engine, "before_cursor_execute", before_cursor_execute)
+
+    assert len(statements) == 2
+    assert all("GROUP BY" in statement and "sum(CAST(" in statement for statement in statements)
+
+
+def test_display_reports(report_controller, contracts, login_required_mock, mocker):
+    mocker.patch.object(report_controller.menu_view, "select_choice", return_value=1)
+
+    report_controller.display_reports()
+
+    title, rows = report_controller.report_view.display_report_view.call_args.args
+    assert title == "Chiffre d'affaires par commercial"
+    assert [row.name for row in rows] == ["Alice", "Bob"]
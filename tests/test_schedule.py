@@ -0,0 +1,171 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from models.models import Event, Role, User
+from models.schedule import find_conflict
+from utils.intervals import IntervalIndex
+
+START = datetime(2024, 6, 1, 8)
+
+
+def hours(start, end):
+    return START + timedelta(hours=start), START + timedelta(hours=end)
+
+
+@pytest.fixture
+def support(session):
+    user = User(id=2, full_name="Support", email="support@ex.com", password="hashed", role=Role(id=2, name="support"))
+    session.add(user)
+    session.commit()
+    return user
+
+
+def add_event(session, event_id, start, end, support_id=None):
+    event_start_date, event_end_date = hours(start, end)
+    event = Event(id=event_id, event_name=f"Event {event_id}", event_start_date=event_start_date,
+                  event_end_date=event_end_date, support_contact_id=support_id)
+    session.add(event)
+    session.commit()
+    return event
+
+
+def test_interval_index_matches_brute_force():
+    generator = random.Random(7)
+    intervals = []
+    for key in range(300):
+        start = generator.randrange(1000)
+        intervals.append((start, start + generator.randrange(1, 30), key))
+    index = IntervalIndex(intervals[:150])
+    for start, end, key in intervals[150:]:
+        index.add(start, end, key)
+    for key in range(0, 300, 3):
+        index.remove(key)
+    remaining = [interval for interval in intervals if interval[2] % 3]
+
+    for _ in range(500):
+        start = generator.randrange(1000)
+        end = start + generator.randrange(1, 30)
+        found = index.overlapping(start, end)
+        overlaps = [key for low, high, key in remaining if low < end and high > start]
+        if overlaps:
+            assert found in overlaps
+        else:
+            assert found is None
+
+
+def test_touching_intervals_do_not_overlap():
+    index = IntervalIndex([(0, 10, "a"), (20, 30, "b")])
+
+    assert index.overlapping(10, 20) is None
+    assert index.overlapping(9, 11) == "a"
+    assert index.overlapping(25, 40) == "b"
+
+
+def test_find_conflict(session, support):
+    add_event(session, 1, 0, 4, support_id=2)
+    add_event(session, 2, 10, 12, support_id=2)
+
+    assert find_conflict(session, add_event(session, 3, 3, 5), 2) == 1
+    assert find_conflict(session, add_event(session, 4, 4, 10), 2) is None
+    assert find_conflict(session, add_event(session, 5, 0, 24), 2) in (1, 2)
+
+
+def test_find_conflict_scans_only_the_events_which_can_overlap(session, support, mocker):
+    for event_id in range(1, 200):
+        add_event(session, event_id, -24 * event_id, -24 * event_id + 2, support_id=2)
+    add_event(session, 200, -30, 20, support_id=2)
+    plans = []
+
+    def explain(statement):
+        compiled = statement.compile(session.get_bind())
+        parameters = tuple(compiled.params[key] for key in compiled.positiontup)
+        explained = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", parameters)
+        plans.extend(row[-1] for row in explained)
+        return original(statement)
+    original = session.scalar
+    mocker.patch.object(session, "scalar", side_effect=explain)
+
+    assert find_conflict(session, add_event(session, 201, 10, 12), 2) == 200
+    assert any("ix_events_support_contact_id_duration" in plan for plan in plans)
+    assert any("ix_events_support_contact_id_start_date (support_contact_id=? AND "
+               "event_start_date>? AND event_start_date<?)" in plan for plan in plans)
+
+
+def test_empty_events_overlap_nothing(session, support, mocker):
+    add_event(session, 1, 2, 2, support_id=2)
+    add_event(session, 2, 0, 4, support_id=2)
+
+    assert find_conflict(session, add_event(session, 3, 3, 3), 2) is None
+    assert find_conflict(session, add_event(session, 4, 1, 3), 2) == 2
+    assert find_conflict(session, add_event(session, 5, 5, 6), 2) is None
+
+    mocker.patch.object(session.get_bind().dialect, "name", "postgresql")
+    scalar = mocker.patch.object(session, "scalar", return_value=None)
+    assert find_conflict(session, add_event(session, 6, 3, 3), 2) is None
+    scalar.assert_not_called()
+
+
+def test_find_conflict_sees_writes_made_elsewhere(session, support):
+    add_event(session, 1, 0, 4)
+    second = add_event(session, 2, 2, 6)
+    assert find_conflict(session, second, 2) is None
+
+    # Bulk SQL, another process or the deletion of a user: no hook sees these writes
+    session.execute(Event.__table__.update().where(Event.__table__.c.id == 1).values(support_contact_id=2))
+    assert find_conflict(session, second, 2) == 1
+
+    session.execute(Event.__table__.update().where(Event.__table__.c.id == 1).values(support_contact_id=None))
+    assert find_conflict(session, second, 2) is None
+
+
+def test_update_event_rejects_overlapping_dates(event_controller, session, support, login_required_mock, mocker):
+    add_event(session, 1, 0, 4, support_id=2)
+    event = add_event(session, 2, 10, 12, support_id=2)
+    start, end = START.strftime("%d/%m/%Y"), (START + timedelta(days=1)).strftime("%d/%m/%Y")
+    mocker.patch.object(event_controller.validators, "validate_input",
+                        side_effect=[2, None, start, end, None, None, None])
+
+    assert event_controller.update_event(mocker.MagicMock()) is None
+
+    event_controller.event_view.support_already_booked.assert_called_once_with(2, 1)
+    assert session.get(Event, 2).event_start_date == hours(10, 12)[0]
+    assert event.event_end_date == hours(10, 12)[1]
+
+
+def test_update_event_handles_the_exclusion_constraint(event_controller, session, support, login_required_mock,
+                                                       mocker):
+    event = add_event(session, 1, 0, 4, support_id=2)
+    start, end = (START + timedelta(days=30)).strftime("%d/%m/%Y"), (START + timedelta(days=31)).strftime("%d/%m/%Y")
+    mocker.patch.object(event_controller.validators, "validate_input",
+                        side_effect=[1, None, start, end, None, None, None])
+    mocker.patch.object(session, "commit", side_effect=IntegrityError("UPDATE events", {}, Exception("ex_events")))
+
+    assert event_controller.update_event(mocker.MagicMock()) is None
+
+    event_controller.event_view.support_booked_meanwhile.assert_called_once_with(2)
+    assert event.event_start_date == hours(0, 4)[0]
+
+
+def test_add_support_rejects_overlaps(event_controller, session, support, login_required_mock, mocker):
+    add_event(session, 1, 0, 4, support_id=2)
+    event = add_event(session, 2, 3, 5)
+    mocker.patch.object(event_controller.validators, "validate_input", side_effect=[2, 2])
+
+    event_controller.add_support_to_event(mocker.MagicMock())
+
+    assert event.support_contact_id is None
+    event_controller.event_view.support_already_booked.assert_called_once_with(2, 1)
+
+
+def test_postgresql_conflicts_use_range_overlap(session, support, mocker):
+    event = add_event(session, 1, 0, 4)
+    mocker.patch.object(session.get_bind().dialect, "name", "postgresql")
+    scalar = mocker.patch.object(session, "scalar", return_value=None)
+
+    assert find_conflict(session, event, 2) is None
+    sql = str(scalar.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "tsrange(events.event_start_date, events.event_end_date) && tsrange(" in sql
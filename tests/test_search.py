@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from conftest import test_engine
+from models.models import Customer, Event
+from utils.migrations import upgrade
+from utils.search import SearchPaginator, search_statement, search_terms
+
+
+@pytest.fixture
+def search_index(migrations_cleanup):
+    """Apply the migrations, the search index included, to the test database."""
+    upgrade(test_engine)
+
+
+@pytest.fixture
+def customers(session):
+    session.execute(insert(Customer), [
+        {"id": 1, "full_name": "Jeanne Dupont", "email": "jeanne@acme.fr", "phone": "0600000001",
+         "company_name": "Acme"},
+        {"id": 2, "full_name": "Paul Martin", "email": "paul@dupont-traiteur.fr", "phone": "0600000002",
+         "company_name": "Dupont Traiteur"},
+        {"id": 3, "full_name": "Léa Garnier", "email": "lea@globex.fr", "phone": "0600000003",
+         "company_name": "Globex"},
+    ])
+    session.commit()
+
+
+def search(session, model, value):
+    return [row.id for row in session.scalars(search_statement(model, value, "sqlite"))]
+
+
+def test_search_terms_drop_operators():
+    assert search_terms('Dupont" OR *NEAR(') == ["dupont", "or", "near"]
+    assert search_terms("  ") == []
+
+
+def test_search_ranks_best_column_first(search_index, customers, session):
+    assert search(session, Customer, "dupont") == [1, 2]
+    assert search(session, Customer, "globex") == [3]
+
+
+def test_search_matches_prefixes_accents_and_emails(search_index, customers, session):
+    assert search(session, Customer, "gar") == [3]
+    assert search(session, Customer, "lea garnier") == [3]
+    assert search(session, Customer, "traiteur.fr") == [2]
+    assert search(session, Customer, "jeanne martin") == []
+    assert search(session, Customer, "") == []
+
+
+def test_index_follows_inserts_updates_and_deletes(search_index, customers, session):
+    customer = session.get(Customer, 3)
+    customer.company_name, customer.email = "Initech", "lea@initech.fr"
+    session.delete(session.get(Customer, 1))
+    session.add(Event(id=1, event_name="Séminaire", contract_id=1, location="Lyon", notes="Traiteur Dupont",
+                      event_start_date=datetime(2024, 5, 1), event_end_date=datetime(2024, 5, 2)))
+    session.commit()
+
+    assert search(session, Customer, "globex") == []
+    assert search(session, Customer, "initech") == [3]
+    assert search(session, Customer, "dupont") == [2]
+    assert search(session, Event, "seminaire lyon") == [1]
+    assert search(session, Event, "dupont") == [1]
+
+
+def test_search_pages(search_index, session):
+    session.execute(insert(Customer), [
+        {"id": i, "full_name": f"Client {i}", "email": f"client{i}@ex.com", "phone": f"06{i:08d}",
+         "company_name": "Acme"}
+        for i in range(1, 26)
+    ])
+    session.commit()
+    paginator = SearchPaginator(session, search_statement(Customer, "acme", "sqlite"), page_size=10)
+
+    page = paginator.first()
+    assert [customer.id for customer in page.items] == list(range(1, 11))
+    assert page.has_next and not page.has_previous
+
+    page = paginator.jump(3)
+    assert [customer.id for customer in page.items] == list(range(21, 26))
+    assert page.has_previous and not page.has_next
+
+    page = paginator.previous(page)
+    assert [customer.id for customer in page.items] == list(range(11, 21))
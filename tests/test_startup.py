@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Time from starting the app to the login prompt: importing the controllers and building MainController.
+# Measured at about 400 ms; the budget leaves room for slower machines, not for new eager imports.
+STARTUP_BUDGET_MS = 1000
+# Subsystems loaded on first use only, never before the login prompt
+LAZY_MODULES = {"sentry_sdk", "psycopg2", "asyncpg", "sqlalchemy.ext.asyncio"}
+
+STARTUP = (
+    "import time; started = time.perf_counter(); "
+    "import controllers.main_controller as main; main.MainController(); "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+
+def start_app():
+    """Starts the app up to the login prompt in a new interpreter, with -X importtime."""
+    root = Path(__file__).resolve().parent.parent
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(root), str(root / "utils")])}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", STARTUP], cwd=root, env=env,
+                            capture_output=True, text=True, check=True)
+    modules = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines()
+               if line.startswith("import time:")}
+    return float(result.stdout.strip().splitlines()[-1]), modules
+
+
+def test_startup_loads_heavy_subsystems_lazily():
+    _, modules = start_app()
+
+    assert LAZY_MODULES.isdisjoint(modules)
+
+
+def test_startup_budget():
+    # The fastest of a few runs, the others paying for a cold disk cache or a busy machine
+    startup_ms = min(start_app()[0] for _ in range(3))
+
+    assert startup_ms < STARTUP_BUDGET_MS
@@ -0,0 +1,181 @@
+import io
+import json
+
+import pytest
+
+import sentry_config
+from sentry_config import ErrorReporter, TracedConsole, record_span, sentry_exception_handler, span, trace
+
+
+@pytest.fixture
+def exported(tmp_path, mocker):
+    path = tmp_path / "traces.jsonl"
+    mocker.patch.object(sentry_config, "TRACES_SAMPLE_RATE", 1.0)
+    mocker.patch.object(sentry_config, "TRACES_EXPORT", str(path))
+
+    def read():
+        return [json.loads(line) for line in path.read_text().splitlines()]
+    return read
+
+
+def test_spans_outside_of_a_trace_cost_nothing():
+    with span("auth", "check") as current:
+        assert current is None
+
+
+def test_unsampled_actions_have_no_spans(mocker):
+    mocker.patch.object(sentry_config, "TRACES_SAMPLE_RATE", 0.0)
+
+    with trace("CustomerController.get_customer") as root:
+        with span("auth", "check") as current:
+            assert root is None
+            assert current is None
+
+
+def test_trace_exports_its_spans(exported):
+    @sentry_exception_handler
+    def get_customer():
+        with span("auth", "token_required"):
+            pass
+        record_span("db", "SELECT * FROM customers", 0.002)
+        TracedConsole(file=io.StringIO()).print("Client")
+
+    with trace("CustomerController.get_customer"):
+        get_customer()
+
+    spans = exported()
+    assert [(span["op"], span["description"]) for span in spans] == [
+        ("action", "CustomerController.get_customer"),
+        ("function", "test_trace_exports_its_spans.<locals>.get_customer"),
+        ("auth", "token_required"),
+        ("db", "SELECT * FROM customers"),
+        ("render", "console.print"),
+    ]
+    assert len({span["trace_id"] for span in spans}) == 1
+    assert spans[0]["parent_id"] is None
+    assert all(span["parent_id"] == spans[1]["span_id"] for span in spans[2:])
+    assert spans[3]["duration_ms"] == pytest.approx(2)
+    assert spans[0]["duration_ms"] >= spans[1]["duration_ms"]
+
+
+def test_nested_actions_are_spans_of_the_outer_trace(exported):
+    with trace("UserController.database"):
+        with trace("CustomerController.display_all_customers"):
+            record_span("db", "SELECT * FROM customers", 0.001)
+
+    spans = exported()
+    assert [(span["op"], span["description"]) for span in spans] == [
+        ("action", "UserController.database"),
+        ("action", "CustomerController.display_all_customers"),
+        ("db", "SELECT * FROM customers"),
+    ]
+    assert [span["parent_id"] for span in spans] == [None, spans[0]["span_id"], spans[1]["span_id"]]
+
+
+def test_trace_is_exported_when_the_action_fails(exported):
+    with pytest.raises(ValueError):
+        with trace("CustomerController.get_customer"):
+            raise ValueError("boom")
+
+    assert exported()[0]["op"] == "action"
+
+
+def test_sentry_is_loaded_on_first_use_with_a_dsn(mocker):
+    mocker.patch.object(sentry_config, "sentry_dsn", None)
+    assert sentry_config.get_sentry() is None
+
+    sentry_sdk = mocker.MagicMock()
+    mocker.patch.dict("sys.modules", {"sentry_sdk": sentry_sdk})
+    mocker.patch.object(sentry_config, "sentry_dsn", "https://key@sentry.example.com/1")
+    mocker.patch.object(sentry_config, "sentry_module", None)
+    mocker.patch.object(sentry_config, "ERRORS", ErrorReporter(dedup_seconds=0, burst=10))
+
+    @sentry_exception_handler
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        fail()
+    with pytest.raises(ValueError):
+        fail()
+    sentry_sdk.init.assert_called_once()
+    assert sentry_sdk.capture_exception.call_count == 2
+
+
+def raise_value_error(message):
+    raise ValueError(message)
+
+
+def test_nested_handlers_report_an_exception_once(mocker):
+    sentry = mocker.MagicMock()
+    mocker.patch.object(sentry_config, "sentry_dsn", "https://key@sentry.example/1")
+    mocker.patch.object(sentry_config, "get_sentry", return_value=sentry)
+    mocker.patch.object(sentry_config, "ERRORS", ErrorReporter(burst=10))
+
+    @sentry_exception_handler
+    def outer():
+        inner()
+
+    @sentry_exception_handler
+    def inner():
+        raise_value_error("boom")
+
+    with pytest.raises(ValueError) as raised:
+        outer()
+
+    sentry.capture_exception.assert_called_once_with(raised.value)
+    assert raised.value.__sentry_captured__
+
+
+def test_reporter_sends_an_exception_once():
+    reporter = ErrorReporter(burst=10)
+    error = ValueError("boom")
+
+    assert reporter.report(error) == "sent"
+    assert reporter.report(error) == "captured"
+
+
+def test_reporter_deduplicates_by_fingerprint(mocker):
+    sentry = mocker.MagicMock()
+    mocker.patch.object(sentry_config, "get_sentry", return_value=sentry)
+    reporter = ErrorReporter(dedup_seconds=60, burst=10)
+
+    outcomes = []
+    for message in ("a", "b", "c"):
+        try:
+            raise_value_error(message)
+        except ValueError as error:
+            outcomes.append(reporter.report(error))
+
+    assert outcomes == ["sent", "duplicate", "duplicate"]
+    assert sentry.capture_exception.call_count == 1
+    assert reporter.report(KeyError("other")) == "sent"
+
+
+def test_reporter_spools_past_the_rate_limit(tmp_path):
+    spool = tmp_path / "spool.jsonl"
+    reporter = ErrorReporter(dedup_seconds=0, rate=0, burst=2, spool=str(spool), spool_max_bytes=200)
+
+    outcomes = [reporter.report(ValueError(f"error {number}")) for number in range(6)]
+
+    assert outcomes[:2] == ["sent", "sent"]
+    assert "spooled" in outcomes[2:] and outcomes[-1] == "dropped"
+    lines = [json.loads(line) for line in spool.read_text().splitlines()]
+    assert lines[0]["message"] == "error 2"
+    assert lines[0]["type"] == "ValueError"
+
+
+def test_token_bucket_refills_at_the_rate():
+    reporter = ErrorReporter(rate=2, burst=1)
+    now = reporter.refilled
+
+    assert reporter.take_token(now)
+    assert not reporter.take_token(now + 0.1)
+    assert reporter.take_token(now + 0.6)
+
+
+def test_reporter_drops_what_it_cannot_spool(tmp_path):
+    reporter = ErrorReporter(rate=0, burst=0, spool=str(tmp_path / "missing" / "spool.jsonl"))
+
+    assert reporter.report(ValueError("boom")) == "dropped"
+    assert reporter.dropped == 1
@@ -1,5 +1,3 @@
-import pytest
-from argon2.exceptions import VerifyMismatchError
 from jwtoken import TokenManager
 
 
@@ -35,16 +33,17 @@ def test_auth_user_incorrect_password(user_controller, create_mock_user):
     hashed_password = user_controller.hash_password(password)
     mock_user = create_mock_user(email=email, password=hashed_password)
 
-    with pytest.raises(VerifyMismatchError):
-        user = user_controller.auth_user(mock_user.email, wrong_password)
-
-    user = None
-    try:
-        user = user_controller.auth_user(mock_user.email, wrong_password)
-    except VerifyMismatchError:
-        pass
+    user = user_controller.auth_user(mock_user.email, wrong_password)
 
     assert user is None
+    user_controller.user_view.incorrect_password.assert_called_once()
+
+
+def test_auth_user_invalid_hash(user_controller, create_mock_user):
+    mock_user = create_mock_user(password="not_an_argon2_hash")
+
+    assert user_controller.auth_user(mock_user.email, "secure_password") is None
+    user_controller.user_view.incorrect_password.assert_called_once()
 
 
 def test_create_user(user_controller, create_authenticated_user, login_required_mock, mocker):
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import patch
-from models.models import Role
+from models.models import Customer, Role
+from utils.validators import LookupCache
 from views.menu_view import MenuView
 
 
@@ -173,3 +174,40 @@ def test_transform_boolean(validator):
     assert validator.transform_boolean('non') is False
     assert validator.transform_boolean('yes') is True
     assert validator.transform_boolean('no') is False
+
+
+def test_lookup_cache_shares_validated_object(validator, session, event_controller, create_mock_event):
+    """Test that the controller reuses the event loaded by the validator"""
+    event = create_mock_event()
+    event_id = event.id
+    session.expunge_all()
+    event_controller.lookups = validator.lookups
+
+    with patch.object(session, 'get', wraps=session.get) as mock_get:
+        assert validator.validate_existing_event_id(str(event_id)) is True
+        fetched_event = event_controller.get_event(event_id)
+        mock_get.assert_called_once()
+
+    assert fetched_event.id == event_id
+
+
+def test_lookup_cache_invalidated_on_commit(validator, session, create_mock_customer):
+    """Test that committing the session empties the lookup cache"""
+    customer = create_mock_customer()
+    assert validator.lookups.get(Customer, customer.id) is customer
+    assert validator.lookups.entries
+
+    session.commit()
+    assert not validator.lookups.entries
+
+
+def test_lookup_cache_lru(session, create_mock_customer):
+    """Test that the lookup cache evicts the least recently used rows"""
+    first = create_mock_customer(email="first@example.com", phone="1111111111")
+    second = create_mock_customer(email="second@example.com", phone="2222222222")
+    lookups = LookupCache(session, maxsize=1)
+
+    lookups.get(Customer, first.id)
+    lookups.get(Customer, second.id)
+    assert list(lookups.entries) == [(Customer, second.id)]
+    assert lookups.get(Customer, "not an id") is None
@@ -0,0 +1,208 @@
+import argparse
+import heapq
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from config import SessionLocal
+from sqlalchemy import bindparam, create_engine, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.dashboard import UNASSIGNED_EVENTS, add_to_counters
+from models.models import Base, Event, Role, User
+from models.schedule import scheduled
+from utils.intervals import IntervalIndex
+from views.event_view import EventView
+
+SUPPORT_ROLE = "support"
+
+
+class Assignment(NamedTuple):
+    """An event assigned to a support user by the scheduler."""
+    event_id: int
+    event_name: str
+    event_start_date: datetime
+    event_end_date: datetime
+    support_id: int
+    support_name: str
+
+
+class AssignmentPlan:
+    """The assignments planned for the unassigned events of a date window."""
+
+    def __init__(self):
+        self.assignments: List[Assignment] = []
+        self.unassigned: List[int] = []
+        self.workloads: Dict[str, int] = {}
+
+
+def support_workloads(session: Session, start: datetime) -> Dict[int, Tuple[str, int]]:
+    """
+    Returns the name and number of events from the start date on of every support user.
+    """
+    workload = (select(Event.support_contact_id, func.count().label("events"))
+                .where(Event.event_start_date >= start)
+                .group_by(Event.support_contact_id)
+                .subquery())
+    statement = (select(User.id, User.full_name, func.coalesce(workload.c.events, 0))
+                 .join(Role, User.role_id == Role.id)
+                 .outerjoin(workload, workload.c.support_contact_id == User.id)
+                 .where(Role.name == SUPPORT_ROLE))
+    return {user_id: (name, events) for user_id, name, events in session.execute(statement)}
+
+
+def support_schedules(session: Session, support_ids: List[int], start: datetime,
+                      end: datetime) -> Dict[int, IntervalIndex]:
+    """
+    Returns the interval index of the events of each support user overlapping the window.
+    """
+    intervals = {support_id: [] for support_id in support_ids}
+    statement = scheduled(select(Event.support_contact_id, Event.event_start_date, Event.event_end_date, Event.id)
+                          .where(Event.support_contact_id.in_(support_ids),
+                                 Event.event_start_date < end, Event.event_end_date > start))
+    for support_id, event_start, event_end, event_id in session.execute(statement):
+        intervals[support_id].append((event_start, event_end, event_id))
+    return {support_id: IntervalIndex(items) for support_id, items in intervals.items()}
+
+
+def plan_assignments(session: Session, start: datetime, end: datetime) -> AssignmentPlan:
+    """
+    Plans the assignment of the unassigned events starting in [start, end), with valid dates,
+    to the support users.
+
+    Events are taken by start date, and each goes to the least loaded support user who
+    is free during the event: support users are kept in a heap by number of events, and
+    popped until one has no overlapping event. Nothing is written.
+
+    :param session: SQLAlchemy Session
+    :param start: The start of the window
+    :param end: The end of the window
+    :return: The planned assignments, and the IDs of the events no support user is free for
+    """
+    plan = AssignmentPlan()
+    supports = support_workloads(session, start)
+    events = session.execute(scheduled(select(Event.id, Event.event_name, Event.event_start_date,
+                                              Event.event_end_date))
+                             .where(Event.support_contact_id.is_(None),
+                                    Event.event_start_date >= start, Event.event_start_date < end)
+                             .order_by(Event.event_start_date, Event.id)).all()
+    if not supports:
+        plan.unassigned = [event.id for event in events]
+        return plan
+
+    last_end = max((event.event_end_date for event in events), default=end)
+    schedules = support_schedules(session, list(supports), start, max(end, last_end))
+    heap = [(load, support_id) for support_id, (_, load) in supports.items()]
+    heapq.heapify(heap)
+
+    for event in events:
+        busy = []
+        while heap:
+            load, support_id = heapq.heappop(heap)
+            if schedules[support_id].overlapping(event.event_start_date, event.event_end_date) is None:
+                schedules[support_id].add(event.event_start_date, event.event_end_date, event.id)
+                plan.assignments.append(Assignment(event.id, event.event_name, event.event_start_date,
+                                                   event.event_end_date, support_id, supports[support_id][0]))
+                heapq.heappush(heap, (load + 1, support_id))
+                break
+            busy.append((load, support_id))
+        else:
+            plan.unassigned.append(event.id)
+        for item in busy:
+            heapq.heappush(heap, item)
+
+    plan.workloads = {supports[support_id][0]: load for load, support_id in sorted(heap, key=lambda item: item[1])}
+    return plan
+
+
+def commit_assignments(session: Session, plan: AssignmentPlan) -> Optional[int]:
+    """
+    Writes the planned assignments in one transaction. Events assigned meanwhile are left alone.
+
+    The dashboard counters are updated as the controllers' hooks would. On PostgreSQL the
+    exclusion constraint rejects an assignment overlapping an event assigned meanwhile to the
+    same support user by another session: the transaction is then rolled back.
+
+    :return: The number of events assigned, None if rolled back
+    """
+    if not plan.assignments:
+        return 0
+    # One statement per event: the row count of an executemany is not reliable across drivers
+    statement = (update(Event.__table__)
+                 .where(Event.__table__.c.id == bindparam("event_id"),
+                        Event.__table__.c.support_contact_id.is_(None))
+                 .values(support_contact_id=bindparam("support_id"))
+                 .returning(Event.__table__.c.id))
+    assigned = 0
+    try:
+        for assignment in plan.assignments:
+            if session.execute(statement, {"event_id": assignment.event_id,
+                                           "support_id": assignment.support_id}).first() is not None:
+                assigned += 1
+        if assigned:
+            add_to_counters(session.connection(), {UNASSIGNED_EVENTS: -assigned})
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        return None
+    return assigned
+
+
+def benchmark(events: int = 10000, supports: int = 50) -> Dict[str, float]:
+    """
+    Plans and commits the assignment of unassigned events of a month on an in-memory SQLite database.
+
+    :return: The timings in seconds and the number of events assigned
+    """
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2024, 1, 1)
+    with Session(engine) as session:
+        session.add(Role(id=2, name=SUPPORT_ROLE))
+        session.execute(insert(User), [
+            {"id": i, "full_name": f"Support {i}", "email": f"support{i}@ex.com", "password": "hashed", "role_id": 2}
+            for i in range(1, supports + 1)
+        ])
+        session.execute(insert(Event), [
+            {"id": i, "event_name": f"Event {i}", "event_start_date": start + timedelta(minutes=4 * i),
+             "event_end_date": start + timedelta(minutes=4 * i, hours=3)}
+            for i in range(1, events + 1)
+        ])
+        session.commit()
+
+        began = time.perf_counter()
+        plan = plan_assignments(session, start, start + timedelta(days=31))
+        planned = time.perf_counter()
+        assigned = commit_assignments(session, plan)
+        committed = time.perf_counter()
+    engine.dispose()
+    return {"events": events, "assigned": assigned, "plan_seconds": planned - began,
+            "commit_seconds": committed - planned}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assigne les événements sans support aux membres du support.")
+    parser.add_argument("--from", dest="start", type=lambda value: datetime.strptime(value, "%d/%m/%Y"),
+                        help="Début de la période (jj/mm/aaaa)")
+    parser.add_argument("--to", dest="end", type=lambda value: datetime.strptime(value, "%d/%m/%Y"),
+                        help="Fin de la période, exclue (jj/mm/aaaa)")
+    parser.add_argument("--dry-run", action="store_true", help="Affiche les affectations sans les enregistrer")
+    parser.add_argument("--benchmark", type=int, metavar="EVENTS",
+                        help="Mesure le temps d'affectation de EVENTS événements sur une base SQLite en mémoire")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        EventView().display_assignment_benchmark(benchmark(args.benchmark))
+    elif not args.start or not args.end:
+        parser.error("--from et --to sont requis")
+    else:
+        with SessionLocal() as session:
+            plan = plan_assignments(session, args.start, args.end)
+            EventView().display_assignment_plan(plan)
+            if not args.dry_run:
+                assigned = commit_assignments(session, plan)
+                if assigned is None:
+                    EventView().assignments_booked_meanwhile()
+                else:
+                    EventView().assignments_saved(assigned)
@@ -0,0 +1,108 @@
+import argparse
+import csv
+import json
+import sys
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+from config import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.filters import CONTRACT_FILTERS, EVENT_FILTERS, apply_filter
+from models.models import Contract, Customer, Event
+
+YIELD_PER = 1000
+
+EXPORTS = {
+    "customers": (Customer, {}),
+    "contracts": (Contract, CONTRACT_FILTERS),
+    "events": (Event, EVENT_FILTERS),
+}
+
+EXPORT_FILTERS = {
+    "customers": (),
+    "contracts": ("unsigned", "unpaid", "signed"),
+    "events": ("unassigned", "upcoming", "past"),
+}
+
+
+def stream_rows(session: Session, name: str, filter_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Streams the rows of a table, optionally restricted by one of the menu filters.
+
+    The rows are read with a server-side cursor (yield_per), YIELD_PER at a time,
+    so only one batch is held in memory whatever the size of the table.
+
+    :param session: SQLAlchemy Session
+    :param name: The name of the export, one of EXPORTS keys
+    :param filter_name: The name of a filter of the model, such as 'unpaid' for contracts
+    :return: An iterator of rows as dictionaries keyed by column name
+    """
+    model, filters = EXPORTS[name]
+    statement = select(*model.__table__.columns).order_by(model.id)
+    if filter_name:
+        statement = apply_filter(statement, filters, filter_name)
+    result = session.execute(statement, execution_options={"yield_per": YIELD_PER})
+    for row in result.mappings():
+        yield dict(row)
+
+
+def json_default(value: Any) -> str:
+    """Serializes the dates of a row for JSON."""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+
+def write_rows(rows: Iterator[Dict[str, Any]], columns: list, output_format: str, output: TextIO) -> int:
+    """
+    Writes rows incrementally as CSV (with a header line) or JSONL.
+
+    :return: The number of rows written
+    """
+    count = 0
+    if output_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=columns)
+        writer.writeheader()
+        for count, row in enumerate(rows, start=1):
+            writer.writerow(row)
+    else:
+        for count, row in enumerate(rows, start=1):
+            output.write(json.dumps(row, default=json_default, ensure_ascii=False) + "\n")
+    return count
+
+
+def export(session: Session, name: str, output_format: str, output: TextIO, filter_name: Optional[str] = None) -> int:
+    """
+    Exports a table to CSV or JSONL.
+
+    :param session: SQLAlchemy Session
+    :param name: The name of the export, one of EXPORTS keys
+    :param output_format: 'csv' or 'jsonl'
+    :param output: The text stream the rows are written to
+    :param filter_name: The name of a filter of the model, such as 'unpaid' for contracts
+    :return: The number of rows exported
+    """
+    model, _ = EXPORTS[name]
+    columns = [column.name for column in model.__table__.columns]
+    return write_rows(stream_rows(session, name, filter_name), columns, output_format, output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporte les clients, contrats ou événements en CSV ou JSONL.")
+    parser.add_argument("name", choices=sorted(EXPORTS))
+    parser.add_argument("--format", dest="output_format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--filter", dest="filter_name",
+                        help="contrats: unsigned, unpaid, signed ; événements: unassigned, upcoming, past")
+    parser.add_argument("--output", help="Fichier de sortie (sortie standard par défaut)")
+    args = parser.parse_args()
+    if args.filter_name and args.filter_name not in EXPORT_FILTERS[args.name]:
+        parser.error(f"filtre '{args.filter_name}' invalide pour {args.name}")
+
+    with SessionLocal() as session:
+        if args.output:
+            with open(args.output, "w", newline="", encoding="utf-8") as file:
+                export(session, args.name, args.output_format, file, args.filter_name)
+        else:
+            export(session, args.name, args.output_format, sys.stdout, args.filter_name)
@@ -0,0 +1,208 @@
+import argparse
+import csv
+import io
+import json
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from config import SessionLocal
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from models.models import Customer
+from models.names import company_key, name_key
+from utils.validators import DataValidator
+from views.customer_view import CustomerView
+
+CHUNK_SIZE = 1000
+CUSTOMER_FIELDS = ("full_name", "email", "phone", "company_name")
+# The sizes of the columns: longer values would fail the INSERT or the COPY of the whole chunk
+MAX_LENGTHS = {field: Customer.__table__.c[field].type.length for field in CUSTOMER_FIELDS}
+
+
+class ImportReport:
+    """Outcome of a bulk import: the number of rows inserted and the rejected rows with their errors."""
+
+    def __init__(self):
+        self.inserted = 0
+        self.rejected: List[Tuple[int, List[str]]] = []
+
+    def reject(self, line: int, errors: List[str]) -> None:
+        """
+        Records a rejected row.
+
+        :param line: The line number of the row in the file
+        :param errors: The reasons the row was rejected
+        """
+        self.rejected.append((line, errors))
+
+
+def read_rows(path: str) -> Iterator[Tuple[int, Dict[str, Any], List[str]]]:
+    """
+    Reads the rows of a CSV (with a header line) or JSONL file.
+
+    A JSONL line which is not a JSON object is returned as an empty row with its error,
+    so it is rejected like an invalid row instead of stopping the import.
+
+    :param path: The path of the file
+    :return: An iterator of (line number, row, errors) triples
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if Path(path).suffix.lower() == ".jsonl":
+            for line, text in enumerate(file, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    row = json.loads(text)
+                except json.JSONDecodeError as e:
+                    yield line, {}, [f"JSON non valide: {e.msg}."]
+                    continue
+                if isinstance(row, dict):
+                    yield line, row, []
+                else:
+                    yield line, {}, ["La ligne n'est pas un objet JSON."]
+        else:
+            for line, row in enumerate(csv.DictReader(file), start=2):
+                yield line, row, []
+
+
+class CustomerImporter:
+    """
+    Imports customers in bulk for a sales contact.
+
+    Rows are processed by chunks: each row is checked with the DataValidator rules and
+    the sizes of the columns (all the errors of a row are collected), the uniqueness of the emails and phones
+    of a chunk is checked with one query per column, and the valid rows are inserted
+    with a multi-row INSERT, or with COPY on PostgreSQL. The whole import is a single
+    transaction.
+    """
+
+    rules = {
+        "full_name": DataValidator.validate_str,
+        "email": DataValidator.validate_email,
+        "phone": DataValidator.validate_phone,
+        "company_name": DataValidator.validate_str,
+    }
+
+    def __init__(self, session: Session, sales_contact_id: int, chunk_size: int = CHUNK_SIZE):
+        """
+        Initializes the importer.
+
+        :param session: SQLAlchemy Session
+        :param sales_contact_id: The ID of the sales contact the customers are assigned to
+        :param chunk_size: The number of rows validated and inserted at once
+        """
+        self.session = session
+        self.sales_contact_id = sales_contact_id
+        self.chunk_size = chunk_size
+        self.seen_emails = set()
+        self.seen_phones = set()
+
+    def import_file(self, path: str) -> ImportReport:
+        """
+        Imports the customers of a CSV or JSONL file.
+
+        :param path: The path of the file
+        :return: The report of the import
+        """
+        report = ImportReport()
+        rows = read_rows(path)
+        try:
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                valid_rows = self.validate_chunk(chunk, report)
+                if valid_rows:
+                    self.insert_rows(valid_rows)
+                    report.inserted += len(valid_rows)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return report
+
+    def validate_chunk(self, chunk: List[Tuple[int, Dict[str, Any], List[str]]],
+                       report: ImportReport) -> List[Dict[str, Any]]:
+        """
+        Validates a chunk of rows and returns the rows to insert.
+
+        :param chunk: The (line number, row, read errors) triples of the chunk
+        :param report: The report the rejected rows are added to
+        :return: The valid rows, ready to be inserted
+        """
+        rows = [(line, {field: str(row.get(field) or "").strip() for field in CUSTOMER_FIELDS}, read_errors)
+                for line, row, read_errors in chunk]
+        existing_emails = self.existing_values(Customer.email, [row["email"] for _, row, _ in rows])
+        existing_phones = self.existing_values(Customer.phone, [row["phone"] for _, row, _ in rows])
+
+        today, now = date.today(), datetime.now()
+        valid_rows = []
+        for line, row, read_errors in rows:
+            if read_errors:
+                report.reject(line, read_errors)
+                continue
+            errors = DataValidator.validate_row(row, self.rules)
+            errors.extend(f"{field}: {MAX_LENGTHS[field]} caractères au plus." for field in CUSTOMER_FIELDS
+                          if len(row[field]) > MAX_LENGTHS[field])
+            if row["email"] in existing_emails or row["email"] in self.seen_emails:
+                errors.append(f"email: {row['email']} existe déjà.")
+            if row["phone"] in existing_phones or row["phone"] in self.seen_phones:
+                errors.append(f"phone: {row['phone']} existe déjà.")
+            if errors:
+                report.reject(line, errors)
+                continue
+            self.seen_emails.add(row["email"])
+            self.seen_phones.add(row["phone"])
+            valid_rows.append(dict(row, name_key=name_key(row["full_name"]),
+                                   company_key=company_key(row["company_name"]), creation_date=today,
+                                   last_update=now, sales_contact_id=self.sales_contact_id))
+        return valid_rows
+
+    def existing_values(self, column, values: List[str]) -> set:
+        """
+        Returns the values of a unique column that already exist in the database, in one query.
+        """
+        values = [value for value in set(values) if value]
+        if not values:
+            return set()
+        return set(self.session.execute(select(column).where(column.in_(values))).scalars())
+
+    def insert_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Inserts validated rows, with COPY on PostgreSQL and a multi-row INSERT elsewhere.
+        """
+        if self.session.get_bind().dialect.driver == "psycopg2":
+            self.copy_rows(rows)
+        else:
+            self.session.execute(insert(Customer), rows)
+
+    def copy_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Streams rows to PostgreSQL with COPY FROM STDIN, inside the session transaction.
+        """
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row[column] for column in columns])
+        buffer.seek(0)
+
+        dbapi_connection = self.session.connection().connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {Customer.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importe des clients depuis un fichier CSV ou JSONL.")
+    parser.add_argument("path", help="Fichier .csv (avec en-tête) ou .jsonl")
+    parser.add_argument("--sales-contact-id", type=int, required=True, help="ID du commercial des clients")
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        import_report = CustomerImporter(session, args.sales_contact_id).import_file(args.path)
+    CustomerView().display_import_report(import_report)
@@ -1,8 +1,18 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, Optional
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
 load_dotenv()
 
@@ -18,7 +28,324 @@ DB = {
     "PASSWORD": os.getenv("DB_PASSWORD"),
 }
 
+DB_POOL = {
+    "SIZE": int(os.getenv("DB_POOL_SIZE", "5")),
+    "MAX_OVERFLOW": int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+    "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "RECYCLE": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "PRE_PING": os.getenv("DB_POOL_PRE_PING", "true").lower() in {"1", "true", "yes"},
+    "STATEMENT_TIMEOUT": int(os.getenv("DB_STATEMENT_TIMEOUT", "0")),
+}
+
+# Argon2 cost of the password hashes, chosen for the hardware with python3 -m passwords --calibrate.
+# The defaults are the ones of argon2-cffi.
+ARGON2 = {
+    "TIME_COST": int(os.getenv("ARGON2_TIME_COST", "3")),
+    "MEMORY_COST": int(os.getenv("ARGON2_MEMORY_COST", "65536")),  # KiB
+    "PARALLELISM": int(os.getenv("ARGON2_PARALLELISM", "4")),
+}
+
+# Threads hashing and verifying passwords, and hashes allowed to wait for one of them
+PASSWORD_POOL = {
+    "WORKERS": int(os.getenv("PASSWORD_WORKERS", str(os.cpu_count() or 1))),
+    "QUEUE_LIMIT": int(os.getenv("PASSWORD_QUEUE_LIMIT", "32")),
+}
+
+# Sentry error reporting, and tracing of a share of the menu actions, see utils.sentry_config.
+# The spans are written to TRACES_EXPORT ("stdout" or a JSON lines file) if set.
+# An exception is sent once per SENTRY_DEDUP_SECONDS for the same place, and at most
+# SENTRY_RATE per second after a burst of SENTRY_BURST: the others go to SENTRY_SPOOL if set.
+SENTRY = {
+    "DSN": os.getenv("SENTRY_DSN"),
+    "TRACES_SAMPLE_RATE": float(os.getenv("TRACES_SAMPLE_RATE", "0")),
+    "TRACES_EXPORT": os.getenv("TRACES_EXPORT"),
+    "DEDUP_SECONDS": float(os.getenv("SENTRY_DEDUP_SECONDS", "60")),
+    "RATE": float(os.getenv("SENTRY_RATE", "1")),
+    "BURST": int(os.getenv("SENTRY_BURST", "10")),
+    "SPOOL": os.getenv("SENTRY_SPOOL"),
+    "SPOOL_MAX_BYTES": int(os.getenv("SENTRY_SPOOL_MAX_BYTES", str(10 * 1024 * 1024))),
+}
+
+# Database cost of the menu actions, see utils.query_stats
+QUERY_STATS = {
+    "SUMMARY": os.getenv("QUERY_STATS", "false").lower() in {"1", "true", "yes"},
+    "SLOW_MS": float(os.getenv("QUERY_SLOW_MS", "200")),
+    "N_PLUS_ONE": int(os.getenv("QUERY_N_PLUS_ONE", "10")),
+    "RAISE": os.getenv("QUERY_N_PLUS_ONE_RAISE", "false").lower() in {"1", "true", "yes"},
+}
+
+# Full recount of the dashboard counters, see models.dashboard (0 disables it)
+DASHBOARD = {
+    "RECONCILE_MINUTES": float(os.getenv("DASHBOARD_RECONCILE_MINUTES", "60")),
+}
+
 DATABASE_URL = f"{DB['ENGINE']}://{DB['USER']}:{DB['PASSWORD']}@{DB['HOST']}:{DB['PORT']}/{DB['NAME']}"
+# Optional read replica (full URL) serving the read-only menus
+DATABASE_REPLICA_URL = os.getenv("DB_REPLICA_URL")
+
+
+class PoolStats:
+    """Counts the connection checkouts of a pool and the time spent waiting for a free connection."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.connects = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        """Records the time a checkout waited for a connection."""
+        with self.lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def on_connect(self, *args: Any) -> None:
+        with self.lock:
+            self.connects += 1
+
+    def on_checkout(self, *args: Any) -> None:
+        with self.lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self, *args: Any) -> None:
+        with self.lock:
+            self.checked_out -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the counters, with the average and maximum wait in milliseconds."""
+        with self.lock:
+            return {
+                "checkouts": self.checkouts,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "connects": self.connects,
+                "avg_wait_ms": self.wait_total / self.waits * 1000 if self.waits else 0.0,
+                "max_wait_ms": self.wait_max * 1000,
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool measuring how long each checkout waits for a connection to be free."""
+
+    stats: Optional[PoolStats] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def pool_options(url: URL) -> Dict[str, Any]:
+    """
+    Returns the create_engine pool arguments of the DB_POOL_* keys, none for in-memory SQLite databases
+    which keep their default single connection pool.
+    """
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": DB_POOL["SIZE"],
+        "max_overflow": DB_POOL["MAX_OVERFLOW"],
+        "pool_timeout": DB_POOL["TIMEOUT"],
+        "pool_recycle": DB_POOL["RECYCLE"],
+        "pool_pre_ping": DB_POOL["PRE_PING"],
+    }
+
+
+def create_configured_engine(url: str = DATABASE_URL, **kwargs: Any) -> Engine:
+    """
+    Creates an engine with the pool settings of the DB_POOL_* keys and pool statistics.
+
+    The pool statistics are available with get_pool_stats(engine).
+
+    :param url: The database URL
+    :param kwargs: Extra create_engine arguments, overriding the configured ones
+    :return: The engine
+    """
+    url = make_url(url)
+    options = pool_options(url)
+    if options:
+        options["poolclass"] = TimedQueuePool
+    if url.get_backend_name() == "postgresql" and DB_POOL["STATEMENT_TIMEOUT"]:
+        options["connect_args"] = {"options": f"-c statement_timeout={DB_POOL['STATEMENT_TIMEOUT']}"}
+    options.update(kwargs)
+
+    engine = create_engine(url, **options)
+    stats = PoolStats()
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.stats = stats
+    event.listen(engine, "connect", stats.on_connect)
+    event.listen(engine, "checkout", stats.on_checkout)
+    event.listen(engine, "checkin", stats.on_checkin)
+    engine.pool_stats = stats
+    return engine
+
+
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def async_database_url(url: str = DATABASE_URL) -> URL:
+    """
+    Returns the database URL with the asyncio driver of its backend (asyncpg, aiosqlite).
+    """
+    url = make_url(url)
+    return url.set(drivername=f"{url.get_backend_name()}+{ASYNC_DRIVERS[url.get_backend_name()]}")
+
+
+def create_async_configured_engine(url: str = DATABASE_URL, **kwargs: Any) -> "AsyncEngine":
+    """
+    Creates an asyncio engine for the database, with the pool settings of the DB_POOL_* keys.
+
+    :param url: The database URL, its driver is replaced by the asyncio driver of the backend
+    :param kwargs: Extra create_async_engine arguments, overriding the configured ones
+    :return: The asyncio engine
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    url = async_database_url(url)
+    options = pool_options(url)
+    if options:
+        options["poolclass"] = AsyncAdaptedQueuePool
+    if url.get_backend_name() == "postgresql" and DB_POOL["STATEMENT_TIMEOUT"]:
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_POOL["STATEMENT_TIMEOUT"])}}
+    options.update(kwargs)
+    return create_async_engine(url, **options)
+
+
+def get_pool_stats(engine: Engine) -> Dict[str, Any]:
+    """
+    Returns the checkout and wait statistics of an engine's pool, to size it for concurrent users.
+    """
+    stats = engine.pool_stats.snapshot()
+    stats["status"] = engine.pool.status()
+    return stats
+
+
+class RoutingSession(Session):
+    """
+    Session sending the reads of read-only methods to a replica.
+
+    SELECTs run while session.info["read_only"] is set (see the read_only decorator)
+    go to the replica engine; everything else goes to the primary. Once the session
+    has written anything, all its reads go to the primary too, so an action always
+    reads its own writes.
+    """
+
+    def __init__(self, *args: Any, replica: Optional[Engine] = None, **kwargs: Any):
+        """
+        :param replica: The engine of the read replica, None to send everything to the primary
+        """
+        if not args and kwargs.get("bind") is None:
+            kwargs["bind"] = get_engine()
+            replica = get_replica_engine()
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (self.replica is not None and self.info.get("read_only") and not self.info.get("wrote")
+                and not self._flushing and clause is not None and clause.is_select):
+            return self.replica
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def record_flush(session: Session, flush_context: Any) -> None:
+    """Routes the following reads of the session to the primary once it has flushed."""
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def record_write(orm_execute_state: Any) -> None:
+    """Routes the following reads of the session to the primary once it has run a write statement."""
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+
+def read_only(func: Callable) -> Callable:
+    """
+    Decorator for the controller methods which only read: their queries may be served
+    by the read replica. The controller must have a session attribute.
+    """
+    @wraps(func)
+    def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        previous = self.session.info.get("read_only", False)
+        self.session.info["read_only"] = True
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self.session.info["read_only"] = previous
+    return wrapper
+
+
+# The engines of the database and of its replica, created on first use: importing the
+# application does not load the database driver.
+ENGINES: Dict[str, Optional[Engine]] = {}
+engines_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """Returns the engine of the database, created on first use."""
+    with engines_lock:
+        if "primary" not in ENGINES:
+            ENGINES["primary"] = create_configured_engine()
+        return ENGINES["primary"]
+
+
+def get_replica_engine() -> Optional[Engine]:
+    """Returns the engine of the read replica, created on first use, None without DB_REPLICA_URL."""
+    with engines_lock:
+        if "replica" not in ENGINES:
+            ENGINES["replica"] = create_configured_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+        return ENGINES["replica"]
+
+
+def __getattr__(name: str) -> Any:
+    """Returns config.engine and config.replica_engine, created on first access."""
+    if name == "engine":
+        return get_engine()
+    if name == "replica_engine":
+        return get_replica_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Sessions live for one menu action only, so committed objects can stay loaded:
+# no expiry means no SELECT to reload them after each commit.
+# Without a bind, they are bound to the configured engines when first created.
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, expire_on_commit=False)
+
+
+@contextmanager
+def unit_of_work(session_factory: sessionmaker = SessionLocal) -> Iterator[Session]:
+    """
+    Provides a short-lived session for one action: committed when the action
+    succeeds, rolled back when it raises, and closed in both cases.
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    :param session_factory: The sessionmaker the session is created with
+    """
+    session = session_factory()
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.close()
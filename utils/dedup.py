@@ -0,0 +1,222 @@
+import argparse
+import random
+import zlib
+from collections import defaultdict
+from itertools import combinations, zip_longest
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from config import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.models import Customer
+from models.names import company_key, name_key, normalize
+from views.customer_view import CustomerView
+
+# Similarity (Jaccard index of the 3-grams) from which two customers are likely duplicates
+THRESHOLD = 0.6
+NGRAM = 3
+# MinHash signature of 32 values, split in 8 bands of 4 for the LSH: pairs above
+# the threshold share a band with a probability above 99%.
+NUM_PERM = 32
+BANDS = 8
+# Blocking: only the customers whose normalized company or full name starts with the
+# same characters are compared, BLOCK_SIZE of them at most with a new customer
+BLOCK_PREFIX = 4
+BLOCK_SIZE = 200
+YIELD_PER = 1000
+
+# The hash functions of the signature: the 32-bit hash of a 3-gram XOR a random mask
+_random = random.Random(42)
+MASKS = [_random.getrandbits(32) for _ in range(NUM_PERM)]
+
+
+class CustomerRecord(NamedTuple):
+    """The columns of a customer compared by the duplicate detection."""
+    id: int
+    full_name: str
+    company_name: str
+    email: str
+    sales_contact_id: Optional[int]
+
+
+def shingles(full_name: Optional[str], company_name: Optional[str]) -> Set[str]:
+    """
+    Returns the character 3-grams of the normalized company and full name of a customer.
+    """
+    value = f" {normalize(company_name)} | {normalize(full_name)} "
+    return {value[i:i + NGRAM] for i in range(len(value) - NGRAM + 1)}
+
+
+def jaccard(first: Set[str], second: Set[str]) -> float:
+    """
+    Returns the Jaccard index of two sets of 3-grams, from 0 (nothing in common) to 1 (identical).
+    """
+    if not first or not second:
+        return 0.0
+    common = len(first & second)
+    return common / (len(first) + len(second) - common)
+
+
+def minhash(grams: Set[str]) -> Tuple[int, ...]:
+    """
+    Returns the MinHash signature of a set of 3-grams: the probability that two signatures
+    agree on a value is the Jaccard index of the sets.
+    """
+    hashes = [zlib.crc32(gram.encode()) for gram in grams]
+    return tuple(min(map(mask.__xor__, hashes)) for mask in MASKS)
+
+
+def candidate_pairs(signatures: List[Tuple[int, ...]]) -> Set[Tuple[int, int]]:
+    """
+    Returns the pairs of indexes whose signatures are identical on at least one band (LSH),
+    without comparing every pair of signatures.
+    """
+    rows = NUM_PERM // BANDS
+    pairs = set()
+    for band in range(BANDS):
+        buckets = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            buckets[signature[band * rows:(band + 1) * rows]].append(index)
+        for bucket in buckets.values():
+            pairs.update(combinations(bucket, 2))
+    return pairs
+
+
+def blocks(records: List[CustomerRecord]) -> List[List[int]]:
+    """
+    Returns the indexes of the records sharing a blocking key: the first characters of
+    their normalized company or full name, whatever their sales contact.
+    """
+    keyed = defaultdict(list)
+    for index, record in enumerate(records):
+        for kind, key in (("company", company_key(record.company_name)), ("name", name_key(record.full_name))):
+            if key:
+                keyed[kind, key[:BLOCK_PREFIX]].append(index)
+    return [block for block in keyed.values() if len(block) > 1]
+
+
+def clusters(records: List[CustomerRecord], threshold: float = THRESHOLD) -> List[List[CustomerRecord]]:
+    """
+    Groups the records which are likely duplicates of each other.
+
+    The records are compared within their blocks only, and within a block through the
+    LSH. The candidate pairs are checked with their exact similarity, and the pairs above
+    the threshold are merged into clusters (union-find).
+
+    :return: The clusters of at least two records, ordered by their first ID
+    """
+    grams = [shingles(record.full_name, record.company_name) for record in records]
+    signatures = [minhash(gram) for gram in grams]
+    parents = list(range(len(records)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    pairs = set()
+    for block in blocks(records):
+        pairs.update((block[first], block[second])
+                     for first, second in candidate_pairs([signatures[index] for index in block]))
+    for first, second in pairs:
+        if jaccard(grams[first], grams[second]) >= threshold:
+            parents[find(first)] = find(second)
+
+    groups = defaultdict(list)
+    for index, record in enumerate(records):
+        groups[find(index)].append(record)
+    return sorted((sorted(group) for group in groups.values() if len(group) > 1), key=lambda group: group[0].id)
+
+
+def stream_records(session: Session) -> Iterator[CustomerRecord]:
+    """
+    Streams the customers, without loading them as ORM objects.
+    """
+    statement = (select(Customer.id, Customer.full_name, Customer.company_name, Customer.email,
+                        Customer.sales_contact_id)
+                 .order_by(Customer.id)
+                 .execution_options(yield_per=YIELD_PER))
+    for row in session.execute(statement):
+        yield CustomerRecord(*row)
+
+
+def find_duplicates(session: Session,
+                    threshold: float = THRESHOLD) -> Dict[Optional[int], List[List[CustomerRecord]]]:
+    """
+    Finds the clusters of likely duplicate customers, reported per sales contact.
+
+    Customers are compared whatever their sales contacts, only within their blocks
+    (normalized name prefixes) and within them through MinHash/LSH, so the cost grows
+    near-linearly with the number of customers. A cluster is reported to each of the
+    sales contacts of its customers.
+
+    :param session: SQLAlchemy Session
+    :param threshold: The similarity from which two customers are likely duplicates
+    :return: The clusters by sales contact ID, ordered by their first ID, for the sales contacts having any
+    """
+    result = defaultdict(list)
+    for cluster in clusters(list(stream_records(session)), threshold):
+        for sales_contact_id in dict.fromkeys(record.sales_contact_id for record in cluster):
+            result[sales_contact_id].append(cluster)
+    return dict(sorted(result.items(), key=lambda item: (item[0] is None, item[0] or 0)))
+
+
+def prefix_range(column, key: str):
+    """
+    Returns the criterion of a normalized key column starting with the first characters
+    of a key, served by the index of the column (the keys are in byte order).
+    """
+    prefix = key[:BLOCK_PREFIX]
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return (column >= prefix) & (column < upper)
+
+
+def nearest_in_block(session: Session, column, key: str) -> List[Customer]:
+    """
+    Returns the BLOCK_SIZE customers of the block of a key whose keys are the nearest to
+    it in key order: the exact matches first, then alternately the following and the
+    preceding keys. Two index range scans starting at the key.
+    """
+    block = prefix_range(column, key)
+    following = list(session.scalars(select(Customer).where(block, column >= key)
+                                     .order_by(column, Customer.id).limit(BLOCK_SIZE)))
+    preceding = list(session.scalars(select(Customer).where(block, column < key)
+                                     .order_by(column.desc(), Customer.id).limit(BLOCK_SIZE)))
+    exact = [customer for customer in following if getattr(customer, column.key) == key]
+    nearest = exact + [customer for pair in zip_longest(following[len(exact):], preceding)
+                       for customer in pair if customer is not None]
+    return nearest[:BLOCK_SIZE]
+
+
+def likely_duplicates(session: Session, full_name: str, company_name: str,
+                      threshold: float = THRESHOLD) -> List[Tuple[float, Customer]]:
+    """
+    Finds the existing customers a new customer is likely a duplicate of.
+
+    Only the customers of the blocks of the new one's normalized company and full name
+    are compared, at most BLOCK_SIZE of each ranked by nearness of their key, so the
+    check takes milliseconds whatever the size of the blocks.
+
+    :return: The (similarity, customer) pairs above the threshold, the most similar first
+    """
+    candidates = {}
+    for column, key in ((Customer.company_key, company_key(company_name)), (Customer.name_key, name_key(full_name))):
+        if key:
+            for customer in nearest_in_block(session, column, key):
+                candidates[customer.id] = customer
+    grams = shingles(full_name, company_name)
+    scored = [(jaccard(grams, shingles(customer.full_name, customer.company_name)), customer)
+              for customer in candidates.values()]
+    return sorted((pair for pair in scored if pair[0] >= threshold), key=lambda pair: (-pair[0], pair[1].id))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Détecte les clients probablement en double, par commercial.")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"Similarité minimale entre deux clients, de 0 à 1 ({THRESHOLD} par défaut)")
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        CustomerView().display_duplicate_clusters(find_duplicates(session, args.threshold))
@@ -1,8 +1,9 @@
 import importlib
 from getpass import getpass
 
-from argon2 import PasswordHasher
-from config import Base, SessionLocal, engine
+from config import Base, SessionLocal, get_engine
+from migrations import upgrade
+from passwords import password_hasher
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from validators import DataValidator
@@ -17,8 +18,11 @@ importlib.reload(views.user_view)
 def init_db() -> None:
     """Creates the database tables and handles any SQLAlchemy errors."""
     try:
+        engine = get_engine()
         Base.metadata.create_all(bind=engine)
         UserView.table_created_successfull()
+        for version in upgrade(engine):
+            UserView.migration_applied(version)
     except SQLAlchemyError as e:
         UserView.table_creation_error(e)
 
@@ -40,7 +44,7 @@ def create_roles(session: Session) -> None:
 
 def create_admin_user(session: Session) -> str:
     """Creates a default admin user in the database and returns the admin's email."""
-    ph = PasswordHasher()
+    ph = password_hasher()
     try:
         existing_user = session.query(User).filter(User.email == "admin@ex.com").first()
 
@@ -75,7 +79,7 @@ def prompt_change_password(session: Session, email: str) -> None:
     try:
         # Validate the new password
         DataValidator.validate_password(new_password)
-        ph = PasswordHasher()
+        ph = password_hasher()
         hashed_password = ph.hash(new_password)
         user.password = hashed_password
         session.commit()
@@ -0,0 +1,86 @@
+"""
+Where the answers typed by the user come from.
+
+The views and the validators read them through read_input(), from the provider of the
+current context: the terminal by default, a script to run the menus headlessly (see
+utils.replay), or the terminal recorded as a script. Passwords are read without echo
+and never written to the scripts: they are recorded as null and filled in on replay.
+"""
+import json
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from getpass import getpass
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class InputProvider(ABC):
+    """Source of the answers to the prompts of the menus."""
+
+    @abstractmethod
+    def read(self, prompt: str, secret: bool = False) -> str:
+        """Returns the answer to a prompt, read without echo if it is secret (a password)."""
+
+
+class TerminalInput(InputProvider):
+    """Answers typed in the terminal."""
+
+    def read(self, prompt: str, secret: bool = False) -> str:
+        return getpass(prompt) if secret else input(prompt)
+
+
+class ScriptEnded(EOFError):
+    """Exception raised when a script has no answer left, as input() at the end of stdin."""
+    pass
+
+
+class ScriptedInput(InputProvider):
+    """Answers taken in order from a script."""
+
+    def __init__(self, answers: Iterable[str]):
+        self.answers = iter(answers)
+
+    def read(self, prompt: str, secret: bool = False) -> str:
+        try:
+            return next(self.answers)
+        except StopIteration:
+            raise ScriptEnded(f"No answer left in the script for {prompt!r}") from None
+
+
+class RecordingInput(InputProvider):
+    """Answers read from another provider, the terminal by default, and recorded as a script."""
+
+    def __init__(self, provider: Optional[InputProvider] = None):
+        self.provider = provider or TerminalInput()
+        self.entries: List[Dict[str, Any]] = []
+
+    def read(self, prompt: str, secret: bool = False) -> str:
+        value = self.provider.read(prompt, secret)
+        self.entries.append({"prompt": prompt, "secret": secret, "value": None if secret else value})
+        return value
+
+    def save(self, path: str) -> None:
+        """Writes the recorded answers to a JSON script."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file, ensure_ascii=False, indent=1)
+
+
+def load_script(path: str, password: Optional[str] = None) -> List[str]:
+    """
+    Returns the answers of a JSON script, with the password for the secret ones.
+
+    :raises ValueError: When the script has passwords and none is given
+    """
+    with open(path, encoding="utf-8") as file:
+        entries = json.load(file)
+    if password is None and any(entry["secret"] for entry in entries):
+        raise ValueError(f"{path} needs a password to be replayed")
+    return [password if entry["secret"] else entry["value"] for entry in entries]
+
+
+TERMINAL = TerminalInput()
+current_input: ContextVar[InputProvider] = ContextVar("current_input", default=TERMINAL)
+
+
+def read_input(prompt: str, secret: bool = False) -> str:
+    """Reads the answer to a prompt from the provider of the current context."""
+    return current_input.get().read(prompt, secret)
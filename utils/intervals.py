@@ -0,0 +1,68 @@
+from bisect import bisect_left
+from typing import Any, Iterable, List, Optional, Tuple
+
+
+class IntervalIndex:
+    """
+    Half-open intervals [start, end) sorted by start, with the running maximum of their ends.
+
+    An interval overlaps [start, end) when it starts before end and ends after start:
+    the intervals starting before end are a prefix of the sorted list (found by bisection),
+    and the running maximum tells in O(1) whether one of them ends after start, so a
+    conflict is found in O(log n). Adding or removing an interval costs O(n).
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[Any, Any, Any]] = ()):
+        """
+        Initializes the index.
+
+        :param intervals: The (start, end, key) of the intervals, the key identifying each one
+        """
+        self.intervals: List[Tuple[Any, Any, Any]] = sorted(intervals)
+        self.starts: List[Any] = []
+        self.max_ends: List[Tuple[Any, Any]] = []
+        self._rebuild(0)
+
+    def __len__(self) -> int:
+        return len(self.intervals)
+
+    def add(self, start: Any, end: Any, key: Any) -> None:
+        """
+        Adds an interval.
+        """
+        interval = (start, end, key)
+        position = bisect_left(self.intervals, interval)
+        self.intervals.insert(position, interval)
+        self._rebuild(position)
+
+    def remove(self, key: Any) -> None:
+        """
+        Removes the interval of a key, if present.
+        """
+        for position, interval in enumerate(self.intervals):
+            if interval[2] == key:
+                del self.intervals[position]
+                self._rebuild(position)
+                return
+
+    def overlapping(self, start: Any, end: Any) -> Optional[Any]:
+        """
+        Returns the key of an interval overlapping [start, end), None if there is none.
+        """
+        count = bisect_left(self.starts, end)
+        if count and self.max_ends[count - 1][0] > start:
+            return self.max_ends[count - 1][1]
+        return None
+
+    def _rebuild(self, position: int) -> None:
+        """
+        Recomputes the starts and the running maximum of the ends from a position.
+        """
+        del self.starts[position:]
+        del self.max_ends[position:]
+        for start, end, key in self.intervals[position:]:
+            self.starts.append(start)
+            if self.max_ends and self.max_ends[-1][0] >= end:
+                self.max_ends.append(self.max_ends[-1])
+            else:
+                self.max_ends.append((end, key))
@@ -0,0 +1,312 @@
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from config import get_engine
+from sqlalchemy import (Column, DateTime, Integer, MetaData, String, Table,
+                        bindparam, column, inspect, select, table, update)
+from sqlalchemy.engine import Connection, Engine
+
+from models.names import COMPANY_KEY_LENGTH, NAME_KEY_LENGTH, company_key, name_key
+from utils.search import PG_WEIGHTS, SEARCH_COLUMNS, search_table
+from views.user_view import UserView
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.now),
+)
+
+
+# The indexes a migration creates: name, table, indexed expressions, and the WHERE clause
+# of the partial ones by dialect. They are written out rather than read from the models, so
+# a migration creates the same indexes whatever the models declare later.
+IndexSpec = Tuple[str, str, str, Dict[str, str]]
+
+FILTER_INDEXES: List[IndexSpec] = [
+    ("ix_customers_sales_contact_id", "customers", "sales_contact_id", {}),
+    ("ix_contracts_customer_id_is_signed", "contracts", "customer_id, is_signed", {}),
+    ("ix_contracts_is_signed", "contracts", "is_signed", {}),
+    ("ix_contracts_amount_due", "contracts", "amount_due", {"postgresql": "amount_due > 0"}),
+    ("ix_events_contract_id", "events", "contract_id", {}),
+    ("ix_events_support_contact_id_start_date", "events", "support_contact_id, event_start_date", {}),
+    ("ix_events_unassigned", "events", "event_start_date",
+     {"postgresql": "support_contact_id IS NULL", "sqlite": "support_contact_id IS NULL"}),
+    ("ix_events_event_start_date", "events", "event_start_date", {}),
+    ("ix_events_event_end_date", "events", "event_end_date", {}),
+]
+
+DUPLICATE_KEY_INDEXES: List[IndexSpec] = [
+    ("ix_customers_company_name_lower", "customers", "lower(company_name)", {}),
+    ("ix_customers_full_name_lower", "customers", "lower(full_name)", {}),
+]
+
+NAME_KEY_INDEXES: List[IndexSpec] = [
+    ("ix_customers_company_key", "customers", "company_key", {}),
+    ("ix_customers_name_key", "customers", "name_key", {}),
+]
+
+REFRESH_TOKEN_INDEXES: List[IndexSpec] = [
+    ("ix_refresh_tokens_family", "refresh_tokens", "family", {}),
+    ("ix_refresh_tokens_session_expires_at", "refresh_tokens", "session_expires_at", {}),
+]
+
+# The column types whose name differs by dialect, in the tables the migrations create
+TIMESTAMP = {"postgresql": "TIMESTAMP WITHOUT TIME ZONE", "sqlite": "DATETIME"}
+SERIAL = {"postgresql": "SERIAL", "sqlite": "INTEGER"}
+# The day an event starts on, as written in the name of its dashboard counter
+EVENT_DAY = {"postgresql": "to_char(event_start_date, 'YYYY-MM-DD')", "sqlite": "date(event_start_date)"}
+
+
+def create_index(connection: Connection, index: IndexSpec) -> None:
+    """
+    Creates an index if it does not exist yet.
+
+    On PostgreSQL the index is built CONCURRENTLY so the table stays writable
+    while it is built; this requires the connection to be in autocommit mode.
+    """
+    name, table, expressions, where = index
+    concurrently = " CONCURRENTLY" if connection.dialect.name == "postgresql" else ""
+    ddl = f"CREATE INDEX{concurrently} IF NOT EXISTS {name} ON {table} ({expressions})"
+    if connection.dialect.name in where:
+        ddl += f" WHERE {where[connection.dialect.name]}"
+    connection.exec_driver_sql(ddl)
+
+
+def index_controller_filters(connection: Connection) -> None:
+    """Indexes the columns filtered by the controllers and the validators."""
+    for index in FILTER_INDEXES:
+        create_index(connection, index)
+
+
+def create_tsvector_index(connection: Connection, model) -> None:
+    """
+    Adds a generated tsvector column of the searched columns of a model to its table,
+    and a GIN index on it (PostgreSQL 12+).
+
+    PostgreSQL computes the column on every insert and update, so the index never
+    lags behind the table. Adding the column rewrites the table once.
+    """
+    tablename = model.__tablename__
+    vector = " || ".join(
+        f"setweight(to_tsvector('simple', {expression}), '{weight}')"
+        for expression, weight in zip(
+            (f"translate(coalesce({name}, ''), '@.', '  ')" for name in SEARCH_COLUMNS[model]), PG_WEIGHTS)
+    )
+    connection.exec_driver_sql(
+        f"ALTER TABLE {tablename} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED"
+    )
+    connection.exec_driver_sql(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{tablename}_search_vector "
+        f"ON {tablename} USING gin (search_vector)"
+    )
+
+
+def create_fts_table(connection: Connection, model) -> None:
+    """
+    Creates the FTS5 table indexing the searched columns of a model (SQLite).
+
+    The FTS table reads its content from the model table; triggers add the new rows
+    and replace the changed ones in the index, and the existing rows are indexed once.
+    """
+    tablename, fts = model.__tablename__, search_table(model)
+    names = ", ".join(SEARCH_COLUMNS[model])
+    new = ", ".join(f"new.{name}" for name in SEARCH_COLUMNS[model])
+    old = ", ".join(f"old.{name}" for name in SEARCH_COLUMNS[model])
+    delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+
+    connection.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{tablename}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    connection.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {tablename} BEGIN {insert} END"
+    )
+    connection.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {tablename} BEGIN {delete} END"
+    )
+    connection.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} ON {tablename} "
+        f"BEGIN {delete} {insert} END"
+    )
+    connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def index_search_columns(connection: Connection) -> None:
+    """Indexes the searched columns of the customers and events for the full-text search."""
+    for model in SEARCH_COLUMNS:
+        if connection.dialect.name == "postgresql":
+            create_tsvector_index(connection, model)
+        else:
+            create_fts_table(connection, model)
+
+
+def index_duplicate_keys(connection: Connection) -> None:
+    """Indexes the lowercased names the duplicate detection looks new customers up by."""
+    for index in DUPLICATE_KEY_INDEXES:
+        create_index(connection, index)
+
+
+def store_name_keys(connection: Connection) -> None:
+    """
+    Adds the normalized name keys of the customers, computes them for the existing
+    customers, and indexes them in place of the lowercased names. On PostgreSQL the keys
+    are in the C collation, for the prefix ranges of the duplicate detection.
+    """
+    existing = {info["name"] for info in inspect(connection).get_columns("customers")}
+    collation = ' COLLATE "C"' if connection.dialect.name == "postgresql" else ""
+    for name, length in (("name_key", NAME_KEY_LENGTH), ("company_key", COMPANY_KEY_LENGTH)):
+        if name not in existing:
+            connection.exec_driver_sql(f"ALTER TABLE customers ADD COLUMN {name} VARCHAR({length}){collation}")
+
+    customers = table("customers", column("id"), column("full_name"), column("company_name"),
+                      column("name_key"), column("company_key"))
+    keys = [{"customer_id": customer_id, "name": name_key(full_name), "company": company_key(company_name)}
+            for customer_id, full_name, company_name
+            in connection.execute(select(customers.c.id, customers.c.full_name, customers.c.company_name))]
+    if keys:
+        connection.execute(update(customers).where(customers.c.id == bindparam("customer_id"))
+                           .values(name_key=bindparam("name"), company_key=bindparam("company")), keys)
+
+    for index in NAME_KEY_INDEXES:
+        create_index(connection, index)
+    concurrently = " CONCURRENTLY" if connection.dialect.name == "postgresql" else ""
+    for name, _, _, _ in DUPLICATE_KEY_INDEXES:
+        connection.exec_driver_sql(f"DROP INDEX{concurrently} IF EXISTS {name}")
+
+
+def create_dashboard_counters(connection: Connection) -> None:
+    """
+    Creates the dashboard counters table and computes the counters of the existing rows,
+    replacing the counters already computed when the migration runs again.
+    """
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS dashboard_counters "
+        "(name VARCHAR(50) NOT NULL, value INTEGER NOT NULL, PRIMARY KEY (name))"
+    )
+    counters = [
+        "SELECT 'unsigned_contracts', count(*) FROM contracts WHERE NOT is_signed",
+        "SELECT 'unpaid_contracts', count(*) FROM contracts WHERE amount_due > 0",
+        "SELECT 'unassigned_events', count(*) FROM events WHERE support_contact_id IS NULL",
+        f"SELECT 'events_on:' || {EVENT_DAY[connection.dialect.name]}, count(*) FROM events "
+        f"WHERE event_start_date IS NOT NULL GROUP BY {EVENT_DAY[connection.dialect.name]}",
+    ]
+    for counter in counters:
+        connection.exec_driver_sql(
+            f"INSERT INTO dashboard_counters (name, value) {counter} "
+            f"ON CONFLICT (name) DO UPDATE SET value = excluded.value"
+        )
+
+
+def exclude_support_overlaps(connection: Connection) -> None:
+    """
+    Forbids two events of a support user with overlapping dates (PostgreSQL).
+
+    The exclusion constraint needs the btree_gist extension for the equality on the
+    support user, and fails to be created while overlapping assignments exist.
+    Other databases check overlaps in the application, see models.schedule.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    if connection.exec_driver_sql(
+        "SELECT 1 FROM pg_constraint WHERE conname = 'ex_events_support_overlap' "
+        "AND conrelid = 'events'::regclass"
+    ).first() is not None:
+        return
+    connection.exec_driver_sql(
+        "ALTER TABLE events ADD CONSTRAINT ex_events_support_overlap EXCLUDE USING gist "
+        "(support_contact_id WITH =, tsrange(event_start_date, event_end_date) WITH &&) "
+        "WHERE (support_contact_id IS NOT NULL AND event_start_date IS NOT NULL "
+        "AND event_end_date IS NOT NULL AND event_start_date <= event_end_date)"
+    )
+
+
+def create_refresh_tokens(connection: Connection) -> None:
+    """Creates the refresh tokens table and its indexes."""
+    dialect = connection.dialect.name
+    connection.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS refresh_tokens ("
+        f"id {SERIAL[dialect]} NOT NULL, "
+        f"token_hash VARCHAR(64) NOT NULL, "
+        f"family VARCHAR(32) NOT NULL, "
+        f"user_id INTEGER NOT NULL, "
+        f"expires_at {TIMESTAMP[dialect]} NOT NULL, "
+        f"session_expires_at {TIMESTAMP[dialect]} NOT NULL, "
+        f"rotated BOOLEAN NOT NULL, "
+        f"revoked BOOLEAN NOT NULL, "
+        f"PRIMARY KEY (id), "
+        f"UNIQUE (token_hash), "
+        f"FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE)"
+    )
+    for index in REFRESH_TOKEN_INDEXES:
+        create_index(connection, index)
+
+
+def index_event_durations(connection: Connection) -> None:
+    """
+    Indexes the duration of the events of each support user (SQLite), bounding the overlap
+    lookups of models.schedule. PostgreSQL looks them up through the exclusion constraint.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_events_support_contact_id_duration ON events "
+        "(support_contact_id, (julianday(event_end_date) - julianday(event_start_date)))"
+    )
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "Index the controller filters", index_controller_filters),
+    (2, "Index the searched columns", index_search_columns),
+    (3, "Index the duplicate detection keys", index_duplicate_keys),
+    (4, "Create the dashboard counters", create_dashboard_counters),
+    (5, "Forbid overlapping events of a support user", exclude_support_overlaps),
+    (6, "Create the refresh tokens", create_refresh_tokens),
+    (7, "Store the normalized name keys of the customers", store_name_keys),
+    (8, "Index the event durations of the support users", index_event_durations),
+]
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    """Returns the versions of the migrations already applied to the database."""
+    metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        return list(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def upgrade(engine: Engine) -> List[int]:
+    """
+    Applies the pending migrations in version order.
+
+    Each migration runs in autocommit mode on PostgreSQL (concurrent index builds
+    cannot run inside a transaction) and in a transaction elsewhere, and its version
+    is recorded once it succeeded.
+
+    :return: The versions applied by this call
+    """
+    done = set(applied_versions(engine))
+    applied = []
+    for version, description, migration in MIGRATIONS:
+        if version in done:
+            continue
+        if engine.dialect.name == "postgresql":
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                migration(connection)
+        else:
+            with engine.begin() as connection:
+                migration(connection)
+        with engine.begin() as connection:
+            connection.execute(schema_migrations.insert().values(version=version, description=description))
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    for version in upgrade(get_engine()):
+        UserView.migration_applied(version)
@@ -0,0 +1,106 @@
+from typing import Any, List, Optional
+
+from sqlalchemy.orm import InstrumentedAttribute, Query
+
+PAGE_SIZE = 50
+
+
+class Page:
+    """A page of rows fetched by a KeysetPaginator or a SearchPaginator."""
+
+    def __init__(self, items: List[Any], has_previous: bool, has_next: bool, key: InstrumentedAttribute,
+                 number: int = 0):
+        """
+        Initializes a page.
+
+        :param items: The rows of the page, ordered by key
+        :param has_previous: Whether rows exist before the first row of the page
+        :param has_next: Whether rows exist after the last row of the page
+        :param key: The column the rows are paginated on
+        :param number: The position of the page, from 0, for the paginators paging by number
+        """
+        self.items = items
+        self.has_previous = has_previous
+        self.has_next = has_next
+        self.key = key
+        self.number = number
+
+    @property
+    def first_key(self) -> Optional[Any]:
+        """
+        Returns the key of the first row of the page, None if the page is empty.
+        """
+        return getattr(self.items[0], self.key.key) if self.items else None
+
+    @property
+    def last_key(self) -> Optional[Any]:
+        """
+        Returns the key of the last row of the page, None if the page is empty.
+        """
+        return getattr(self.items[-1], self.key.key) if self.items else None
+
+
+class KeysetPaginator:
+    """
+    Paginates a query on a unique, indexed column (the primary key by default).
+
+    Each page is a ``WHERE key > :last ORDER BY key LIMIT n`` query, so fetching
+    a page costs the same whatever its position in the table, and only one page
+    is held in memory at a time.
+    """
+
+    jump_label = "Aller à l'ID"
+    jump_prompt = "ID: "
+
+    def __init__(self, query: Query, key: InstrumentedAttribute, page_size: int = PAGE_SIZE):
+        """
+        Initializes the paginator.
+
+        :param query: The query to paginate, its ordering is replaced by the key
+        :param key: The column to paginate on
+        :param page_size: The number of rows per page
+        """
+        self.query = query.order_by(None)
+        self.key = key
+        self.page_size = page_size
+
+    def first(self) -> Page:
+        """
+        Fetches the first page.
+        """
+        return self._forward(self.query, has_previous=False)
+
+    def next(self, page: Page) -> Page:
+        """
+        Fetches the page following the given page.
+        """
+        return self._forward(self.query.filter(self.key > page.last_key), has_previous=True)
+
+    def previous(self, page: Page) -> Page:
+        """
+        Fetches the page preceding the given page, or the last page if the given page is empty.
+        """
+        query = self.query
+        if page.first_key is not None:
+            query = query.filter(self.key < page.first_key)
+        rows = (query.order_by(self.key.desc())
+                .limit(self.page_size + 1)
+                .all())
+        has_previous = len(rows) > self.page_size
+        items = list(reversed(rows[:self.page_size]))
+        return Page(items, has_previous=has_previous, has_next=page.first_key is not None, key=self.key)
+
+    def jump(self, value: Any) -> Page:
+        """
+        Fetches the page starting at the given key value.
+        """
+        has_previous = self.query.filter(self.key < value).limit(1).first() is not None
+        return self._forward(self.query.filter(self.key >= value), has_previous=has_previous)
+
+    def _forward(self, query: Query, has_previous: bool) -> Page:
+        """
+        Fetches up to one page of rows in key order, plus one row to know if a next page exists.
+        """
+        rows = query.order_by(self.key).limit(self.page_size + 1).all()
+        has_next = len(rows) > self.page_size
+        return Page(rows[:self.page_size], has_previous=has_previous, has_next=has_next, key=self.key)
@@ -0,0 +1,220 @@
+"""
+Argon2 cost of the password hashes.
+
+The cost is set by the ARGON2_* keys of the .env file. ``python3 -m passwords --calibrate``
+chooses the most expensive parameters whose login (one hash verification) stays within a
+latency budget on the current hardware, and writes them to the .env file. The hashes made
+with other parameters are rehashed when their users log in.
+
+Hashes and verifications run on a bounded thread pool (PASSWORD_WORKERS threads, the number
+of cores by default). argon2 releases the GIL while hashing, so concurrent logins run on
+separate cores, and never more at once than there are workers, which also bounds the
+memory they take. At most PASSWORD_QUEUE_LIMIT more wait for a worker: past that,
+PasswordPoolFull is raised rather than queueing logins which would time out anyway.
+"""
+import argparse
+import math
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from argon2 import PasswordHasher
+from config import ARGON2, PASSWORD_POOL
+
+from views.user_view import UserView
+
+SAMPLE_PASSWORD = "calibration-password"
+# Lowest memory cost the calibration goes down to, in KiB (19 MiB, the OWASP minimum for Argon2id)
+MIN_MEMORY_COST = 19456
+MAX_TIME_COST = 10
+SETTING = re.compile(r"\s*(\w+)\s*=")
+
+
+def password_hasher(parameters: Dict[str, int] = ARGON2) -> PasswordHasher:
+    """
+    Returns a password hasher with the configured Argon2 parameters.
+    """
+    return PasswordHasher(time_cost=parameters["TIME_COST"], memory_cost=parameters["MEMORY_COST"],
+                          parallelism=parameters["PARALLELISM"])
+
+
+class PasswordPoolFull(Exception):
+    """Exception raised when too many password hashes are waiting for a worker."""
+    pass
+
+
+class PasswordPool:
+    """A bounded thread pool running the password hashes and verifications."""
+
+    def __init__(self, workers: int = PASSWORD_POOL["WORKERS"], queue_limit: int = PASSWORD_POOL["QUEUE_LIMIT"]):
+        """
+        Initializes the pool.
+
+        :param workers: The number of threads hashing at once
+        :param queue_limit: The number of hashes allowed to wait for a thread
+        """
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="argon2")
+        self.slots = threading.BoundedSemaphore(workers + queue_limit)
+
+    def run(self, function: Callable, *args: Any) -> Any:
+        """
+        Runs a function on a worker and waits for its result, raising its exception if it fails.
+
+        :raises PasswordPoolFull: When the workers are busy and the queue is full
+        """
+        if not self.slots.acquire(blocking=False):
+            raise PasswordPoolFull("Too many password hashes waiting for a worker")
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future.result()
+
+    def hash(self, hasher: PasswordHasher, password: str) -> str:
+        """Hashes a password on a worker."""
+        return self.run(hasher.hash, password)
+
+    def verify(self, hasher: PasswordHasher, hashed: str, password: str) -> bool:
+        """Verifies a password on a worker, raising VerifyMismatchError if it does not match."""
+        return self.run(hasher.verify, hashed, password)
+
+
+PASSWORDS = PasswordPool()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Returns the nearest-rank percentile of values.
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def time_logins(parameters: Dict[str, int], samples: int = 20) -> Dict[str, float]:
+    """
+    Times the verification of a password hashed with the parameters, the cost of a login.
+
+    :return: The median and 99th percentile in milliseconds
+    """
+    hasher = password_hasher(parameters)
+    hashed = hasher.hash(SAMPLE_PASSWORD)
+    timings = []
+    for _ in range(samples):
+        began = time.perf_counter()
+        hasher.verify(hashed, SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - began) * 1000)
+    return {"p50_ms": percentile(timings, 0.5), "p99_ms": percentile(timings, 0.99)}
+
+
+def calibrate(budget_ms: float, max_memory_cost: int = ARGON2["MEMORY_COST"],
+              parallelism: int = ARGON2["PARALLELISM"], samples: int = 5) -> Dict[str, int]:
+    """
+    Chooses the Argon2 parameters whose median login time fits the budget.
+
+    Memory is what makes Argon2 costly to attack, so the memory cost is chosen first: the
+    largest one, halving from max_memory_cost, for which one pass fits the budget. The number
+    of passes is then raised while the median still fits it.
+
+    :param budget_ms: The login latency budget in milliseconds
+    :param max_memory_cost: The most memory a hash may use, in KiB
+    :param parallelism: The number of threads of a hash
+    :param samples: The number of logins timed for each candidate
+    :return: The parameters, in the format of config.ARGON2
+    """
+    parameters = {"TIME_COST": 1, "MEMORY_COST": max_memory_cost, "PARALLELISM": parallelism}
+    while (parameters["MEMORY_COST"] // 2 >= MIN_MEMORY_COST
+           and time_logins(parameters, samples)["p50_ms"] > budget_ms):
+        parameters["MEMORY_COST"] //= 2
+
+    while parameters["TIME_COST"] < MAX_TIME_COST:
+        candidate = {**parameters, "TIME_COST": parameters["TIME_COST"] + 1}
+        if time_logins(candidate, samples)["p50_ms"] > budget_ms:
+            break
+        parameters = candidate
+    return parameters
+
+
+def benchmark_logins(logins: int, parameters: Dict[str, int] = ARGON2,
+                     pool: Optional[PasswordPool] = None) -> Dict[str, float]:
+    """
+    Times logins made at once from as many threads, the front end's request threads, verifying
+    on the pool, against the same logins verified one after the other.
+
+    :param logins: The number of simultaneous logins
+    :param parameters: The Argon2 parameters
+    :param pool: The pool, by default one with the configured workers and room for every login
+    :return: The serial and concurrent durations in seconds, and the login p50/p99 in milliseconds
+    """
+    pool = pool or PasswordPool(queue_limit=logins)
+    hasher = password_hasher(parameters)
+    hashed = hasher.hash(SAMPLE_PASSWORD)
+
+    began = time.perf_counter()
+    for _ in range(logins):
+        hasher.verify(hashed, SAMPLE_PASSWORD)
+    serial = time.perf_counter() - began
+
+    timings = []
+
+    def login() -> None:
+        started = time.perf_counter()
+        pool.verify(hasher, hashed, SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=login) for _ in range(logins)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    concurrent = time.perf_counter() - began
+    return {"logins": logins, "workers": pool.workers, "serial_seconds": serial, "concurrent_seconds": concurrent,
+            "p50_ms": percentile(timings, 0.5), "p99_ms": percentile(timings, 0.99)}
+
+
+def write_settings(parameters: Dict[str, int], path: str = ".env") -> None:
+    """
+    Writes the parameters as ARGON2_* keys to an .env file, keeping its other lines.
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            lines = file.read().splitlines()
+    except FileNotFoundError:
+        lines = []
+    settings = {f"ARGON2_{name}": value for name, value in parameters.items()}
+    lines = [line for line in lines
+             if (match := SETTING.match(line)) is None or match.group(1) not in settings]
+    lines.extend(f"{key}={value}" for key, value in settings.items())
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mesure et choisit le coût Argon2 des mots de passe.")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Choisit les paramètres tenant le budget et les enregistre dans le fichier .env")
+    parser.add_argument("--budget", type=float, default=250, help="Durée d'une connexion visée, en ms")
+    parser.add_argument("--max-memory", type=int, default=ARGON2["MEMORY_COST"],
+                        help="Mémoire maximale d'un hachage, en KiB")
+    parser.add_argument("--parallelism", type=int, default=ARGON2["PARALLELISM"])
+    parser.add_argument("--samples", type=int, default=50, help="Nombre de connexions mesurées")
+    parser.add_argument("--env", default=".env", help="Fichier de configuration")
+    parser.add_argument("--concurrent-logins", type=int, metavar="N",
+                        help="Mesure N connexions simultanées avec les paramètres actuels")
+    args = parser.parse_args()
+
+    if args.concurrent_logins:
+        UserView.display_login_benchmark(benchmark_logins(args.concurrent_logins))
+        parser.exit()
+
+    parameters = ARGON2
+    if args.calibrate:
+        parameters = calibrate(args.budget, args.max_memory, args.parallelism)
+        write_settings(parameters, args.env)
+        UserView.password_settings_saved(args.env)
+    UserView.display_password_timings(parameters, time_logins(parameters, args.samples))
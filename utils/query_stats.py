@@ -0,0 +1,209 @@
+"""
+Database cost of the menu actions.
+
+The engine listeners of QueryInstrumentation time every statement run during an action
+(see MainController.in_session) and record it on the action's ActionStats: number of
+queries, time spent in the database and slowest statements. Statements slower than
+QUERY_SLOW_MS are logged. The same statement shape run QUERY_N_PLUS_ONE times or more in
+one burst, a query per row loaded instead of one for all the rows, is logged as N+1,
+or raises NPlusOneDetected with QUERY_N_PLUS_ONE_RAISE (for the tests). A burst is a
+statement run by the code of the action and the lazy loads following it: the pages of a
+listing or the searches of a loop are each their own burst.
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import QUERY_STATS
+from sentry_config import record_span
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session
+
+logger = logging.getLogger(__name__)
+
+# Slowest statements kept per action
+SLOWEST = 3
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_LISTS = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)")
+SPACES = re.compile(r"\s+")
+
+
+class NPlusOneDetected(Exception):
+    """Exception raised when an action runs the same statement shape too many times."""
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Returns the shape of a statement: its SQL with the literals and the lists of
+    placeholders (IN lists of any length) replaced by ?.
+    """
+    shape = LITERALS.sub("?", statement)
+    shape = PLACEHOLDER_LISTS.sub("(?)", shape)
+    return SPACES.sub(" ", shape).strip()
+
+
+class ActionStats:
+    """The statements run by one menu action."""
+
+    def __init__(self, name: str, n_plus_one: int = QUERY_STATS["N_PLUS_ONE"],
+                 parent: Optional["ActionStats"] = None):
+        """
+        :param name: The name of the action
+        :param n_plus_one: The number of statements of the same shape flagged as N+1
+        :param parent: The action running this one, which its statements are recorded on too
+        """
+        self.name = name
+        self.parent = parent
+        self.n_plus_one_threshold = n_plus_one
+        self.queries = 0
+        self.seconds = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+        # The most statements of each shape in a burst, and those of the current burst
+        self.shapes: Counter = Counter()
+        self.burst: Counter = Counter()
+
+    def start_burst(self) -> None:
+        """Starts counting the statement shapes again, at a statement run by the action's code."""
+        if self.parent is not None:
+            self.parent.start_burst()
+        self.burst.clear()
+
+    def record(self, statement: str, seconds: float) -> None:
+        """Records a statement and the time it took, on the action and the actions running it."""
+        if self.parent is not None:
+            self.parent.record(statement, seconds)
+        self.queries += 1
+        self.seconds += seconds
+        shape = statement_shape(statement)
+        self.burst[shape] += 1
+        self.shapes[shape] = max(self.shapes[shape], self.burst[shape])
+        if len(self.slowest) < SLOWEST:
+            heapq.heappush(self.slowest, (seconds, statement))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, statement))
+
+    def n_plus_one(self) -> Dict[str, int]:
+        """Returns the statement shapes run often enough in a burst to be an N+1, with their count."""
+        return {shape: count for shape, count in self.shapes.items() if count >= self.n_plus_one_threshold}
+
+    def slowest_statements(self) -> List[Tuple[float, str]]:
+        """Returns the slowest statements, slowest first, with their duration in seconds."""
+        return sorted(self.slowest, reverse=True)
+
+
+class QueryInstrumentation:
+    """Engine listeners recording the statements of the current action, and the totals by action."""
+
+    def __init__(self, slow_ms: float = QUERY_STATS["SLOW_MS"], n_plus_one: int = QUERY_STATS["N_PLUS_ONE"],
+                 raise_n_plus_one: bool = QUERY_STATS["RAISE"]):
+        """
+        Initializes the instrumentation.
+
+        :param slow_ms: The duration in milliseconds above which a statement is logged
+        :param n_plus_one: The number of statements of the same shape flagged as N+1 in an action
+        :param raise_n_plus_one: Whether an N+1 raises NPlusOneDetected at the end of the action
+        """
+        self.slow_ms = slow_ms
+        self.n_plus_one = n_plus_one
+        self.raise_n_plus_one = raise_n_plus_one
+        self.current: ContextVar[Optional[ActionStats]] = ContextVar("query_stats_action", default=None)
+        self.lock = threading.Lock()
+        self.totals: Dict[str, Dict[str, Any]] = {}
+
+    def attach(self, engine: Engine) -> None:
+        """
+        Times the statements of an engine, and starts a burst at each statement the sessions
+        run for the code rather than to load a relationship or a deferred column.
+        Attaching it again has no effect.
+        """
+        if not event.contains(engine, "before_cursor_execute", self.before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+        if not event.contains(Session, "do_orm_execute", self.do_orm_execute):
+            event.listen(Session, "do_orm_execute", self.do_orm_execute)
+
+    def detach(self, engine: Engine) -> None:
+        """
+        Stops timing the statements of an engine and starting bursts.
+        """
+        for name, listener in (("before_cursor_execute", self.before_cursor_execute),
+                               ("after_cursor_execute", self.after_cursor_execute)):
+            if event.contains(engine, name, listener):
+                event.remove(engine, name, listener)
+        if event.contains(Session, "do_orm_execute", self.do_orm_execute):
+            event.remove(Session, "do_orm_execute", self.do_orm_execute)
+
+    def do_orm_execute(self, orm_execute_state: ORMExecuteState) -> None:
+        stats = self.current.get()
+        if stats is not None and not (orm_execute_state.is_relationship_load or orm_execute_state.is_column_load):
+            stats.start_burst()
+
+    def before_cursor_execute(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any,
+                              executemany: bool) -> None:
+        if self.current.get() is not None:
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any,
+                             executemany: bool) -> None:
+        stats = self.current.get()
+        started = conn.info.get("query_started")
+        if stats is None or not started:
+            return
+        seconds = time.perf_counter() - started.pop()
+        stats.record(statement, seconds)
+        record_span("db", statement, seconds)
+        if seconds * 1000 >= self.slow_ms:
+            logger.warning("Slow query (%.1f ms) in %s: %s", seconds * 1000, stats.name, statement)
+
+    @contextmanager
+    def action(self, name: str) -> Iterator[ActionStats]:
+        """
+        Records the statements run in the block as those of an action. An action run
+        within another one records its statements on the outer action too, which checks
+        them for N+1 at its end.
+
+        :raises NPlusOneDetected: At the end of the block, when raising is enabled and an N+1 was found
+        """
+        stats = ActionStats(name, self.n_plus_one, parent=self.current.get())
+        token = self.current.set(stats)
+        try:
+            yield stats
+        finally:
+            self.current.reset(token)
+            self.add_to_totals(stats)
+        if stats.parent is not None:
+            return
+        repeated = stats.n_plus_one()
+        for shape, count in repeated.items():
+            logger.warning("N+1 in %s: %d x %s", name, count, shape)
+        if repeated and self.raise_n_plus_one:
+            raise NPlusOneDetected(f"{name} ran {max(repeated.values())} statements of the same shape")
+
+    def add_to_totals(self, stats: ActionStats) -> None:
+        """Adds the statements of an action to the totals of its name."""
+        with self.lock:
+            totals = self.totals.setdefault(stats.name, {"calls": 0, "queries": 0, "seconds": 0.0, "max_queries": 0})
+            totals["calls"] += 1
+            totals["queries"] += stats.queries
+            totals["seconds"] += stats.seconds
+            totals["max_queries"] = max(totals["max_queries"], stats.queries)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Returns the totals by action since startup, the most expensive in the database first.
+        """
+        with self.lock:
+            rows = [{"action": name, **totals} for name, totals in self.totals.items()]
+        return sorted(rows, key=lambda row: row["seconds"], reverse=True)
+
+
+QUERIES = QueryInstrumentation()
@@ -0,0 +1,159 @@
+"""
+Recording and replay of menu sessions, to load test the application.
+
+``python3 -m replay --record session.json`` runs the menus in the terminal and saves the
+answers typed as a script, the passwords left out. ``python3 -m replay session.json
+--workers 8 --runs 10 --password ...`` replays the scripts headlessly, each worker process
+running each script the given number of times against the configured database, and
+reports the actions per second and the latency percentiles of every menu action.
+
+The workers are processes rather than threads: the tokens of the logged in user are kept
+by TokenManager for the whole process, as for a user at the terminal. Replayed scripts
+write to the database like the sessions they were recorded from: replay those creating
+rows (users, customers...) against a test database only.
+"""
+import argparse
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from input_provider import RecordingInput, ScriptedInput, current_input, load_script
+from passwords import percentile
+from sentry_config import SharedConsole, TracedConsole
+
+from controllers.main_controller import MainController
+from utils.jwtoken import TokenManager
+from views.menu_view import MenuView
+
+
+class ReplayController(MainController):
+    """MainController timing each menu action it runs."""
+
+    def __init__(self):
+        super().__init__()
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+
+    def in_session(self, controller_class, method_name, *args) -> Callable:
+        """
+        Returns the menu action of MainController.in_session, recording its duration in seconds.
+        """
+        action = super().in_session(controller_class, method_name, *args)
+        name = f"{controller_class.__name__}.{method_name}"
+
+        def timed_action():
+            began = time.perf_counter()
+            try:
+                return action()
+            finally:
+                self.timings[name].append(time.perf_counter() - began)
+        return timed_action
+
+
+def replay(answers: List[str], controller: Optional[ReplayController] = None) -> Dict[str, List[float]]:
+    """
+    Runs the menus from the login menu with the answers of a script, until the user quits.
+
+    :param answers: The answers of the script, see input_provider.load_script
+    :param controller: The controller running the menus, a new ReplayController by default
+    :return: The durations in seconds of the menu actions run, by action
+    :raises ScriptEnded: When the script ends before the user quits, the run having gone
+        another way than the recorded session
+    """
+    controller = controller or ReplayController()
+    token = current_input.set(ScriptedInput(answers))
+    try:
+        controller.login_menu()
+    except SystemExit:
+        pass
+    finally:
+        current_input.reset(token)
+        TokenManager.store_tokens()
+    return controller.timings
+
+
+def run_worker(scripts: List[List[str]], runs: int) -> Tuple[Dict[str, List[float]], int]:
+    """
+    Replays each script the given number of times, the console output discarded.
+
+    :return: The durations of the menu actions by action, and the number of runs which failed:
+        raised, or ran out of answers before quitting
+    """
+    SharedConsole.console = TracedConsole(file=open(os.devnull, "w", encoding="utf-8"))
+    timings: Dict[str, List[float]] = defaultdict(list)
+    errors = 0
+    for _ in range(runs):
+        for answers in scripts:
+            try:
+                for name, durations in replay(answers).items():
+                    timings[name].extend(durations)
+            except Exception:
+                errors += 1
+    return timings, errors
+
+
+def load_test(scripts: List[List[str]], workers: int, runs: int = 1) -> Dict[str, Any]:
+    """
+    Replays the scripts on concurrent worker processes.
+
+    :param scripts: The answers of each script
+    :param workers: The number of worker processes, each replaying every script
+    :param runs: The number of times each worker replays each script
+    :return: The totals, and for each menu action its calls, calls per second and p50/p95/p99 in milliseconds
+    """
+    timings: Dict[str, List[float]] = defaultdict(list)
+    errors = 0
+    began = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_worker, scripts, runs) for _ in range(workers)]
+        for future in futures:
+            worker_timings, worker_errors = future.result()
+            errors += worker_errors
+            for name, durations in worker_timings.items():
+                timings[name].extend(durations)
+    seconds = time.perf_counter() - began
+
+    actions = [{"action": name, "calls": len(durations), "per_second": len(durations) / seconds,
+                "p50_ms": percentile(durations, 0.5) * 1000, "p95_ms": percentile(durations, 0.95) * 1000,
+                "p99_ms": percentile(durations, 0.99) * 1000} for name, durations in timings.items()]
+    calls = sum(action["calls"] for action in actions)
+    return {"workers": workers, "runs": workers * runs * len(scripts), "errors": errors, "seconds": seconds,
+            "per_second": calls / seconds, "actions": sorted(actions, key=lambda action: action["p99_ms"],
+                                                             reverse=True)}
+
+
+def record(path: str) -> None:
+    """Runs the menus in the terminal until the user quits, and saves the answers as a script."""
+    recorder = RecordingInput()
+    token = current_input.set(recorder)
+    try:
+        MainController().login_menu()
+    except (EOFError, KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        current_input.reset(token)
+        recorder.save(path)
+    MenuView.script_recorded(path, len(recorder.entries))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enregistre et rejoue des sessions pour tester la charge.")
+    parser.add_argument("scripts", nargs="*", help="Scripts à rejouer")
+    parser.add_argument("--record", metavar="SCRIPT", help="Enregistre une session dans SCRIPT")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Nombre de processus")
+    parser.add_argument("--runs", type=int, default=1, help="Nombre de passages de chaque script par processus")
+    parser.add_argument("--password", default=os.getenv("REPLAY_PASSWORD"),
+                        help="Mot de passe saisi aux invites de mot de passe des scripts")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record)
+    elif not args.scripts:
+        parser.error("un script à rejouer ou --record est requis")
+    else:
+        try:
+            scripts = [load_script(path, args.password) for path in args.scripts]
+        except ValueError as e:
+            parser.error(str(e))
+        MenuView.display_load_test(load_test(scripts, args.workers, args.runs))
@@ -0,0 +1,121 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import column, false, func, literal_column, select, table, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from models.models import Customer, Event
+from utils.pagination import PAGE_SIZE, Page
+
+# Searched columns of each model, from the most to the least relevant:
+# a match in the first column ranks above a match in the last one.
+SEARCH_COLUMNS: Dict[Any, Tuple[str, ...]] = {
+    Customer: ("full_name", "company_name", "email"),
+    Event: ("event_name", "location", "notes"),
+}
+# Relevance of the columns, for the PostgreSQL setweight() and the SQLite bm25() ranking
+PG_WEIGHTS = ("A", "B", "C")
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+
+def search_table(model: Any) -> str:
+    """
+    Returns the name of the SQLite FTS5 table indexing a model.
+    """
+    return f"{model.__tablename__}_fts"
+
+
+def search_terms(value: str) -> List[str]:
+    """
+    Splits a search into lowercase words, dropping the punctuation and the query operators.
+    """
+    return re.findall(r"\w+", value.lower())
+
+
+def search_statement(model: Any, value: str, dialect: str) -> Select:
+    """
+    Builds the ranked full-text search of a model: rows containing every word
+    of the search (as a word prefix), the most relevant first.
+
+    :param model: Customer or Event
+    :param value: The text searched
+    :param dialect: The name of the database dialect, postgresql or sqlite
+    :return: A select of the model, ordered by relevance then ID
+    """
+    terms = search_terms(value)
+    statement = select(model)
+    if not terms:
+        return statement.where(false())
+
+    if dialect == "postgresql":
+        vector = literal_column(f"{model.__tablename__}.search_vector")
+        query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        return statement.where(vector.op("@@")(query)).order_by(func.ts_rank(vector, query).desc(), model.id)
+
+    fts = table(search_table(model), column("rowid"))
+    weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+    query = " ".join(f'"{term}"*' for term in terms)
+    return (statement
+            .join(fts, fts.c.rowid == model.id)
+            .where(text(f"{fts.name} MATCH :query").bindparams(query=query))
+            .order_by(text(f"bm25({fts.name}, {weights})"), model.id))
+
+
+class SearchPaginator:
+    """
+    Paginates the results of a search by page number.
+
+    The results are ordered by relevance, which is not a column, so pages are
+    fetched with LIMIT/OFFSET; the full-text index keeps each page cheap as
+    only the matching rows are ranked.
+    """
+
+    jump_label = "Aller à la page"
+    jump_prompt = "Page: "
+
+    def __init__(self, session: Session, statement: Select, page_size: int = PAGE_SIZE):
+        """
+        Initializes the paginator.
+
+        :param session: SQLAlchemy Session
+        :param statement: The ranked search, see search_statement
+        :param page_size: The number of rows per page
+        """
+        self.session = session
+        self.statement = statement
+        self.page_size = page_size
+        self.key = statement.column_descriptions[0]["entity"].id
+
+    def first(self) -> Page:
+        """
+        Fetches the first page.
+        """
+        return self._fetch(0)
+
+    def next(self, page: Page) -> Page:
+        """
+        Fetches the page following the given page.
+        """
+        return self._fetch(page.number + 1)
+
+    def previous(self, page: Page) -> Page:
+        """
+        Fetches the page preceding the given page.
+        """
+        return self._fetch(max(page.number - 1, 0))
+
+    def jump(self, value: int) -> Page:
+        """
+        Fetches the page of the given number, starting at 1.
+        """
+        return self._fetch(max(value - 1, 0))
+
+    def _fetch(self, number: int) -> Page:
+        """
+        Fetches up to one page of results, plus one row to know if a next page exists.
+        """
+        statement = self.statement.limit(self.page_size + 1).offset(number * self.page_size)
+        rows = self.session.scalars(statement).all()
+        return Page(rows[:self.page_size], has_previous=number > 0, has_next=len(rows) > self.page_size,
+                    key=self.key, number=number)
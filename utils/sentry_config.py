@@ -1,28 +1,298 @@
 import functools
+import hashlib
+import json
 import os
-import sentry_sdk
-from dotenv import load_dotenv
-from typing import Callable, Any
+import random
+import sys
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from types import ModuleType
+from typing import Callable, Any, Dict, Iterator, List, Optional
 
-# Load environment variables from a .env file
-load_dotenv()
+from config import SENTRY
+from rich.console import Console
 
-# Get the Sentry DSN (Data Source Name) from environment variables
-sentry_dsn: str = os.getenv('SENTRY_DSN')
+# Get the Sentry DSN (Data Source Name) from the settings
+sentry_dsn: Optional[str] = SENTRY["DSN"]
 
-# Initialize Sentry with the DSN and a 100% traces sample rate
-sentry_sdk.init(
-    dsn=sentry_dsn,
-    traces_sample_rate=1.0
-)
+# Share of the menu actions traced, and where their spans are written without Sentry:
+# "stdout" or the path of a JSON lines file
+TRACES_SAMPLE_RATE: float = SENTRY["TRACES_SAMPLE_RATE"]
+TRACES_EXPORT: Optional[str] = SENTRY["TRACES_EXPORT"]
+
+sentry_lock = threading.Lock()
+sentry_module: Optional[ModuleType] = None
+
+
+def get_sentry() -> Optional[ModuleType]:
+    """
+    Returns sentry_sdk, imported and initialized with the DSN and the traces sample rate
+    on first use, None without a DSN: the SDK is only loaded by the processes reporting
+    to Sentry, once they have something to report.
+    """
+    global sentry_module
+    if not sentry_dsn:
+        return None
+    with sentry_lock:
+        if sentry_module is None:
+            import sentry_sdk
+            sentry_sdk.init(dsn=sentry_dsn, traces_sample_rate=TRACES_SAMPLE_RATE)
+            sentry_module = sentry_sdk
+    return sentry_module
+
+
+class ErrorReporter:
+    """
+    Sends the exceptions to Sentry with a bounded cost.
+
+    An exception is sent once however many decorated functions it goes through, and
+    once per dedup window for the same fingerprint: its type and the place it was raised
+    from. A token bucket caps the rate of the others, which are spooled to a local file
+    instead, up to a maximum size, so a broken database cannot flood the error pipeline.
+    """
+
+    def __init__(self, dedup_seconds: float = SENTRY["DEDUP_SECONDS"], rate: float = SENTRY["RATE"],
+                 burst: int = SENTRY["BURST"], spool: Optional[str] = SENTRY["SPOOL"],
+                 spool_max_bytes: int = SENTRY["SPOOL_MAX_BYTES"]):
+        """
+        Initializes the reporter.
+
+        :param dedup_seconds: The time during which an exception with the same fingerprint is not sent again
+        :param rate: The number of exceptions sent per second past the burst
+        :param burst: The number of exceptions which can be sent at once
+        :param spool: The JSON lines file the exceptions over the rate are written to, None to drop them
+        :param spool_max_bytes: The size above which the spool is not written to anymore
+        """
+        self.dedup_seconds = dedup_seconds
+        self.rate = rate
+        self.burst = burst
+        self.spool = spool
+        self.spool_max_bytes = spool_max_bytes
+        self.lock = threading.Lock()
+        self.tokens = float(burst)
+        self.refilled = time.monotonic()
+        self.last_sent: Dict[str, float] = {}
+        self.duplicates: Dict[str, int] = {}
+        self.dropped = 0
+
+    @staticmethod
+    def fingerprint(exception: BaseException) -> str:
+        """Returns the fingerprint of an exception: a hash of its type and of the frames it was raised through."""
+        frames = traceback.extract_tb(exception.__traceback__)
+        key = "|".join([type(exception).__qualname__, *(f"{frame.filename}:{frame.lineno}" for frame in frames)])
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def take_token(self, now: float) -> bool:
+        """Takes a token from the bucket, refilled at the rate, False if it is empty."""
+        self.tokens = min(float(self.burst), self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def report(self, exception: BaseException) -> str:
+        """
+        Sends an exception to Sentry unless it was already captured, is a duplicate or is over the rate.
+
+        :return: What was done: "captured" (before), "duplicate", "spooled", "dropped" or "sent"
+        """
+        if getattr(exception, "__sentry_captured__", False):
+            return "captured"
+        try:
+            exception.__sentry_captured__ = True
+        except AttributeError:
+            pass
+
+        fingerprint = self.fingerprint(exception)
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_sent.get(fingerprint, -self.dedup_seconds) < self.dedup_seconds:
+                self.duplicates[fingerprint] = self.duplicates.get(fingerprint, 0) + 1
+                return "duplicate"
+            over_rate = not self.take_token(now)
+        if over_rate:
+            if self.write_spool(exception, fingerprint):
+                return "spooled"
+            with self.lock:
+                self.dropped += 1
+            return "dropped"
+        with self.lock:
+            if len(self.last_sent) > 1000:
+                self.last_sent = {key: sent for key, sent in self.last_sent.items()
+                                  if now - sent < self.dedup_seconds}
+            self.last_sent[fingerprint] = now
+            duplicates = self.duplicates.pop(fingerprint, 0)
+
+        sentry = get_sentry()
+        if sentry:
+            with sentry.new_scope() as scope:
+                scope.fingerprint = [fingerprint]
+                scope.set_extra("duplicates_since_last_sent", duplicates)
+                sentry.capture_exception(exception)
+        return "sent"
+
+    def write_spool(self, exception: BaseException, fingerprint: str) -> bool:
+        """
+        Appends an exception to the spool, False if there is no spool, it is full or it cannot
+        be written: reporting must never replace the exception reported.
+        """
+        if not self.spool:
+            return False
+        line = json.dumps({"time": time.time(), "fingerprint": fingerprint, "type": type(exception).__qualname__,
+                           "message": str(exception)})
+        try:
+            if os.path.exists(self.spool) and os.path.getsize(self.spool) >= self.spool_max_bytes:
+                return False
+            with open(self.spool, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+        except OSError:
+            return False
+        return True
+
+
+ERRORS = ErrorReporter()
+
+
+class Span:
+    """A timed operation of a traced menu action: auth, validation, db, render..."""
+
+    def __init__(self, trace_id: str, parent: Optional["Span"], op: str, description: str):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.op = op
+        self.description = description
+        self.start = time.time()
+        self.duration = 0.0
+        self.spans: List[Span] = []
+        if parent is not None:
+            parent.spans.append(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id, "op": self.op,
+                "description": self.description, "start": self.start, "duration_ms": self.duration * 1000}
+
+    def walk(self) -> Iterator["Span"]:
+        """Yields the span and its descendants."""
+        yield self
+        for child in self.spans:
+            yield from child.walk()
+
+
+# The span open in the current context, NOT_SAMPLED in the actions left out by the sampling
+NOT_SAMPLED = Span("", None, "", "")
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+export_lock = threading.Lock()
+
+
+def export_trace(root: Span) -> None:
+    """Writes the spans of a finished trace as JSON lines to TRACES_EXPORT."""
+    lines = "".join(json.dumps(span.to_dict()) + "\n" for span in root.walk())
+    with export_lock:
+        if TRACES_EXPORT == "stdout":
+            sys.stdout.write(lines)
+        else:
+            with open(TRACES_EXPORT, "a", encoding="utf-8") as file:
+                file.write(lines)
+
+
+@contextmanager
+def trace(name: str) -> Iterator[Optional[Span]]:
+    """
+    Traces a menu action, for the share TRACES_SAMPLE_RATE of them. Its spans are sent
+    to Sentry with a DSN, and exported to TRACES_EXPORT once finished. An action run by
+    another one (a submenu) is a span of the trace of the outer action.
+    """
+    if current_span.get() is not None:
+        with span("action", name) as child:
+            yield child
+        return
+    if random.random() >= TRACES_SAMPLE_RATE:
+        token = current_span.set(NOT_SAMPLED)
+        try:
+            yield None
+        finally:
+            current_span.reset(token)
+        return
+
+    root = Span(uuid.uuid4().hex, None, "action", name)
+    token = current_span.set(root)
+    began = time.perf_counter()
+    sentry = get_sentry()
+    try:
+        with sentry.start_transaction(op="action", name=name, sampled=True) if sentry else nullcontext():
+            yield root
+    finally:
+        root.duration = time.perf_counter() - began
+        current_span.reset(token)
+        if TRACES_EXPORT:
+            export_trace(root)
+
+
+@contextmanager
+def span(op: str, description: str) -> Iterator[Optional[Span]]:
+    """
+    Times an operation as a span of the traced action, nothing outside of a traced action.
+    """
+    parent = current_span.get()
+    if parent is None or parent is NOT_SAMPLED:
+        yield None
+        return
+
+    child = Span(parent.trace_id, parent, op, description)
+    token = current_span.set(child)
+    began = time.perf_counter()
+    sentry = get_sentry()
+    try:
+        with sentry.start_span(op=op, name=description) if sentry else nullcontext():
+            yield child
+    finally:
+        child.duration = time.perf_counter() - began
+        current_span.reset(token)
+
+
+def record_span(op: str, description: str, seconds: float) -> None:
+    """Adds an operation timed elsewhere (a database statement) to the traced action."""
+    parent = current_span.get()
+    if parent is not None and parent is not NOT_SAMPLED:
+        child = Span(parent.trace_id, parent, op, description)
+        child.start -= seconds
+        child.duration = seconds
+
+
+class TracedConsole(Console):
+    """Console timing its output as render spans."""
+
+    def print(self, *args: Any, **kwargs: Any) -> None:
+        with span("render", "console.print"):
+            super().print(*args, **kwargs)
+
+
+class SharedConsole:
+    """
+    Class attribute giving the views a single TracedConsole, created on first use
+    rather than one per view class at import.
+    """
+    console: Optional[TracedConsole] = None
+
+    def __get__(self, obj: Any, owner: Any) -> TracedConsole:
+        if SharedConsole.console is None:
+            SharedConsole.console = TracedConsole()
+        return SharedConsole.console
 
 
 def sentry_exception_handler(func: Callable) -> Callable:
     """
-    Decorator to capture exceptions with Sentry.
+    Decorator to capture exceptions with Sentry, and time the function as a span
+    of the traced action.
 
-    If the decorated function raises an exception, the exception is sent to Sentry
-    and then re-raised.
+    If the decorated function raises an exception, the exception is reported to Sentry
+    (once, see ErrorReporter) and then re-raised.
 
     Args:
         func (Callable): The function to be decorated.
@@ -33,8 +303,10 @@ def sentry_exception_handler(func: Callable) -> Callable:
     @functools.wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
         try:
-            return func(*args, **kwargs)
+            with span("function", func.__qualname__):
+                return func(*args, **kwargs)
         except Exception as e:
-            sentry_sdk.capture_exception(e)
+            if sentry_dsn:
+                ERRORS.report(e)
             raise
     return wrapper
@@ -1,17 +1,80 @@
 import re
+from collections import OrderedDict
 from datetime import datetime
-from getpass import getpass
-from typing import Callable, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Type
 
-from rich.console import Console
+from input_provider import read_input
+from rich.text import Text
+from sentry_config import SharedConsole, span
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from models.models import Contract, Customer, Event, Role, User
 from views.menu_view import MenuView
 
 
+class LookupCache:
+    """
+    LRU cache of the rows looked up by primary key during an interaction.
+
+    Lookups go through Session.get, which answers from the session identity map
+    without a query when the row is already loaded. The cache keeps the last rows
+    alive so the validators and the controllers share the same object: a row
+    validated once is not fetched again when the controller needs it.
+    It is emptied whenever the session commits or rolls back.
+    """
+
+    def __init__(self, session: Session, maxsize: int = 128):
+        """
+        Initialize the cache for a session.
+
+        Args:
+            session (Session): The SQLAlchemy session the rows are loaded with.
+            maxsize (int): The maximum number of rows kept in the cache.
+        """
+        self.session = session
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        event.listen(session, "after_commit", self.invalidate)
+        event.listen(session, "after_rollback", self.invalidate)
+
+    def get(self, model: Type[Any], value: Any) -> Optional[Any]:
+        """
+        Return the row of a model with the given primary key.
+
+        Args:
+            model (Type): The model class to look up.
+            value (Any): The primary key, as an int or a string typed by the user.
+
+        Returns:
+            Optional[Any]: The row, or None if the value is not an ID or no row matches.
+        """
+        try:
+            key = (model, int(value))
+        except (TypeError, ValueError):
+            return None
+
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        instance = self.session.get(model, key[1])
+        if instance is not None:
+            self.entries[key] = instance
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return instance
+
+    def invalidate(self, *args: Any) -> None:
+        """
+        Empty the cache, called when the session commits or rolls back.
+        """
+        self.entries.clear()
+
+
 class DataValidator:
-    console = Console()
+    console = SharedConsole()
 
     def __init__(self, session: Session):
         """
@@ -21,6 +84,7 @@ class DataValidator:
             session (Session): The SQLAlchemy session for database operations.
         """
         self.session = session
+        self.lookups = LookupCache(session)
 
     def validate_input(self, prompt: str, validation_method: Callable, allow_empty: bool = False) -> Optional[str]:
         """
@@ -35,17 +99,60 @@ class DataValidator:
             Optional[str]: The validated input or None if empty input is allowed.
         """
         while True:
-            if "Mot de passe" in prompt:
-                value = getpass(prompt)
-            else:
-                value = input(prompt)
+            with span("input", prompt):
+                value = read_input(prompt, secret="Mot de passe" in prompt)
 
             if allow_empty and value.strip() == "":
                 return None
 
-            if validation_method(value):
+            with span("validation", getattr(validation_method, "__name__", "validate")):
+                valid = validation_method(value)
+            if valid:
                 return value
 
+    @staticmethod
+    def validate_row(row: Dict[str, Any], rules: Dict[str, Callable]) -> List[str]:
+        """
+        Validate every field of a row in batch mode, collecting all the errors instead of prompting again.
+
+        The messages the validation methods print are captured and returned with the field name.
+        Valid rows cost a single capture; fields are only checked one by one when the row is invalid.
+
+        Args:
+            row (Dict[str, Any]): The row to validate, keyed by field name.
+            rules (Dict[str, Callable]): The validation method of each field.
+
+        Returns:
+            List[str]: The error messages, empty if the row is valid.
+        """
+        with MenuView.console.capture():
+            invalid_fields = [field for field, validation_method in rules.items()
+                              if DataValidator.check_value(validation_method, row.get(field) or "") is not None]
+
+        errors = []
+        for field in invalid_fields:
+            with MenuView.console.capture() as capture:
+                message = DataValidator.check_value(rules[field], row.get(field) or "")
+            errors.append(f"{field}: {message or Text.from_ansi(capture.get()).plain.strip()}")
+        return errors
+
+    @staticmethod
+    def check_value(validation_method: Callable, value: Any) -> Optional[str]:
+        """
+        Run a validation method without raising.
+
+        Args:
+            validation_method (Callable): The method to validate the value.
+            value (Any): The value to validate.
+
+        Returns:
+            Optional[str]: None if the value is valid, otherwise the error raised (empty if nothing was raised).
+        """
+        try:
+            return None if validation_method(value) else ""
+        except ValueError as e:
+            return str(e)
+
     def validate_role_id(self, role_id: int) -> bool:
         """
         Validate that a role ID exists in the database.
@@ -56,7 +163,7 @@ class DataValidator:
         Returns:
             bool: True if the role ID is valid, False otherwise.
         """
-        role_exists = self.session.query(Role).filter_by(id=role_id).first()
+        role_exists = self.lookups.get(Role, role_id)
         if role_exists:
             return True
 
@@ -74,7 +181,7 @@ class DataValidator:
         Returns:
             bool: True if the user ID is valid, False otherwise.
         """
-        user = self.session.query(User).filter(User.id == value).first()
+        user = self.lookups.get(User, value)
         if user:
             if user.role.name == 'admin' and user.id != user_id:
                 MenuView.user_role_error()
@@ -94,7 +201,7 @@ class DataValidator:
         Returns:
             bool: True if the contract ID is valid and assigned to the user, False otherwise.
         """
-        contract = self.session.query(Contract).filter(Contract.id == value).first()
+        contract = self.lookups.get(Contract, value)
         if contract:
             if contract.customer.sales_contact_id == user_id:
                 return True
@@ -117,7 +224,7 @@ class DataValidator:
         if not value:
             MenuView.object_not_found_empty()
             return False
-        customer = self.session.query(Customer).filter(Customer.id == value).first()
+        customer = self.lookups.get(Customer, value)
         if customer:
             return True
         MenuView.customer_not_found(value)
@@ -134,7 +241,7 @@ class DataValidator:
         Returns:
             bool: True if the customer ID is valid and assigned to the user, False otherwise.
         """
-        customer = self.session.query(Customer).filter(Customer.id == value).first()
+        customer = self.lookups.get(Customer, value)
         if customer:
             if customer.sales_contact_id == user_id:
                 return True
@@ -157,7 +264,7 @@ class DataValidator:
         if not value:
             MenuView.object_not_found_empty()
             return False
-        event = self.session.query(Event).filter(Event.id == value).first()
+        event = self.lookups.get(Event, value)
         if event:
             return True
         MenuView.event_not_found(value)
@@ -173,7 +280,7 @@ class DataValidator:
         Returns:
             bool: True if the user ID belongs to a support user, False otherwise.
         """
-        user = self.session.query(User).filter(User.id == value).first()
+        user = self.lookups.get(User, value)
         if user:
             if user.role_id == 2:
                 return True
@@ -277,6 +384,23 @@ class DataValidator:
         MenuView.validate_phone_view()
         return False
 
+    @staticmethod
+    def validate_import_file(value: str) -> bool:
+        """
+        Validate that a path points to an existing CSV or JSONL file.
+
+        Args:
+            value (str): The path to validate.
+
+        Returns:
+            bool: True if the file exists and has a supported extension, False otherwise.
+        """
+        path = Path(value.strip())
+        if path.suffix.lower() in {".csv", ".jsonl"} and path.is_file():
+            return True
+        MenuView.validate_import_file_view()
+        return False
+
     @staticmethod
     def validate_attendees(value: int) -> bool:
         """
@@ -1,9 +1,10 @@
-from rich.console import Console
+from input_provider import read_input
 from rich.table import Table
+from sentry_config import SharedConsole
 
 
 class ContractView:
-    console = Console()
+    console = SharedConsole()
 
     def get_create_contract_prompts(self):
         self.console.print("\n[bold yellow]Créer un nouveau contrat[/bold yellow]\n")
@@ -26,7 +27,7 @@ class ContractView:
         return prompts
 
     def input_contract_id(self):
-        contract_id = int(input("\nEntrez l'ID du contrat: \n"))
+        contract_id = int(read_input("\nEntrez l'ID du contrat: \n"))
         return contract_id
 
     def display_contracts_view(self, contracts):
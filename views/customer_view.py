@@ -1,9 +1,10 @@
-from rich.console import Console
+from input_provider import read_input
 from rich.table import Table
+from sentry_config import SharedConsole
 
 
 class CustomerView:
-    console = Console()
+    console = SharedConsole()
 
     def get_create_customer_prompts(self):
         self.console.print("\n[bold yellow]Créer un nouveau client[/bold yellow]\n")
@@ -27,7 +28,7 @@ class CustomerView:
 
     def input_customer_id(self):
         self.console.print("\n[bold yellow]Entrez l'ID du client:[/bold yellow]\n")
-        customer_id = int(input("ID: "))
+        customer_id = int(read_input("ID: "))
         return customer_id
 
     def display_customers_view(self, customers):
@@ -52,6 +53,61 @@ class CustomerView:
 
         self.console.print(table)
 
+    def get_import_customers_prompts(self):
+        self.console.print("\n[bold yellow]Importer des clients[/bold yellow]\n")
+        prompts = {
+            "path": "Fichier à importer (.csv avec en-tête ou .jsonl): "
+        }
+        return prompts
+
+    def display_import_report(self, report):
+        self.console.print(f"\n[bold green]{report.inserted} client(s) importé(s).[/bold green]\n")
+        if not report.rejected:
+            return
+
+        table = Table(title=f"{len(report.rejected)} ligne(s) rejetée(s)")
+        table.add_column("Ligne", header_style="bold cornflower_blue")
+        table.add_column("Erreurs", header_style="bold cornflower_blue")
+
+        for line, errors in report.rejected:
+            table.add_row(str(line), "\n".join(errors))
+
+        self.console.print(table)
+
+    def duplicate_customer_warning(self, duplicates):
+        self.console.print("\n[bold yellow]Attention: ce client ressemble à des clients existants.[/bold yellow]")
+        for similarity, customer in duplicates:
+            self.console.print(f"  ID {customer.id}: {customer.full_name} ({customer.company_name}), "
+                               f"{similarity:.0%} de similarité")
+
+    def display_duplicate_clusters(self, duplicates):
+        if not duplicates:
+            self.console.print("\n[bold green]Aucun doublon probable.[/bold green]\n")
+            return
+
+        table = Table(title="Doublons probables")
+        table.add_column("Commercial ID", header_style="bold cornflower_blue")
+        table.add_column("Clients", header_style="bold cornflower_blue")
+
+        for sales_contact_id, clusters in duplicates.items():
+            for cluster in clusters:
+                table.add_row(
+                    str(sales_contact_id),
+                    "\n".join(f"{record.id}: {record.full_name} ({record.company_name}, {record.email})"
+                              + ("" if record.sales_contact_id == sales_contact_id
+                                 else f", commercial ID {record.sales_contact_id}")
+                              for record in cluster)
+                )
+
+        self.console.print(table)
+
+    def get_search_prompts(self):
+        self.console.print("\n[bold yellow]Rechercher des clients[/bold yellow]\n")
+        prompts = {
+            "search": "Mots recherchés: "
+        }
+        return prompts
+
     def customer_view_prompts(self):
         prompts = {
             "customer_id": "ID: "
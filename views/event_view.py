@@ -1,9 +1,9 @@
-from rich.console import Console
 from rich.table import Table
+from sentry_config import SharedConsole
 
 
 class EventView:
-    console = Console()
+    console = SharedConsole()
 
     def get_create_event_prompts(self):
         self.console.print("\n[bold yellow]Créer un nouvel événement[/bold yellow]\n")
@@ -61,6 +61,72 @@ class EventView:
 
         self.console.print(table)
 
+    def get_search_prompts(self):
+        self.console.print("\n[bold yellow]Rechercher des événements[/bold yellow]\n")
+        prompts = {
+            "search": "Mots recherchés: "
+        }
+        return prompts
+
+    def get_auto_assign_prompts(self):
+        self.console.print("\n[bold yellow]Affecter automatiquement les supports[/bold yellow]\n")
+        prompts = {
+            "start": "Début de la période (dd/mm/yyyy): ",
+            "end": "Fin de la période, exclue (dd/mm/yyyy): ",
+            "confirm": "Enregistrer ces affectations ? (oui/non): "
+        }
+        return prompts
+
+    def display_assignment_plan(self, plan, preview_rows=50):
+        table = Table(title=f"{len(plan.assignments)} affectation(s) prévue(s)")
+        table.add_column("ID de l'événement", header_style="bold cornflower_blue")
+        table.add_column("Nom de l'événement", header_style="bold cornflower_blue")
+        table.add_column("Date de début", header_style="bold cornflower_blue")
+        table.add_column("Date de fin", header_style="bold cornflower_blue")
+        table.add_column("Support", header_style="bold cornflower_blue")
+
+        for assignment in plan.assignments[:preview_rows]:
+            table.add_row(
+                str(assignment.event_id),
+                assignment.event_name,
+                str(assignment.event_start_date),
+                str(assignment.event_end_date),
+                assignment.support_name
+            )
+        self.console.print(table)
+        if len(plan.assignments) > preview_rows:
+            self.console.print(f"... et {len(plan.assignments) - preview_rows} autre(s).")
+
+        workloads = Table(title="Charge des supports")
+        workloads.add_column("Support", header_style="bold cornflower_blue")
+        workloads.add_column("Événements", header_style="bold cornflower_blue", justify="right")
+        for name, load in plan.workloads.items():
+            workloads.add_row(name, str(load))
+        self.console.print(workloads)
+
+        if plan.unassigned:
+            self.console.print(f"\n[bold red]{len(plan.unassigned)} événement(s) sans support disponible: "
+                               f"{', '.join(str(event_id) for event_id in plan.unassigned[:preview_rows])}"
+                               f"[/bold red]\n")
+
+    def assignments_saved(self, count):
+        self.console.print(f"\n[bold green]{count} événement(s) affecté(s).[/bold green]\n")
+
+    def assignments_cancelled(self):
+        self.console.print("\n[bold yellow]Aucune affectation enregistrée.[/bold yellow]\n")
+
+    def assignments_booked_meanwhile(self):
+        self.console.print(
+            "\n[bold red]Erreur: [/bold red] Aucune affectation enregistrée, un support a été affecté "
+            "entre-temps à un autre événement sur les mêmes dates.\n"
+        )
+
+    def display_assignment_benchmark(self, result):
+        self.console.print(
+            f"\n{result['assigned']}/{result['events']} événements affectés: "
+            f"plan en {result['plan_seconds']:.2f} s, enregistrement en {result['commit_seconds']:.2f} s\n"
+        )
+
     def event_view_prompts(self):
         prompts = {
             "event_id": "ID: ",
@@ -77,5 +143,17 @@ class EventView:
     def event_updated(self):
         self.console.print("\n[bold green]Événement mis à jour avec succès.[/bold green]\n")
 
+    def support_already_booked(self, support_id, event_id):
+        self.console.print(
+            f"\n[bold red]Erreur: [/bold red] Le support ID {support_id} couvre déjà "
+            f"l'événement ID {event_id} sur ces dates.\n"
+        )
+
+    def support_booked_meanwhile(self, support_id):
+        self.console.print(
+            f"\n[bold red]Erreur: [/bold red] L'événement n'a pas été modifié, le support ID {support_id} "
+            f"couvre déjà un autre événement sur ces dates.\n"
+        )
+
     def event_not_found(self):
         self.console.print("\n[bold red]Événement non trouvé.[/bold red]\n")
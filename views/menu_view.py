@@ -1,9 +1,10 @@
-from rich.console import Console
+from input_provider import read_input
 from rich.table import Table
+from sentry_config import SharedConsole
 
 
 class MenuView:
-    console = Console()
+    console = SharedConsole()
 
     @classmethod
     def select_choice(cls, title, options):
@@ -18,7 +19,7 @@ class MenuView:
         cls.console.print(table)
         while True:
             try:
-                choice = int(input("Quel est votre choix: "))
+                choice = int(read_input("Quel est votre choix: "))
                 if 1 <= choice <= len(options):
                     return choice
                 else:
@@ -29,12 +30,11 @@ class MenuView:
 
     @classmethod
     def get_user_choice(cls):
-        return int(input("\nQuel est votre choix ? : \n"))
+        return int(read_input("\nQuel est votre choix ? : \n"))
 
     @staticmethod
     def input_error():
-        console = Console()
-        console.print("\n[bold red]Input error, entrez une option valide ![/bold red]\n")
+        MenuView.console.print("\n[bold red]Input error, entrez une option valide ![/bold red]\n")
 
     @staticmethod
     def login_menu_options():
@@ -50,6 +50,8 @@ class MenuView:
             "Afficher les clients",
             "Afficher les contrats",
             "Afficher les événements",
+            "Rechercher des clients",
+            "Rechercher des événements",
             "Menu principal"
         ]
         return title, options
@@ -59,6 +61,7 @@ class MenuView:
         title = "Menu Commercial"
         options = ["Créer un client",
                    "Modifier un client",
+                   "Importer des clients",
                    "Créer un évenement",
                    "Modifier un contrat",
                    "Afficher les contrats",
@@ -85,11 +88,25 @@ class MenuView:
             "Créer un contrat",
             "Filtrer les évenements",
             "Assigner un support à un évenement",
+            "Affecter automatiquement les supports",
+            "Rapports",
             "Database [Read Only]",
             "Se déconnecter"
         ]
         return title, options
 
+    @staticmethod
+    def reports_menu_options():
+        title = "Rapports"
+        options = [
+            "Chiffre d'affaires par commercial",
+            "Chiffre d'affaires par client",
+            "Chiffre d'affaires par mois",
+            "Contrats signés / non signés",
+            "Retour"
+        ]
+        return title, options
+
     @staticmethod
     def filtered_contracts_menu_options():
         title = "Contracts filter"
@@ -126,6 +143,53 @@ class MenuView:
         choice = self.select_choice(title, options)
         action_map[choice]()
 
+    @staticmethod
+    def page_navigation_options(jump_label="Aller à l'ID"):
+        title = "Navigation"
+        options = [
+            "Page suivante",
+            "Page précédente",
+            jump_label,
+            "Retour"
+        ]
+        return title, options
+
+    def browse_pages(self, paginator, render):
+        page = paginator.first()
+        render(page.items)
+        while page.has_next or page.has_previous:
+            title, options = self.page_navigation_options(paginator.jump_label)
+            choice = self.select_choice(title, options)
+            if choice == 1:
+                if not page.has_next:
+                    self.no_more_pages()
+                    continue
+                page = paginator.next(page)
+            elif choice == 2:
+                if not page.has_previous:
+                    self.no_more_pages()
+                    continue
+                page = paginator.previous(page)
+            elif choice == 3:
+                page = paginator.jump(self.input_page_id(paginator.jump_prompt))
+            else:
+                return
+            render(page.items)
+
+    @classmethod
+    def input_page_id(cls, prompt="ID: "):
+        while True:
+            try:
+                return int(read_input(prompt))
+            except ValueError:
+                cls.console.print("\n[bold red]Choix invalide. Merci de rentrer un nombre valide.[/bold red]\n")
+
+    @staticmethod
+    def no_more_pages():
+        MenuView.console.print(
+            "\n[bold red]Erreur: [/bold red] Aucune page dans cette direction.\n"
+        )
+
     @staticmethod
     def contract_not_assigned_to_user(contract_id, user_id):
         MenuView.console.print(
@@ -236,6 +300,12 @@ class MenuView:
             "[bold red]Erreur: [/bold red ]Numéro de téléphone non valide."
         )
 
+    @staticmethod
+    def validate_import_file_view():
+        MenuView.console.print(
+            "[bold red]Erreur: [/bold red] Fichier introuvable ou format non supporté (.csv, .jsonl)."
+        )
+
     @staticmethod
     def validate_attendees_view():
         MenuView.console.print(
@@ -272,6 +342,42 @@ class MenuView:
             "[bold green]Vous êtes déconecté.[/bold green]"
         )
 
+    @staticmethod
+    def display_query_stats(stats):
+        MenuView.console.print(
+            f"\n[bold cornflower_blue]{stats.name}:[/bold cornflower_blue] "
+            f"{stats.queries} requête(s), {stats.seconds * 1000:.1f} ms en base"
+        )
+        for seconds, statement in stats.slowest_statements():
+            MenuView.console.print(f"  {seconds * 1000:.1f} ms  {' '.join(statement.split())[:100]}")
+        for shape, count in stats.n_plus_one().items():
+            MenuView.console.print(f"  [bold red]N+1:[/bold red] {count} x {shape[:100]}")
+
+    @staticmethod
+    def display_token_benchmark(result):
+        MenuView.console.print(
+            f"Vérification d'un token: {result['uncached_us']:.1f} µs, "
+            f"{result['cached_us']:.2f} µs avec le cache"
+        )
+
+    @staticmethod
+    def script_recorded(path, answers):
+        MenuView.console.print(f"\n[bold green]Session enregistrée dans {path}: {answers} réponse(s).[/bold green]\n")
+
+    @staticmethod
+    def display_load_test(result):
+        MenuView.console.print(
+            f"\n{result['runs']} session(s) rejouée(s) par {result['workers']} processus en "
+            f"{result['seconds']:.1f} s: {result['per_second']:.1f} actions/s, {result['errors']} en erreur\n"
+        )
+        table = Table(show_header=True, header_style="bold cornflower_blue")
+        for column in ("Action", "Appels", "Actions/s", "p50 (ms)", "p95 (ms)", "p99 (ms)"):
+            table.add_column(column, justify="left" if column == "Action" else "right")
+        for action in result["actions"]:
+            table.add_row(action["action"], str(action["calls"]), f"{action['per_second']:.1f}",
+                          f"{action['p50_ms']:.1f}", f"{action['p95_ms']:.1f}", f"{action['p99_ms']:.1f}")
+        MenuView.console.print(table)
+
     @staticmethod
     def check_token_view():
         MenuView.console.print(
@@ -0,0 +1,42 @@
+from rich.table import Table
+from sentry_config import SharedConsole
+
+
+class ReportView:
+    console = SharedConsole()
+
+    @staticmethod
+    def format_name(name):
+        if name is None:
+            return "-"
+        if isinstance(name, bool):
+            return "Signés" if name else "Non signés"
+        return str(name)
+
+    def display_report_view(self, title, rows):
+        table = Table(title=title)
+        # The reports limited to their first rows give the number of rows they would have had
+        total_rows = getattr(rows[0], "total_rows", None) if rows else None
+        if total_rows is not None and total_rows > len(rows):
+            table.caption = f"Les {len(rows)} premiers sur {total_rows}"
+
+        table.add_column("", header_style="bold cornflower_blue")
+        table.add_column("Contrats", header_style="bold cornflower_blue", justify="right")
+        table.add_column("Signés", header_style="bold cornflower_blue", justify="right")
+        table.add_column("Non signés", header_style="bold cornflower_blue", justify="right")
+        table.add_column("Montant total", header_style="bold cornflower_blue", justify="right")
+        table.add_column("CA signé", header_style="bold cornflower_blue", justify="right")
+        table.add_column("Reste dû", header_style="bold cornflower_blue", justify="right")
+
+        for row in rows:
+            table.add_row(
+                self.format_name(row.name),
+                str(row.contracts),
+                str(row.signed),
+                str(row.unsigned),
+                f"{row.amount_total:,.2f}",
+                f"{row.revenue:,.2f}",
+                f"{row.amount_due:,.2f}"
+            )
+
+        self.console.print(table)
@@ -1,15 +1,15 @@
-from getpass import getpass
-
-from rich.console import Console
+from input_provider import read_input
+from rich.table import Table
+from sentry_config import SharedConsole
 
 
 class UserView:
-    console = Console()
+    console = SharedConsole()
 
     def input_login_view(self):
         self.console.print("\n[bold yellow]Entrer vos identifiants[/bold yellow]\n")
-        username = input("Email de connexion: ")
-        password = getpass("Mot de passe: ")
+        username = read_input("Email de connexion: ")
+        password = read_input("Mot de passe: ", secret=True)
         return username, password
 
     def get_create_user_prompts(self):
@@ -32,6 +32,18 @@ class UserView:
         }
         return prompts
 
+    def display_dashboard(self, counters):
+        table = Table(title="Tableau de bord")
+        table.add_column("Indicateur", header_style="bold cornflower_blue")
+        table.add_column("Nombre", header_style="bold cornflower_blue", justify="right")
+
+        table.add_row("Contrats non signés", str(counters["unsigned_contracts"]))
+        table.add_row("Contrats impayés", str(counters["unpaid_contracts"]))
+        table.add_row("Événements sans support", str(counters["unassigned_events"]))
+        table.add_row("Événements des 7 prochains jours", str(counters["upcoming_events"]))
+
+        self.console.print(table)
+
     def user_view_prompts(self):
         prompts = {
             "user_id": "ID: "
@@ -78,6 +90,10 @@ class UserView:
     def table_creation_error(e):
         UserView.console.print(f"\n[bold red]Erreur lors de la création des tables: {e}[/bold red]\n")
 
+    @staticmethod
+    def migration_applied(version):
+        UserView.console.print(f"\n[bold green]Migration {version} appliquée avec succès.[/bold green]\n")
+
     @staticmethod
     def role_created_successfull(role_name):
         UserView.console.print(f"\n[bold green]Rôle '{role_name}' créé avec succès.[/bold green]\n")
@@ -102,6 +118,36 @@ class UserView:
     def password_updated_successfull():
         UserView.console.print("\n[bold green]Mot de passe mis à jour avec succès.[/bold green]\n")
 
+    @staticmethod
+    def display_password_timings(parameters, timings):
+        table = Table(title="Coût des mots de passe (Argon2)")
+        table.add_column("Paramètre", header_style="bold cornflower_blue")
+        table.add_column("Valeur", header_style="bold cornflower_blue", justify="right")
+
+        table.add_row("Itérations", str(parameters["TIME_COST"]))
+        table.add_row("Mémoire (KiB)", str(parameters["MEMORY_COST"]))
+        table.add_row("Parallélisme", str(parameters["PARALLELISM"]))
+        table.add_row("Connexion p50 (ms)", f"{timings['p50_ms']:.1f}")
+        table.add_row("Connexion p99 (ms)", f"{timings['p99_ms']:.1f}")
+
+        UserView.console.print(table)
+
+    @staticmethod
+    def display_login_benchmark(result):
+        UserView.console.print(
+            f"\n{result['logins']} connexions simultanées, {result['workers']} thread(s): "
+            f"{result['concurrent_seconds']:.2f} s (une par une: {result['serial_seconds']:.2f} s), "
+            f"p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms\n"
+        )
+
+    @staticmethod
+    def login_busy():
+        UserView.console.print("\n[bold red]Erreur: [/bold red] Trop de connexions en cours, réessayez.\n")
+
+    @staticmethod
+    def password_settings_saved(path):
+        UserView.console.print(f"\n[bold green]Paramètres enregistrés dans {path}.[/bold green]\n")
+
     @staticmethod
     def logout_view():
         UserView.console.print("\n[bold green]Utilisateur déconnecté.[/bold green]\n")